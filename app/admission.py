@@ -0,0 +1,214 @@
+"""Admission control: per-tool concurrency limits, bounded queues and deadlines.
+
+Every tool has a ``ToolLimiter``. At most ``limit`` executions of it run at
+once and at most ``queue_size`` more wait for a slot, so a burst of slow
+``llm`` queries cannot pile up unbounded upstream awaits or delay cheap
+``math`` calls. Requests beyond the queue are shed at once (429), and a
+request whose deadline passes while it waits gives up (503).
+
+A deadline is an absolute ``time.monotonic()`` value fixed when the request
+arrives and passed down through routing and ``Tool.run``. ``within_deadline``
+cancels work still running when it passes (504).
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, TypeVar
+
+from app.config import get_settings
+from app.metrics import ADMISSION_REJECTED, DEADLINE_EXCEEDED, QUEUE_SECONDS
+
+T = TypeVar("T")
+
+
+class AdmissionError(Exception):
+    """Request refused or abandoned; carries the HTTP status to report."""
+    status_code = 503
+    reason = "overloaded"
+
+    def __init__(self, message: str, tool: str | None = None):
+        super().__init__(message)
+        self.tool = tool
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Retry-After": "1"} if self.status_code in (429, 503) else {}
+
+    def detail(self) -> dict[str, Any]:
+        detail = {"error": str(self), "status": self.status_code, "reason": self.reason}
+        if self.tool:
+            detail["tool"] = self.tool
+        return detail
+
+
+class QueueFull(AdmissionError):
+    status_code = 429
+    reason = "queue_full"
+
+
+class QueueTimeout(AdmissionError):
+    status_code = 503
+    reason = "queue_timeout"
+
+
+class DeadlineExceeded(AdmissionError):
+    status_code = 504
+    reason = "deadline"
+
+
+class ToolTimeout(AdmissionError):
+    """A thread/process tool call ran past ``TOOL_HARD_TIMEOUT`` (see ``app.tools.registry``)."""
+
+    status_code = 504
+    reason = "tool_timeout"
+
+
+def new_deadline(budget_ms: float | None = None) -> float | None:
+    """Absolute deadline for a request arriving now.
+
+    ``budget_ms`` (client supplied) can only shorten ``REQUEST_DEADLINE``;
+    None means no deadline at all.
+    """
+    budgets = [b for b in (get_settings().request_deadline, (budget_ms or 0) / 1000) if b > 0]
+    return time.monotonic() + min(budgets) if budgets else None
+
+
+def remaining(deadline: float | None) -> float | None:
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def remaining_ms(deadline: float | None) -> float | None:
+    left = remaining(deadline)
+    return None if left is None else round(max(0.0, left) * 1000, 2)
+
+
+async def within_deadline(awaitable: Awaitable[T], deadline: float | None, stage: str, tool: str | None = None) -> T:
+    """Await ``awaitable``, cancelling it when ``deadline`` passes."""
+    left = remaining(deadline)
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()  # never started
+        DEADLINE_EXCEEDED.labels(stage).inc()
+        raise DeadlineExceeded(f"Deadline exceeded before {stage}", tool)
+    try:
+        async with asyncio.timeout(left):
+            return await awaitable
+    except TimeoutError:
+        DEADLINE_EXCEEDED.labels(stage).inc()
+        raise DeadlineExceeded(f"Deadline exceeded during {stage}", tool) from None
+
+
+async def stream_within(stream: AsyncIterator[T], deadline: float | None, stage: str, tool: str | None = None) -> AsyncIterator[T]:
+    """Re-yield ``stream``, cancelling it when ``deadline`` passes.
+
+    Each item is awaited under the deadline separately, so the timeout never
+    fires while the consumer is busy with an already-yielded item.
+    """
+    if deadline is None:
+        async for item in stream:
+            yield item
+        return
+    try:
+        while True:
+            try:
+                item = await within_deadline(anext(stream), deadline, stage, tool)
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        await stream.aclose()
+
+
+class ToolLimiter:
+    """At most ``limit`` concurrent runs plus ``queue_size`` waiters (limit 0 = unlimited)."""
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self._slots = asyncio.Semaphore(limit) if limit > 0 else None
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+        }
+
+    @asynccontextmanager
+    async def slot(self, deadline: float | None = None) -> AsyncIterator[float]:
+        """Hold a run slot for the block; yields the seconds spent queued."""
+        start = time.perf_counter()
+        if self._slots is not None:
+            await self._acquire(deadline)
+        queued = time.perf_counter() - start
+        QUEUE_SECONDS.labels(self.name).observe(queued)
+        self.admitted += 1
+        self.active += 1
+        try:
+            yield queued
+        finally:
+            self.active -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    async def _acquire(self, deadline: float | None) -> None:
+        assert self._slots is not None
+        if not self._slots.locked():
+            await self._slots.acquire()  # free slot: returns without suspending
+            return
+        if self.waiting >= self.queue_size:
+            self._reject(QueueFull(f"Too many queued '{self.name}' requests (limit {self.limit}, queue {self.queue_size})", self.name))
+        left = remaining(deadline)
+        if left is not None and left <= 0:
+            self._reject(QueueTimeout(f"Deadline passed before a '{self.name}' slot was free", self.name))
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(left):
+                await self._slots.acquire()
+        except TimeoutError:
+            self._reject(QueueTimeout(f"Deadline passed before a '{self.name}' slot was free", self.name))
+        finally:
+            self.waiting -= 1
+
+    def _reject(self, error: AdmissionError) -> None:
+        if isinstance(error, QueueFull):
+            self.shed += 1
+        else:
+            self.timed_out += 1
+        ADMISSION_REJECTED.labels(self.name, error.reason).inc()
+        raise error
+
+
+def _limits() -> dict[str, tuple[int, int]]:
+    settings = get_settings()
+    return {
+        "llm": (settings.llm_max_concurrency, settings.llm_max_queue),
+        "weather": (settings.weather_max_concurrency, settings.weather_max_queue),
+        "math": (settings.math_max_concurrency, settings.math_max_queue),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_limiter(tool: str) -> ToolLimiter:
+    limit, queue_size = _limits().get(tool, (0, 0))
+    return ToolLimiter(tool, limit, queue_size)
+
+
+def admission_stats() -> dict[str, dict[str, Any]]:
+    return {tool: get_limiter(tool).stats for tool in _limits()}
@@ -7,48 +7,73 @@ Design:
 
 Requires GOOGLE_API_KEY for ChatGoogleGenerativeAI.
 Falls back to legacy heuristic if LangChain or API key unavailable.
+
+LangChain is imported when the chain is first built (``_get_agent``, or
+``warmup`` at startup), so importing this module stays cheap.
 """
 from __future__ import annotations
 
-from typing import Callable, Any, Optional
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
-from pydantic import BaseModel, Field
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from typing import Callable, Any, Optional, AsyncIterator, Iterator
+from pydantic import BaseModel, Field, model_validator
 
+from app.admission import AdmissionError, DeadlineExceeded, get_limiter, new_deadline, remaining_ms, stream_within, within_deadline
+from app.answer_cache import bypass_answer_cache, get_answer_cache
 from app.config import get_settings
-from app.tools.math_tool import MathTool
-from app.tools.weather_tool import WeatherTool
+from app.decompose import split_intents
+from app.gazetteer import lookup_city
+from app.local_router import extract_argument, get_local_router, log_decision, route_locally
+from app.providers import prepare_chat_model
+from app.metrics import (
+    AGENT_FAILURES, FALLBACKS, ROUTING_SECONDS, SPECULATION_SAVED_SECONDS, SPECULATION_WASTED_SECONDS, SPECULATIONS,
+    TOOL_ERRORS, TOOL_SECONDS,
+)
+from app.routing_batcher import RoutingBatcher
+from app.rules import get_rule_engine, heuristic_tool
+from app.semantic_cache import get_semantic_cache
+from app.routing_cache import get_routing_cache, normalize_query
 from app.tools.llm_tool import LLMTool
+from app.tools.registry import get_registry
 
-math_tool = MathTool()
-weather_tool = WeatherTool()
-llm_tool = LLMTool()
-
-TOOLS_MAP = {
-    "math": math_tool,
-    "weather": weather_tool,
-    "llm": llm_tool,
-}
+# Built-in tools plus any from TOOLS / entry points, by name; each runs under
+# its execution policy (app.tools.registry)
+TOOLS_MAP = get_registry().tools
 
 # Pydantic model for structured output
 class ToolSelection(BaseModel):
     tool: str = Field(description="Selected tool name: math, weather, or llm")
     input: str = Field(description="Input string to pass to the selected tool")
 
+
+class ToolPlan(BaseModel):
+    """One call per independent part of the question (usually just one)."""
+
+    calls: list[ToolSelection] = Field(description="Tool calls, one per independent part of the question")
+
+    @model_validator(mode="before")
+    @classmethod
+    def _single_call(cls, data: Any) -> Any:
+        # A bare {"tool", "input"} answer is a one-call plan
+        if isinstance(data, dict) and "calls" not in data and "tool" in data:
+            return {"calls": [data]}
+        return data
+
 # Tool descriptions for the prompt
 TOOL_DESCRIPTIONS = """
 - math: Evaluate arithmetic expressions. Input should be raw expression like "42 * 7", "10 + 5 / 2", "2**8"
 - weather: Get weather for a location. Input should be ONLY the city name like "Paris", "New York", "Jakarta", "Tokyo"
 - llm: General knowledge questions. Input should be the original user question
-"""
+""" + "".join(f"- {name}: {tool.description}\n" for name, tool in TOOLS_MAP.items() if name not in ("math", "weather", "llm"))
 
 def build_prompt_template() -> Any:
     """Build prompt template with Pydantic output parser."""
-    if not PromptTemplate or not PydanticOutputParser:
-        return None
-    
-    parser = PydanticOutputParser(pydantic_object=ToolSelection)
+    from langchain_core.output_parsers import PydanticOutputParser
+    from langchain_core.prompts import PromptTemplate
+
+    parser = PydanticOutputParser(pydantic_object=ToolPlan)
     
     prompt = PromptTemplate(
         template="""You are a tool router that selects the best tool for user questions.
@@ -62,6 +87,7 @@ Instructions:
 - For math queries: extract ONLY the mathematical expression (e.g., "42 * 7")
 - For weather queries: extract ONLY the city name (e.g., "Jakarta", "New York", "Paris") - NO extra words
 - For other queries: use the original question as input
+- If the question asks for several independent things (e.g. weather in two cities and a calculation), return one call per part; otherwise return exactly one call
 
 IMPORTANT: For weather, output ONLY the city name, nothing else!
 
@@ -74,15 +100,54 @@ User question: {input}""",
     
     return prompt, parser
 
+
+STRUCTURED_ROUTING_METHODS = ("json_schema", "function_calling")
+
+
+def build_structured_router(llm: Any, method: str = "json_schema") -> Any:
+    """Routing chain on the model's native structured output (``ROUTING_MODE``).
+
+    The model is constrained to the ``ToolPlan`` schema (response schema or a
+    function declaration), so the prompt needs no format instructions or
+    output rules and nothing is re-parsed from free text.
+    """
+    from langchain_core.prompts import ChatPromptTemplate
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "Route the question to tools, one call per independent part.\nTools:{tools}"),
+        ("human", "{input}"),
+    ])
+    return prompt | llm.with_structured_output(ToolPlan, method=method)
+
+
 _agent_chain: Any = None  # store built LangChain chain
+_router_llm: Any = None  # the chat model inside it (warmup prepares it)
 
 
-def _build_agent() -> Any:  # pragma: no cover - network path
+def _build_router_llm() -> Any:  # pragma: no cover - network path
     settings = get_settings()
-    if not settings.google_api_key or not PromptTemplate:
+    if not settings.google_api_key:
         return None
-    
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=settings.google_api_key, temperature=0)
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash",
+        google_api_key=settings.google_api_key,
+        temperature=0,
+        base_url=settings.gemini_base_url,
+    )
+
+
+def _build_agent() -> Any:
+    global _router_llm
+    llm = _build_router_llm()
+    if llm is None:
+        return None
+    _router_llm = llm
+
+    mode = get_settings().routing_mode
+    if mode in STRUCTURED_ROUTING_METHODS:
+        return build_structured_router(llm, mode)
     
     prompt_and_parser = build_prompt_template()
     if not prompt_and_parser:
@@ -102,66 +167,562 @@ def _get_agent() -> Any:
     return _agent_chain
 
 
-async def agentic_select_and_run(query: str) -> dict[str, Any]:
-    """Route query via agent; run actual tool; return structured dict.
+_routing_batcher: RoutingBatcher | None = None
+
+
+def _get_batcher() -> RoutingBatcher | None:
+    """Shared micro-batcher (only when ROUTING_BATCH_ENABLED)."""
+    global _routing_batcher
+    settings = get_settings()
+    if not settings.routing_batch_enabled:
+        return None
+    if _routing_batcher is None:
+        llm = _build_router_llm()
+        if llm is None:
+            return None
+        _routing_batcher = RoutingBatcher(
+            llm,
+            TOOL_DESCRIPTIONS,
+            ToolSelection,
+            tools=list(TOOLS_MAP),
+            window=settings.routing_batch_window_ms / 1000,
+            max_size=settings.routing_batch_max_size,
+        )
+    return _routing_batcher
+
 
-    Returns: {query, tool_used, result, routed_via_agent: bool, raw_decision?: str}
+async def warmup() -> dict[str, float]:
+    """Build what the first request would otherwise pay for; seconds per step.
+
+    SDK imports and client construction run in a worker thread so the event
+    loop keeps answering liveness probes meanwhile. Tool worker processes are
+    spawned last.
     """
-    agent_chain = _get_agent()
+    steps: dict[str, float] = {}
+
+    async def step(name: str, build: Callable[[], Any], threaded: bool = False) -> None:
+        start = time.perf_counter()
+        if threaded:
+            await asyncio.to_thread(build)
+        else:
+            build()
+        steps[name] = time.perf_counter() - start
+
+    await step("router_chain", _prepare_router, threaded=True)
+    await step("routing_batcher", _get_batcher)
+    await step("providers", _prepare_providers, threaded=True)
+    await step("caches", _prime_caches)
+    start = time.perf_counter()
+    await get_registry().start()  # spawns thread/process tool workers
+    steps["tool_workers"] = time.perf_counter() - start
+    return steps
+
+
+def _prepare_router() -> None:
+    # The chain's steps differ per ROUTING_MODE; the chat model is kept aside
+    if _get_agent() is not None and _router_llm is not None:
+        prepare_chat_model(_router_llm)
+
+
+def _prepare_providers() -> None:
+    for provider in getattr(TOOLS_MAP.get("llm"), "providers", ()):
+        provider.prepare()
+
+
+def _prime_caches() -> None:
+    get_routing_cache()
+    get_answer_cache()
+    get_semantic_cache()
+    get_local_router()
+    get_rule_engine()
+    if get_registry().policy("math") == "inline":
+        TOOLS_MAP["math"].evaluate("1 + 1")
+
+
+async def _route_with_agent(agent_chain: Any, query: str) -> list[ToolSelection]:
+    batcher = _get_batcher()
+    if batcher is None:
+        plan = await agent_chain.ainvoke({
+            "tools": TOOL_DESCRIPTIONS,
+            "input": query
+        })
+        return plan.calls if isinstance(plan, ToolPlan) else [plan]
+    calls = await batcher.route_calls(query)
+    if not calls:
+        raise ValueError("no valid decision for this query in batch response")
+    return calls
+
+
+async def route_query(
+    query: str, deadline: float | None = None, on_agent_call: Callable[[], None] | None = None,
+) -> dict[str, Any]:
+    """Decide which tool handles ``query`` and with what input.
+
+    A compound question ("weather in Paris and what is 17*23") may get several
+    independent calls: ``tool_used`` is then ``"multi"`` and ``calls`` lists
+    ``{tool_used, input}`` per part (from the agent, or ``app.decompose``
+    without one).
+
+    The routing agent call is cancelled at ``deadline`` (``DeadlineExceeded``):
+    there would be no time left to run the tool anyway. ``on_agent_call`` runs
+    just before it (speculative execution starts there).
+
+    Returns: {tool_used, input, routed_via_agent: bool, routing_cache_hit: bool,
+              routed_locally: bool, calls?: list, raw_decision?: str}
+    """
+    start = time.perf_counter()
+    source = "heuristic"
     routed_via_agent = False
+    routing_cache_hit = False
     tool_name: str | None = None
     tool_input = query
+    calls: list[tuple[str, str]] | None = None
     raw_decision = None
 
+    # Previously routed decision for the same (normalized) query skips the LLM
+    cache_key = normalize_query(query)
+    cached = await get_routing_cache().aget(cache_key)
+    if cached is not None:
+        if isinstance(cached[0], str):
+            tool_name, tool_input = cached
+        else:
+            calls = [(tool, tool_input) for tool, tool_input in cached]
+        routed_via_agent = True
+        routing_cache_hit = True
+        source = "cache"
+        raw_decision = f"Selected (cached): {_describe(calls or [(tool_name, tool_input)])}"
+
+    # Compound questions go to the agent (or get split locally below); the
+    # local classifier would pick one tool for the whole question
+    compound = split_intents(query) if cached is None else None
+
+    # Confident local classifier decision also skips the routing LLM call
+    routed_locally = False
+    if cached is None and compound is None:
+        local = route_locally(query)
+        if local is not None:
+            tool_name, tool_input, confidence = local
+            routed_locally = True
+            source = "local"
+            raw_decision = f"Selected (local, p={confidence:.2f}): {tool_name}, Input: {tool_input}"
+
+    agent_chain = _get_agent() if tool_name is None and calls is None else None
     if agent_chain:
+        if on_agent_call is not None:
+            on_agent_call()
         try: 
-            result = await agent_chain.ainvoke({
-                "tools": TOOL_DESCRIPTIONS,
-                "input": query
-            })
-            
-            # result is now a ToolSelection Pydantic model
-            tool_name = result.tool
-            tool_input = result.input
+            selections = await within_deadline(_route_with_agent(agent_chain, query), deadline, "routing")
+            selections = selections[:get_settings().multi_intent_max_calls]
+
+            # One ToolSelection per independent part of the question
+            tool_name = selections[0].tool
+            tool_input = selections[0].input
             routed_via_agent = True
-            raw_decision = f"Selected: {tool_name}, Input: {tool_input}"
-            
+            raw_decision = f"Selected: {_describe([(s.tool, s.input) for s in selections])}"
+            valid = [(s.tool, s.input) for s in selections if s.tool in TOOLS_MAP]
+            if len(valid) < len(selections):
+                AGENT_FAILURES.inc()
+            if len(valid) > 1:
+                source = "agent"
+                calls = valid
+                await get_routing_cache().aset(cache_key, [list(call) for call in calls])
+            elif valid:
+                source = "agent"
+                tool_name, tool_input = valid[0]
+                await get_routing_cache().aset(cache_key, (tool_name, tool_input))
+                log_decision(query, tool_name, tool_input)
+
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             tool_name = None
+            AGENT_FAILURES.inc()
             raw_decision = f"Agent failed: {str(e)}"
 
-    # Fallback: simple heuristics if agent missing/fails
-    if tool_name not in TOOLS_MAP:
-        q = query.lower()
-        if any(k in q for k in ["weather", "temperature", "rain", "forecast"]):
-            tool_name = "weather"
-        elif any(sym in q for sym in ["+", "-", "*", "/"]) and any(ch.isdigit() for ch in q):
-            tool_name = "math"
+    # Fallback: the local split of a compound question, else simple heuristics
+    if calls is None and tool_name not in TOOLS_MAP:
+        if compound is not None:
+            calls = compound
+            source = "decomposed"
+            raw_decision = f"Selected (decomposed): {_describe(calls)}"
         else:
-            tool_name = "llm"
+            tool_name = heuristic_tool(query)
+            FALLBACKS.labels("routing_heuristic").inc()
+    ROUTING_SECONDS.labels(source).observe(time.perf_counter() - start)
+
+    decision: dict[str, Any] = {"tool_used": tool_name, "input": tool_input}
+    if calls is not None:
+        decision = {
+            "tool_used": "multi",
+            "input": query,
+            "calls": [{"tool_used": tool, "input": call_input} for tool, call_input in calls],
+        }
+    return {
+        **decision,
+        "routed_via_agent": routed_via_agent,
+        "routing_cache_hit": routing_cache_hit,
+        "routed_locally": routed_locally,
+        **({"raw_decision": raw_decision} if raw_decision and (routed_via_agent or routed_locally or calls) else {}),
+    }
+
+
+def _describe(calls: list[tuple[str, str]]) -> str:
+    return "; ".join(f"{tool}, Input: {tool_input}" for tool, tool_input in calls)
 
-    # Execute chosen tool
-    tool = TOOLS_MAP[tool_name]
-    result = await tool.run(tool_input)
+
+async def agentic_select_and_run(
+    query: str, bypass_cache: bool = False, deadline: float | None = None,
+) -> dict[str, Any]:
+    """Route query via agent; run actual tool; return structured dict.
+
+    ``bypass_cache`` skips cached LLM answers (a fresh answer is still stored).
+    ``deadline`` (monotonic, default ``REQUEST_DEADLINE`` from now) bounds
+    routing, the wait for a tool slot and the tool run; see ``app.admission``.
+
+    A multi-call decision runs its calls concurrently, each admitted to its own
+    tool; ``result`` merges the answers and ``calls`` has them one by one.
+
+    With ``SPECULATIVE_EXECUTION``, the tool the heuristics predict is started
+    while the routing agent decides; see ``_Speculation``.
+
+    Returns: {query, tool_used, result, queued_ms, routed_via_agent: bool,
+              routing_cache_hit: bool, routed_locally: bool, calls?: list,
+              speculation?: "hit" | "miss", raw_decision?: str}
+    """
+    if deadline is None:
+        deadline = new_deadline()
+    speculation = _Speculation(query, deadline, bypass_cache) if get_settings().speculative_execution else None
+    try:
+        decision = await route_query(query, deadline, speculation.start if speculation else None)
+        speculated = await speculation.commit(decision) if speculation else None
+    finally:
+        if speculation is not None:
+            speculation.discard("aborted")  # routing failed; no-op once committed
+    if speculation is not None and speculation.outcome:
+        decision["speculation"] = speculation.outcome
+
+    if "calls" in decision:
+        with bypass_answer_cache(bypass_cache):
+            outcomes = await asyncio.gather(
+                *(_run_call(call, deadline) for call in decision["calls"]), return_exceptions=True,
+            )
+        # Partial answers are still answers; only a total failure is an error
+        if all(isinstance(outcome, Exception) for outcome in outcomes):
+            raise outcomes[0]
+        calls = [_call_entry(i, call, outcome) for i, (call, outcome) in enumerate(zip(decision.pop("calls"), outcomes))]
+        decision.pop("input")
+        return {
+            "query": query,
+            "tool_used": decision.pop("tool_used"),
+            "result": merge_results(calls),
+            "calls": calls,
+            "queued_ms": max(call.get("queued_ms", 0.0) for call in calls),
+            **decision,
+        }
+
+    # Execute chosen tool once admitted (unless the speculative run already did)
+    tool_name = decision["tool_used"]
+    tool_input = decision.pop("input")
+    if speculated is not None:
+        result, queued = speculated
+    else:
+        async with get_limiter(tool_name).slot(deadline) as queued:
+            with bypass_answer_cache(bypass_cache), _tool_timer(tool_name):
+                result = await get_registry().run(tool_name, tool_input, deadline)
 
     return {
         "query": query,
-        "tool_used": tool_name,
+        "tool_used": decision.pop("tool_used"),
         "result": result,
-        "routed_via_agent": routed_via_agent,
-        **({"raw_decision": raw_decision} if raw_decision and routed_via_agent else {}),
+        "queued_ms": round(queued * 1000, 2),
+        **decision,
     }
 
 
-async def agentic_stream(query: str):
-    """Async generator yielding a single JSON line for streaming response.
+class _Speculation:
+    """The heuristically predicted tool, run while the routing agent decides.
+
+    Only for ``SPECULATIVE_TOOLS`` whose argument the heuristics can extract,
+    and only when routing actually calls the agent (not on cache or local
+    router hits). The run is admitted like any other. If the agent picks the
+    same tool with the same argument, its result is used ("hit"). Otherwise
+    it is cancelled and its time counted as wasted ("miss"). Thread and
+    process runs cannot be interrupted; they finish in the background.
+    """
+
+    def __init__(self, query: str, deadline: float, bypass_cache: bool = False):
+        self.deadline = deadline
+        self.bypass_cache = bypass_cache
+        self.tool = heuristic_tool(query)
+        speculative = {name.strip() for name in get_settings().speculative_tools.split(",")}
+        self.input = extract_argument(self.tool, query) if self.tool in speculative and self.tool in TOOLS_MAP else None
+        self.task: asyncio.Task | None = None
+        self.outcome: str | None = None
+        self.started = self.finished = 0.0
+
+    def start(self) -> None:
+        if self.input is not None and self.task is None:
+            self.started = time.perf_counter()
+            self.task = asyncio.create_task(self._run())
+            # A discarded run's error is nobody's business
+            self.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def _run(self) -> tuple[Any, float]:
+        try:
+            async with get_limiter(self.tool).slot(self.deadline) as queued:
+                with bypass_answer_cache(self.bypass_cache):
+                    return await get_registry().run(self.tool, self.input, self.deadline), queued
+        finally:
+            self.finished = time.perf_counter()
+
+    async def commit(self, decision: dict[str, Any]) -> tuple[Any, float] | None:
+        """(result, seconds queued) if ``decision`` matches the prediction, else None."""
+        if self.task is None:
+            return None
+        if decision["tool_used"] != self.tool or not _same_input(self.tool, decision["input"], self.input):
+            self.discard("miss")
+            return None
+        task, self.task, self.outcome = self.task, None, "hit"
+        routed = time.perf_counter()
+        SPECULATIONS.labels(self.tool, "hit").inc()
+        try:
+            return await task
+        except Exception:
+            TOOL_ERRORS.labels(self.tool).inc()
+            raise
+        finally:
+            finished = self.finished or time.perf_counter()
+            TOOL_SECONDS.labels(self.tool).observe(finished - self.started)
+            SPECULATION_SAVED_SECONDS.labels(self.tool).inc(min(routed, finished) - self.started)
+
+    def discard(self, outcome: str) -> None:
+        if self.task is None:
+            return
+        task, self.task, self.outcome = self.task, None, outcome
+        task.cancel()
+        SPECULATIONS.labels(self.tool, outcome).inc()
+        SPECULATION_WASTED_SECONDS.labels(self.tool).inc((self.finished or time.perf_counter()) - self.started)
+
+
+def _same_input(tool: str, a: str, b: str) -> bool:
+    if tool == "weather":
+        # Spellings the weather tool resolves to the same city give the same answer
+        a, b = ((city.name if (city := lookup_city(x)) else x) for x in (a, b))
+    return "".join(a.casefold().split()) == "".join(b.casefold().split())
+
+
+async def _run_call(
+    call: dict[str, str], deadline: float, on_delta: Callable[[str], None] | None = None,
+) -> tuple[Any, float]:
+    """Run one call of a multi-call decision; (result, seconds queued).
+
+    With ``on_delta``, LLM answers are streamed to it chunk by chunk.
+    """
+    tool_name, tool_input = call["tool_used"], call["input"]
+    tool = TOOLS_MAP[tool_name]
+    async with get_limiter(tool_name).slot(deadline) as queued:
+        with _tool_timer(tool_name):
+            if on_delta is not None and isinstance(tool, LLMTool):
+                parts = []
+                async for delta in stream_within(tool.stream(tool_input), deadline, "tool", tool_name):
+                    parts.append(delta)
+                    on_delta(delta)
+                return "".join(parts), queued
+            return await get_registry().run(tool_name, tool_input, deadline), queued
+
+
+def _call_entry(index: int, call: dict[str, str], outcome: tuple[Any, float] | BaseException) -> dict[str, Any]:
+    entry: dict[str, Any] = {"index": index, **call}
+    if isinstance(outcome, AdmissionError):
+        entry.update(outcome.detail())
+    elif isinstance(outcome, BaseException):
+        entry["error"] = str(outcome)
+    else:
+        entry["result"], queued = outcome
+        entry["queued_ms"] = round(queued * 1000, 2)
+    return entry
+
+
+def merge_results(calls: list[dict[str, Any]]) -> str:
+    """One answer for a multi-call decision: a line per call, in question order."""
+    lines = []
+    for call in calls:
+        if "result" not in call:
+            lines.append(f"{call['tool_used']} ({call['input']}) failed: {call['error']}")
+        elif call["tool_used"] == "math":
+            lines.append(f"{call['input']} = {call['result']}")
+        else:
+            lines.append(str(call["result"]))
+    return "\n".join(lines)
+
+
+@contextmanager
+def _tool_timer(tool_name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        TOOL_ERRORS.labels(tool_name).inc()
+        raise
+    finally:
+        TOOL_SECONDS.labels(tool_name).observe(time.perf_counter() - start)
+
+
+def _ms(since: float) -> float:
+    return round((time.perf_counter() - since) * 1000, 2)
+
+
+async def agentic_stream(
+    query: str, bypass_cache: bool = False, deadline: float | None = None,
+) -> AsyncIterator[str]:
+    """Async generator yielding NDJSON events as they happen.
+
+    1. ``{"event": "route", ...}`` once routed and admitted to the tool.
+    2. ``{"event": "delta", "text": ...}`` for each LLM token chunk (llm tool only).
+    3. ``{"event": "result", "query", "tool_used", "result", "timings"}`` last.
+
+    A multi-call decision streams its calls concurrently: ``delta`` events
+    carry the call's ``index``, each finished call yields a ``partial`` event,
+    and the final ``result`` has the merged answer plus ``calls``.
 
     Keeps streaming concerns out of the router so the function can be reused.
+    Routing deadline and admission errors (``AdmissionError``) are raised
+    before the first event, so the endpoint can still answer 429/503/504.
     """
-    payload = await agentic_select_and_run(query)
-    import json as _json
-    yield _json.dumps({
+    start = time.perf_counter()
+    if deadline is None:
+        deadline = new_deadline()
+    decision = await route_query(query, deadline)
+    if "calls" in decision:
+        async for line in _stream_calls(query, decision, bypass_cache, deadline, start):
+            yield line
+        return
+    tool_name, tool_input = decision["tool_used"], decision["input"]
+    timings = {"routing_ms": _ms(start)}
+
+    tool = TOOLS_MAP[tool_name]
+    async with get_limiter(tool_name).slot(deadline) as queued:
+        timings["queued_ms"] = round(queued * 1000, 2)
+        yield json.dumps({"event": "route", "query": query, "deadline_ms": remaining_ms(deadline), **decision}) + "\n"
+        try:
+            with bypass_answer_cache(bypass_cache), _tool_timer(tool_name):
+                if isinstance(tool, LLMTool):
+                    parts = []
+                    async for delta in stream_within(tool.stream(tool_input), deadline, "tool", tool_name):
+                        if not parts:
+                            timings["first_token_ms"] = _ms(start)
+                        parts.append(delta)
+                        yield json.dumps({"event": "delta", "text": delta}) + "\n"
+                    result = "".join(parts)
+                else:
+                    result = await get_registry().run(tool_name, tool_input, deadline)
+        except DeadlineExceeded as e:
+            yield json.dumps({"event": "error", "query": query, "tool_used": tool_name, "detail": str(e),
+                              "status": e.status_code}) + "\n"
+            return
+        except Exception as e:
+            yield json.dumps({"event": "error", "query": query, "tool_used": tool_name, "detail": str(e)}) + "\n"
+            return
+    timings["total_ms"] = _ms(start)
+    yield json.dumps({
+        "event": "result",
+        "query": query,
+        "tool_used": tool_name,
+        "result": result,
+        "timings": timings,
+    }) + "\n"
+
+
+async def _stream_calls(
+    query: str, decision: dict[str, Any], bypass_cache: bool, deadline: float, start: float,
+) -> AsyncIterator[str]:
+    timings = {"routing_ms": _ms(start)}
+    yield json.dumps({"event": "route", "query": query, "deadline_ms": remaining_ms(deadline), **decision}) + "\n"
+    events: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+    calls: list[dict[str, Any]] = []
+
+    async def run(index: int, call: dict[str, str]) -> None:
+        def on_delta(text: str) -> None:
+            events.put_nowait({"event": "delta", "index": index, "text": text})
+
+        try:
+            outcome: Any = await _run_call(call, deadline, on_delta)
+        except Exception as e:
+            outcome = e
+        entry = _call_entry(index, call, outcome)
+        calls.append(entry)
+        events.put_nowait({"event": "partial", **entry})
+
+    with bypass_answer_cache(bypass_cache):
+        tasks = [asyncio.create_task(run(i, call)) for i, call in enumerate(decision["calls"])]
+    try:
+        while len(calls) < len(tasks) or not events.empty():
+            event = await events.get()
+            if event["event"] == "partial" and "first_result_ms" not in timings:
+                timings["first_result_ms"] = _ms(start)
+            yield json.dumps(event) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+    calls.sort(key=lambda call: call["index"])
+    timings["total_ms"] = _ms(start)
+    yield json.dumps({
+        "event": "result",
+        "query": query,
+        "tool_used": "multi",
+        "result": merge_results(calls),
+        "calls": calls,
+        "timings": timings,
+    }) + "\n"
+
+
+async def agentic_result_line(
+    query: str, bypass_cache: bool = False, deadline: float | None = None,
+) -> AsyncIterator[str]:
+    """Single JSON line with the complete answer (non-incremental /query)."""
+    payload = await agentic_select_and_run(query, bypass_cache, deadline)
+    yield json.dumps({
         "query": payload["query"],
         "tool_used": payload["tool_used"],
         "result": payload["result"],
+        **({"calls": payload["calls"]} if "calls" in payload else {}),
     }) + "\n"
+
+
+async def agentic_batch_stream(
+    queries: list[str], concurrency: int | None = None, bypass_cache: bool = False,
+    deadline: float | None = None,
+) -> AsyncIterator[str]:
+    """Run many queries concurrently; yield one NDJSON line per query as it finishes.
+
+    Lines are in completion order and tagged with the query's ``index``. At most
+    ``concurrency`` queries are routed/executed at once, all under one
+    ``deadline``. Unfinished queries are cancelled if the consumer goes away.
+    """
+    limit = asyncio.Semaphore(concurrency or get_settings().query_batch_concurrency)
+    if deadline is None:
+        deadline = new_deadline()
+
+    async def one(index: int, query: str) -> dict[str, Any]:
+        async with limit:
+            try:
+                payload = await agentic_select_and_run(query, bypass_cache, deadline)
+            except AdmissionError as e:
+                return {"index": index, "query": query, **e.detail()}
+            except Exception as e:
+                return {"index": index, "query": query, "error": str(e)}
+        return {
+            "index": index,
+            "query": payload["query"],
+            "tool_used": payload["tool_used"],
+            "result": payload["result"],
+            **({"calls": payload["calls"]} if "calls" in payload else {}),
+        }
+
+    tasks = [asyncio.create_task(one(i, q)) for i, q in enumerate(queries)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield json.dumps(await finished) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
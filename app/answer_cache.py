@@ -0,0 +1,297 @@
+"""Tiered cache of LLM answers keyed on (normalized query, provider, model).
+
+- memory: LRU bounded by ``ANSWER_CACHE_MEMORY_BYTES`` of answer text.
+- disk (optional, ``ANSWER_CACHE_PATH``): SQLite file bounded by
+  ``ANSWER_CACHE_DISK_BYTES``, least recently used rows evicted first. It
+  survives restarts and is shared by workers on the same host.
+- shared (optional, ``CACHE_BACKEND=redis``): checked between memory and
+  disk and written through, so workers on different hosts share answers too.
+  ``compute_once`` lets one worker ask the providers while the others wait
+  for its answer instead of sending the same question.
+
+Every entry carries its own expiry (``ANSWER_CACHE_TTL`` unless given). Only
+real provider answers are stored; ``LLMTool`` never caches its stub. A request
+can skip lookups with ``bypass_answer_cache()`` (its fresh answer is still
+stored).
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Iterator, Sequence
+
+from app.cache import register_stats
+from app.cache_backend import CacheBackend, get_shared_backend
+from app.config import get_settings
+from app.providers import LLMProvider
+from app.routing_cache import normalize_query
+
+_bypass: ContextVar[bool] = ContextVar("bypass_answer_cache", default=False)
+_FLIGHT_TTL = 60.0  # how long a computed answer stays readable for workers that waited on it
+
+
+@contextlib.contextmanager
+def bypass_answer_cache(bypass: bool = True) -> Iterator[None]:
+    """Skip answer cache lookups for LLM calls made inside the block."""
+    token = _bypass.set(bypass)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def answer_cache_bypassed() -> bool:
+    return _bypass.get()
+
+
+def _size(key: str, answer: str) -> int:
+    return len(key.encode()) + len(answer.encode())
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        ttl: float,
+        memory_bytes: int,
+        path: str | None = None,
+        disk_bytes: int = 0,
+        name: str | None = None,
+        clock: Callable[[], float] = time.time,  # wall clock: entries outlive the process
+        shared: CacheBackend | None = None,
+    ):
+        self.ttl = ttl
+        self.shared = shared
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._clock = clock
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()  # key -> (expires_at, answer)
+        self._memory_size = 0
+        self._db: sqlite3.Connection | None = None
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path and disk_bytes > 0:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS answers (
+                    key TEXT PRIMARY KEY,
+                    answer TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used);
+            """)
+            self._disk_size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM answers").fetchone()[0]
+        if name:
+            register_stats(name, self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and (self.memory_bytes > 0 or self._db is not None or self.shared is not None)
+
+    @staticmethod
+    def key(query: str, provider: LLMProvider) -> str:
+        return json.dumps([normalize_query(query), provider.name, getattr(provider, "model", "")])
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        found = self.hits + self.shared_hits + self.disk_hits
+        lookups = found + self.misses
+        return {
+            "size": len(self._memory),
+            "memory_bytes": self._memory_size,
+            "disk_bytes": self._disk_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": found / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        self._memory.clear()
+        self._memory_size = 0
+        if self._db is not None:
+            with self._lock:
+                self._db.execute("DELETE FROM answers")
+                self._disk_size = 0
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # -- memory tier ---------------------------------------------------------
+
+    def _memory_get(self, key: str, now: float) -> str | None:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, answer = entry
+        if expires_at <= now:
+            self._memory_pop(key)
+            return None
+        self._memory.move_to_end(key)
+        return answer
+
+    def _memory_pop(self, key: str) -> None:
+        _, answer = self._memory.pop(key)
+        self._memory_size -= _size(key, answer)
+
+    def _memory_set(self, key: str, answer: str, expires_at: float) -> None:
+        size = _size(key, answer)
+        if key in self._memory:
+            self._memory_pop(key)
+        if size > self.memory_bytes:
+            return
+        self._memory[key] = (expires_at, answer)
+        self._memory_size += size
+        while self._memory_size > self.memory_bytes:
+            self._memory_pop(next(iter(self._memory)))
+            self.evictions += 1
+
+    # -- disk tier (runs in a worker thread) ---------------------------------
+
+    def _disk_get(self, keys: Sequence[str], now: float) -> tuple[str, str, float] | None:
+        assert self._db is not None
+        with self._lock:
+            for key in keys:
+                row = self._db.execute(
+                    "SELECT answer, expires_at FROM answers WHERE key = ?", (key,),
+                ).fetchone()
+                if row is None:
+                    continue
+                if row[1] <= now:
+                    self._disk_delete(key)
+                    continue
+                self._db.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+                return key, row[0], row[1]
+        return None
+
+    def _disk_delete(self, key: str) -> None:
+        row = self._db.execute("DELETE FROM answers WHERE key = ? RETURNING size", (key,)).fetchone()  # type: ignore[union-attr]
+        if row is not None:
+            self._disk_size -= row[0]
+
+    def _disk_set(self, key: str, answer: str, expires_at: float, now: float) -> None:
+        assert self._db is not None
+        size = _size(key, answer)
+        if size > self.disk_bytes:
+            return
+        with self._lock:
+            self._disk_delete(key)
+            self._db.execute(
+                "INSERT INTO answers (key, answer, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, answer, size, expires_at, now),
+            )
+            self._disk_size += size
+            if self._disk_size > self.disk_bytes:
+                self._db.execute("DELETE FROM answers WHERE expires_at <= ?", (now,))
+                self._disk_size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM answers").fetchone()[0]
+            while self._disk_size > self.disk_bytes:
+                rows = self._db.execute(
+                    "SELECT key FROM answers WHERE key != ? ORDER BY last_used LIMIT 64", (key,),
+                ).fetchall()
+                if not rows:
+                    break
+                for (old,) in rows:
+                    self._disk_delete(old)
+                    self.evictions += 1
+                    if self._disk_size <= self.disk_bytes:
+                        break
+
+    # -- public API ----------------------------------------------------------
+
+    async def get(self, query: str, providers: Sequence[LLMProvider]) -> str | None:
+        """Cached answer from the first provider (in preference order) that has one."""
+        if not self.enabled or not providers:
+            return None
+        keys = [self.key(query, p) for p in providers]
+        now = self._clock()
+        for key in keys:
+            answer = self._memory_get(key, now)
+            if answer is not None:
+                self.hits += 1
+                return answer
+        if self.shared is not None:
+            for key in keys:
+                found = await self.shared.get(key)
+                if found is not None and isinstance(found[0], str):
+                    answer, age = found
+                    self._memory_set(key, answer, now + self.ttl - age)
+                    self.shared_hits += 1
+                    return answer
+        if self._db is not None:
+            found = await asyncio.to_thread(self._disk_get, keys, now)
+            if found is not None:
+                key, answer, expires_at = found
+                self._memory_set(key, answer, expires_at)
+                self.disk_hits += 1
+                return answer
+        self.misses += 1
+        return None
+
+    async def set(self, query: str, provider: LLMProvider, answer: str, ttl: float | None = None) -> None:
+        if not self.enabled or not isinstance(answer, str) or not answer:
+            return
+        now = self._clock()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        key = self.key(query, provider)
+        self._memory_set(key, answer, expires_at)
+        if self.shared is not None:
+            await self.shared.set(key, answer, expires_at - now)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, answer, expires_at, now)
+
+    async def compute_once(
+        self,
+        query: str,
+        providers: Sequence[LLMProvider],
+        compute: Callable[[], Awaitable[tuple[LLMProvider, str] | None]],
+    ) -> tuple[LLMProvider, str] | None:
+        """``compute()`` (ask the providers), run by one worker per question.
+
+        Only with a shared backend; workers asking the same question meanwhile
+        get that worker's ``(provider, answer)``. Stub results (None) aren't shared.
+        """
+        if self.shared is None or not self.enabled or answer_cache_bypassed():
+            return await compute()
+        by_name = {p.name: p for p in providers}
+
+        async def answer() -> list[str] | None:
+            answered = await compute()
+            return None if answered is None else [answered[0].name, answered[1]]
+
+        flight = json.dumps(["answer", normalize_query(query), [self.key("", p) for p in providers]])
+        value, _ = await self.shared.get_or_compute(flight, answer, _FLIGHT_TTL, cache_if=lambda v: v is not None)
+        if value is None or value[0] not in by_name:
+            return None
+        return by_name[value[0]], value[1]
+
+
+@lru_cache
+def get_answer_cache() -> AnswerCache:
+    settings = get_settings()
+    return AnswerCache(
+        ttl=settings.answer_cache_ttl,
+        memory_bytes=settings.answer_cache_memory_bytes,
+        path=settings.answer_cache_path,
+        disk_bytes=settings.answer_cache_disk_bytes,
+        name="answers",
+        shared=get_shared_backend(),
+    )
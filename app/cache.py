@@ -0,0 +1,252 @@
+"""In-process TTL caches with LRU eviction and single-flight fetching.
+
+``TTLCache.get_or_fetch`` is the main entry point:
+
+- fresh hit: return the cached value.
+- stale hit (older than ``ttl`` but within ``ttl + stale_ttl``): return the
+  stale value immediately and refresh it in the background.
+- miss: call ``fetch``; concurrent misses for the same key share one call.
+
+Fetch errors propagate to every waiter and are never cached. A waiter that
+is cancelled (deadline, dropped socket) stops waiting without cancelling the
+shared fetch for the others; see ``SingleFlight``.
+
+With a ``shared`` backend (``app.cache_backend``, e.g. Redis for several
+workers) a local miss is looked up there, fetches go through its cross-worker
+``get_or_compute``, and stores are written through (``aget`` / ``aset`` for
+callers that don't fetch).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Hashable
+
+if TYPE_CHECKING:
+    from app.cache_backend import CacheBackend
+
+_registry: dict[str, Any] = {}  # name -> any cache exposing a ``stats`` dict
+
+
+def register_stats(name: str, cache: Any) -> None:
+    _registry[name] = cache
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    """Counters for every named cache (served by ``/cache/stats``)."""
+    return {name: cache.stats for name, cache in _registry.items()}
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Concurrent ``run`` calls for one key share a single call of ``fn``.
+
+    The call is a task owned here, not by the first caller, and callers only
+    await it through ``asyncio.shield``. A caller that gives up stops waiting
+    without cancelling it for the others; it is cancelled once nobody is
+    waiting any more.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(partial(self._finished, key, flight))
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _finished(self, key: Hashable, flight: _Flight, task: asyncio.Task) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        _swallow(task)  # retrieved even when every waiter gave up
+
+
+class TTLCache:
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        name: str | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        shared: CacheBackend | None = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self.shared = shared
+        self._namespace = name or "cache"
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight = SingleFlight()
+        self._refreshing: set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        if name:
+            register_stats(name, self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def _lookup(self, key: Hashable) -> tuple[Any, float] | None:
+        """Return (value, age) if present and not fully expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        age = self._clock() - stored_at
+        if age > self.ttl + self.stale_ttl:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value, age
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return a fresh value or None (counts as hit/miss)."""
+        if not self.enabled:
+            return None
+        found = self._lookup(key)
+        if found is None or found[1] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return found[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        self._set_aged(key, value, 0.0)
+
+    def _set_aged(self, key: Hashable, value: Any, age: float) -> None:
+        self._data[key] = (self._clock() - age, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{self._namespace}:{json.dumps(key)}"
+
+    async def aget(self, key: Hashable) -> Any | None:
+        """``get``, falling back to the shared backend on a local miss."""
+        value = self.get(key)
+        if value is not None or self.shared is None or not self.enabled:
+            return value
+        found = await self.shared.get(self._shared_key(key))
+        if found is None:
+            return None
+        value, age = found
+        self._set_aged(key, value, age)
+        return value
+
+    async def aset(self, key: Hashable, value: Any) -> None:
+        """``set``, written through to the shared backend."""
+        self.set(key, value)
+        if self.shared is not None and self.enabled:
+            await self.shared.set(self._shared_key(key), value, self.ttl)
+
+    def snapshot(self) -> list[tuple[Hashable, Any, float]]:
+        """Live entries as (key, value, wall-clock stored_at) for persistence."""
+        now, wall = self._clock(), time.time()
+        return [
+            (key, value, wall - (now - stored_at))
+            for key, (stored_at, value) in self._data.items()
+            if now - stored_at <= self.ttl + self.stale_ttl
+        ]
+
+    def restore(self, entries: list[tuple[Hashable, Any, float]]) -> int:
+        """Load entries produced by ``snapshot``; expired ones are skipped."""
+        if not self.enabled:
+            return 0
+        wall = time.time()
+        loaded = 0
+        for key, value, stored_wall in entries:
+            age = wall - stored_wall
+            if 0 <= age <= self.ttl + self.stale_ttl:
+                self._set_aged(key, value, age)
+                loaded += 1
+        return loaded
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await fetch()
+        found = self._lookup(key)
+        if found is not None:
+            value, age = found
+            if age <= self.ttl:
+                self.hits += 1
+                return value
+            self.stale_hits += 1
+            if key not in self._inflight:
+                task = asyncio.ensure_future(self._fetch_shared(key, fetch))
+                task.add_done_callback(_swallow)
+                self._refreshing.add(task)
+                task.add_done_callback(self._refreshing.discard)
+                self.refreshes += 1
+            return value
+        self.misses += 1
+        return await self._fetch_shared(key, fetch)
+
+    async def _fetch_shared(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        return await self._inflight.run(key, partial(self._fetch_and_store, key, fetch))
+
+    async def _fetch_and_store(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        if self.shared is None:
+            value, age = await fetch(), 0.0
+        else:
+            # Other workers may have it, or be fetching it right now
+            value, age = await self.shared.get_or_compute(self._shared_key(key), fetch, self.ttl)
+        self._set_aged(key, value, age)
+        return value
+
+
+def _swallow(task: asyncio.Task) -> None:
+    # Background refresh failures keep serving the stale value.
+    if not task.cancelled():
+        task.exception()
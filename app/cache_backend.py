@@ -0,0 +1,292 @@
+"""Cache storage backends shared by the routing, weather and answer caches.
+
+The in-process caches (``TTLCache``, ``AnswerCache``) stay the first tier.
+With several uvicorn workers each would otherwise fill and warm its own copy.
+A shared backend (``CACHE_BACKEND=redis``) is consulted on a local miss and
+written through on every store, so one worker's upstream call serves them all.
+
+``CacheBackend.get_or_compute`` is the stampede guard. Concurrent callers for
+one key, in any worker, share a single ``compute``:
+
+- ``MemoryBackend``: in-process dict with per-key futures (one worker, tests).
+- ``RedisBackend``: any Redis-compatible server. The first caller takes a
+  lease (``SET key NX PX``) and computes. The others poll for the value and
+  take over if the lease is released or expires without one.
+
+Values are JSON; entries keep their store time so a tier above can age them
+correctly. Backend failures never fail a request: lookups miss and
+``get_or_compute`` just computes.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from app.cache import SingleFlight, register_stats
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+Compute = Callable[[], Awaitable[Any]]
+
+
+def _always(value: Any) -> bool:
+    return True
+
+
+class CacheBackend(ABC):
+    """Async key/value store with TTLs; ``get`` returns ``(value, age)``."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.computes = 0
+        self.waits = 0  # callers served by someone else's compute
+        self.errors = 0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "computes": self.computes,
+            "waits": self.waits,
+            "errors": self.errors,
+        }
+
+    @abstractmethod
+    async def get(self, key: str) -> tuple[Any, float] | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def get_or_compute(
+        self, key: str, compute: Compute, ttl: float, cache_if: Callable[[Any], bool] = _always,
+    ) -> tuple[Any, float]:
+        """Cached ``(value, age)``, or run ``compute`` once for every concurrent caller.
+
+        Results failing ``cache_if`` are returned but not stored. Errors
+        propagate to every caller sharing the computation.
+        """
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process backend: LRU dict plus in-process single flight."""
+
+    def __init__(self, maxsize: int = 4096, clock: Callable[[], float] = time.time):
+        super().__init__()
+        self.maxsize = maxsize
+        self._clock = clock
+        self._data: OrderedDict[str, tuple[float, float, str]] = OrderedDict()  # key -> (stored, expires, json)
+        self._inflight = SingleFlight()
+
+    async def get(self, key: str) -> tuple[Any, float] | None:
+        entry = self._data.get(key)
+        now = self._clock()
+        if entry is None or entry[1] <= now:
+            self._data.pop(key, None)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return json.loads(entry[2]), now - entry[0]
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        now = self._clock()
+        self._data[key] = (now, now + ttl, json.dumps(value))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def get_or_compute(self, key, compute, ttl, cache_if=_always):
+        found = await self.get(key)
+        if found is not None:
+            return found
+        if key in self._inflight:
+            self.waits += 1
+        # The backend owns the compute task: a waiter that is cancelled does
+        # not abort it for the others
+        return await self._inflight.run(key, lambda: self._compute(key, compute, ttl, cache_if)), 0.0
+
+    async def _compute(self, key: str, compute: Compute, ttl: float, cache_if: Callable[[Any], bool]) -> Any:
+        self.computes += 1
+        value = await compute()
+        if cache_if(value):
+            await self.set(key, value, ttl)
+        return value
+
+
+class RedisBackend(CacheBackend):
+    """Backend on a Redis-compatible server, shared by every worker.
+
+    ``client`` is any ``redis.asyncio.Redis``-compatible object (tests pass a
+    ``fakeredis`` one); otherwise one is created from ``url``.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "router:",
+        lock_ttl: float = 30.0,
+        poll_interval: float = 0.01,
+        max_connections: int = 64,
+        client: Any = None,
+    ):
+        super().__init__()
+        if client is None:
+            import redis.asyncio as redis  # optional dependency, only for this backend
+
+            # Bursts wait briefly for a pooled connection instead of opening hundreds
+            pool = redis.BlockingConnectionPool.from_url(url, max_connections=max_connections, timeout=1.0)
+            client = redis.Redis(connection_pool=pool)
+        self._client = client
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self._local = MemoryBackend(maxsize=0)  # in-process single flight in front of the lease
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _failed(self, action: str, error: Exception) -> None:
+        if not self.errors:
+            logger.warning("Shared cache %s failed, continuing without it: %s", action, error)
+        self.errors += 1
+
+    async def get(self, key: str) -> tuple[Any, float] | None:
+        try:
+            raw = await self._client.get(self._key(key))
+        except Exception as e:
+            self._failed("get", e)
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        stored_at, value = json.loads(raw)
+        return value, max(0.0, time.time() - stored_at)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        try:
+            await self._client.set(self._key(key), json.dumps([time.time(), value]), px=max(1, int(ttl * 1000)))
+        except Exception as e:
+            self._failed("set", e)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._client.delete(self._key(key))
+        except Exception as e:
+            self._failed("delete", e)
+
+    async def close(self) -> None:
+        await self._client.aclose(close_connection_pool=True)
+
+    async def get_or_compute(self, key, compute, ttl, cache_if=_always):
+        found = await self.get(key)
+        if found is not None:
+            return found
+        # Callers in this process share one lease attempt; the lease covers other processes
+        return await self._local.get_or_compute(key, lambda: self._compute_once(key, compute, ttl, cache_if), 0)
+
+    async def _compute_once(self, key: str, compute: Compute, ttl: float, cache_if: Callable[[Any], bool]) -> Any:
+        lock = self._key(f"lock:{key}")
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_ttl
+        delay = self.poll_interval
+        while True:
+            try:
+                leased = await self._client.set(lock, token, nx=True, px=int(self.lock_ttl * 1000))
+            except Exception as e:
+                self._failed("lock", e)
+                leased = True  # no coordination possible: just compute
+            if leased or time.monotonic() > deadline:
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.2)
+            found = await self.get(key)
+            if found is not None:
+                self.waits += 1
+                return found[0]
+        try:
+            found = await self.get(key)  # stored between our miss and the lease
+            if found is not None:
+                return found[0]
+            self.computes += 1
+            value = await compute()
+            if cache_if(value):
+                await self.set(key, value, ttl)
+            return value
+        finally:
+            await self._release(lock, token)
+
+    async def _release(self, lock: str, token: str) -> None:
+        """Delete the lease only if still ours (it may have expired and been retaken)."""
+        from redis.exceptions import WatchError
+
+        try:
+            async with self._client.pipeline(transaction=True) as pipe:
+                await pipe.watch(lock)
+                current = await pipe.get(lock)
+                if isinstance(current, bytes):
+                    current = current.decode()
+                if current == token:
+                    pipe.multi()
+                    pipe.delete(lock)
+                    await pipe.execute()
+        except WatchError:
+            pass  # the lease changed hands meanwhile
+        except Exception as e:
+            self._failed("unlock", e)
+
+
+_backend: CacheBackend | None = None
+
+
+def get_shared_backend() -> CacheBackend | None:
+    """The cross-worker backend from ``CACHE_BACKEND``; None for ``memory`` (per process)."""
+    global _backend
+    settings = get_settings()
+    if settings.cache_backend == "memory":
+        return None
+    if _backend is None:
+        if settings.cache_backend != "redis":
+            raise ValueError(f"Unknown CACHE_BACKEND {settings.cache_backend!r} (expected memory or redis)")
+        _backend = RedisBackend(
+            url=settings.cache_redis_url,
+            prefix=settings.cache_key_prefix,
+            lock_ttl=settings.cache_lock_ttl,
+            max_connections=settings.cache_redis_max_connections,
+        )
+        register_stats("shared", _backend)
+    return _backend
+
+
+async def close_shared_backend() -> None:
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
@@ -1,6 +1,7 @@
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
@@ -11,9 +12,107 @@ class Settings(BaseSettings):
     openrouter_site_url: str | None = Field(default=None, alias="OPENROUTER_SITE_URL")
     openrouter_title: str | None = Field(default=None, alias="OPENROUTER_TITLE")
     google_api_key: str | None = Field(default=None, alias="GOOGLE_API_KEY")
+    # Upstream endpoints (point at local stubs for load tests); unset = provider default
+    openrouter_base_url: str = Field(default="https://openrouter.ai/api/v1", alias="OPENROUTER_BASE_URL")
+    openai_base_url: str | None = Field(default=None, alias="OPENAI_BASE_URL")
+    gemini_base_url: str | None = Field(default=None, alias="GEMINI_BASE_URL")
     model_name: str = Field(default="gpt-4o-mini", alias="MODEL_NAME")
+    routing_cache_ttl: float = Field(default=86400.0, alias="ROUTING_CACHE_TTL")  # seconds; 0 disables
+    routing_cache_size: int = Field(default=4096, alias="ROUTING_CACHE_SIZE")
+    routing_cache_path: str | None = Field(default=None, alias="ROUTING_CACHE_PATH")  # JSON file; unset = memory only
+    routing_mode: Literal["parser", "json_schema", "function_calling"] = Field(default="parser", alias="ROUTING_MODE")  # parser (format instructions) | json_schema | function_calling
+    routing_batch_enabled: bool = Field(default=False, alias="ROUTING_BATCH_ENABLED")  # one Gemini call for many queries
+    routing_batch_window_ms: float = Field(default=10.0, alias="ROUTING_BATCH_WINDOW_MS")
+    routing_batch_max_size: int = Field(default=16, alias="ROUTING_BATCH_MAX_SIZE")
+    routing_rules_path: str | None = Field(default=None, alias="ROUTING_RULES_PATH")  # JSON RuleTable; unset = built-in rules
+    routing_log_path: str | None = Field(default=None, alias="ROUTING_LOG_PATH")  # JSONL of agent decisions (training data)
+    local_router_path: str | None = Field(default=None, alias="LOCAL_ROUTER_PATH")  # .npz from `python -m app.local_router train`
+    local_router_threshold: float = Field(default=0.9, alias="LOCAL_ROUTER_THRESHOLD")
+    llm_timeout: float = Field(default=60.0, alias="LLM_TIMEOUT")  # per provider attempt
+    llm_max_connections: int = Field(default=20, alias="LLM_MAX_CONNECTIONS")  # per provider pool
+    llm_health_window: int = Field(default=100, alias="LLM_HEALTH_WINDOW")  # attempts kept per provider
+    llm_breaker_failures: int = Field(default=5, alias="LLM_BREAKER_FAILURES")  # consecutive failures to open circuit
+    llm_breaker_cooldown: float = Field(default=30.0, alias="LLM_BREAKER_COOLDOWN")  # seconds before a probe
+    llm_prefer_fastest: bool = Field(default=False, alias="LLM_PREFER_FASTEST")  # order by rolling p50, not preference
+    llm_hedge_enabled: bool = Field(default=False, alias="LLM_HEDGE_ENABLED")  # race next provider after p95 delay
+    llm_hedge_delay: float = Field(default=2.0, alias="LLM_HEDGE_DELAY")  # until enough latency samples exist
+    answer_cache_ttl: float = Field(default=86400.0, alias="ANSWER_CACHE_TTL")  # per-entry default; 0 disables
+    answer_cache_memory_bytes: int = Field(default=16 * 2 ** 20, alias="ANSWER_CACHE_MEMORY_BYTES")
+    answer_cache_path: str | None = Field(default=None, alias="ANSWER_CACHE_PATH")  # SQLite file; unset = memory only
+    answer_cache_disk_bytes: int = Field(default=256 * 2 ** 20, alias="ANSWER_CACHE_DISK_BYTES")
+    semantic_cache_enabled: bool = Field(default=False, alias="SEMANTIC_CACHE_ENABLED")  # paraphrase hits for llm answers
+    semantic_cache_threshold: float = Field(default=0.8, alias="SEMANTIC_CACHE_THRESHOLD")  # min cosine similarity
+    semantic_cache_size: int = Field(default=4096, alias="SEMANTIC_CACHE_SIZE")  # entries; index = size * dim * 4 bytes
+    semantic_cache_dim: int = Field(default=512, alias="SEMANTIC_CACHE_DIM")
+    semantic_cache_ttl: float = Field(default=86400.0, alias="SEMANTIC_CACHE_TTL")
+    cache_backend: str = Field(default="memory", alias="CACHE_BACKEND")  # memory (per process) or redis (shared)
+    cache_redis_url: str = Field(default="redis://localhost:6379/0", alias="CACHE_REDIS_URL")
+    cache_key_prefix: str = Field(default="router:", alias="CACHE_KEY_PREFIX")
+    cache_redis_max_connections: int = Field(default=64, alias="CACHE_REDIS_MAX_CONNECTIONS")  # per worker; extra callers wait
+    cache_lock_ttl: float = Field(default=30.0, alias="CACHE_LOCK_TTL")  # lease while one worker computes a value (s)
     weather_default_city: str = Field(default="San Francisco", alias="WEATHER_DEFAULT_CITY")
     weather_units: str = Field(default="metric", alias="WEATHER_UNITS")  # metric for Celsius, imperial for Fahrenheit
+    openweather_url: str = Field(default="https://api.openweathermap.org/data/2.5/weather", alias="OPENWEATHER_URL")
+    weather_cache_ttl: float = Field(default=600.0, alias="WEATHER_CACHE_TTL")  # seconds; 0 disables the cache
+    weather_cache_stale_ttl: float = Field(default=300.0, alias="WEATHER_CACHE_STALE_TTL")  # serve stale + refresh window
+    weather_cache_size: int = Field(default=1024, alias="WEATHER_CACHE_SIZE")
+    gazetteer_enabled: bool = Field(default=True, alias="GAZETTEER_ENABLED")  # normalize city names / ids offline
+    gazetteer_path: str | None = Field(default=None, alias="GAZETTEER_PATH")  # .gaz from `python -m app.gazetteer build`; default bundled
+    gazetteer_max_edits: int = Field(default=2, alias="GAZETTEER_MAX_EDITS")  # misspelling tolerance (names under 9 chars: 1); GAZETTEER_PATH only
+    weather_batch_enabled: bool = Field(default=False, alias="WEATHER_BATCH_ENABLED")  # merge lookups into group requests
+    weather_batch_window_ms: float = Field(default=10.0, alias="WEATHER_BATCH_WINDOW_MS")
+    weather_batch_max_size: int = Field(default=20, alias="WEATHER_BATCH_MAX_SIZE")  # city ids per request (API max 20)
+    openweather_group_url: str = Field(default="https://api.openweathermap.org/data/2.5/group", alias="OPENWEATHER_GROUP_URL")
+
+    ws_max_in_flight: int = Field(default=8, alias="WS_MAX_IN_FLIGHT")  # concurrent requests per WebSocket
+    query_batch_concurrency: int = Field(default=8, alias="QUERY_BATCH_CONCURRENCY")  # per /query/batch request
+    query_batch_max_size: int = Field(default=100, alias="QUERY_BATCH_MAX_SIZE")
+
+    multi_intent_enabled: bool = Field(default=True, alias="MULTI_INTENT_ENABLED")  # split compound questions into parallel tool calls
+    multi_intent_max_calls: int = Field(default=8, alias="MULTI_INTENT_MAX_CALLS")
+
+    speculative_execution: bool = Field(default=False, alias="SPECULATIVE_EXECUTION")  # run the predicted tool while routing
+    speculative_tools: str = Field(default="math,weather", alias="SPECULATIVE_TOOLS")  # tools worth predicting (cheap, side-effect free)
+
+    # Admission control (see app/admission.py); concurrency 0 = unlimited
+    request_deadline: float = Field(default=60.0, alias="REQUEST_DEADLINE")  # seconds per request; 0 disables
+    llm_max_concurrency: int = Field(default=32, alias="LLM_MAX_CONCURRENCY")  # running llm tool calls
+    llm_max_queue: int = Field(default=128, alias="LLM_MAX_QUEUE")  # waiting for a slot; more are shed with 429
+    weather_max_concurrency: int = Field(default=64, alias="WEATHER_MAX_CONCURRENCY")
+    weather_max_queue: int = Field(default=256, alias="WEATHER_MAX_QUEUE")
+    math_max_concurrency: int = Field(default=0, alias="MATH_MAX_CONCURRENCY")  # also bounded by TOOL_PROCESS_WORKERS
+    math_max_queue: int = Field(default=0, alias="MATH_MAX_QUEUE")
+
+    # Tool registry and execution policies (see app/tools/registry.py)
+    tools: str = Field(default="", alias="TOOLS")  # extra tools: comma-separated module:Class
+    tool_entry_points: bool = Field(default=True, alias="TOOL_ENTRY_POINTS")  # load simple_tool_router.tools plugins
+    tool_execution: str = Field(default="", alias="TOOL_EXECUTION")  # per-tool policy overrides, e.g. math=process
+    tool_thread_workers: int = Field(default=8, alias="TOOL_THREAD_WORKERS")
+    tool_process_workers: int = Field(default=0, alias="TOOL_PROCESS_WORKERS")  # 0 = one per CPU
+    tool_process_max_tasks: int = Field(default=1000, alias="TOOL_PROCESS_MAX_TASKS")  # recycle a worker after N calls; 0 never
+    tool_hard_timeout: float = Field(default=5.0, alias="TOOL_HARD_TIMEOUT")  # per thread/process call (s)
+
+    startup_warmup: bool = Field(default=False, alias="STARTUP_WARMUP")  # build router/providers/caches before ready
+
+    event_loop_lag_interval: float = Field(default=0.25, alias="EVENT_LOOP_LAG_INTERVAL")  # lag sampling (s); 0 disables
+
+    # Math evaluator limits (see app/tools/math_tool.py)
+    math_max_exponent: int = Field(default=10000, alias="MATH_MAX_EXPONENT")
+    math_max_shift: int = Field(default=10000, alias="MATH_MAX_SHIFT")
+    math_max_result_bits: int = Field(default=10000, alias="MATH_MAX_RESULT_BITS")  # ~3000 decimal digits
+    math_max_length: int = Field(default=1000, alias="MATH_MAX_LENGTH")
+    math_timeout: float = Field(default=0.5, alias="MATH_TIMEOUT")  # wall-clock budget per evaluation (s)
+    math_cache_size: int = Field(default=1024, alias="MATH_CACHE_SIZE")  # compiled expressions (LRU)
+    math_batch_max_points: int = Field(default=5_000_000, alias="MATH_BATCH_MAX_POINTS")
+    math_batch_max_expressions: int = Field(default=10_000, alias="MATH_BATCH_MAX_EXPRESSIONS")
+    math_batch_chunk_size: int = Field(default=10_000, alias="MATH_BATCH_CHUNK_SIZE")  # results per NDJSON line
+
+    # Shared outbound HTTP client (see app/http_client.py)
+    http_max_connections: int = Field(default=20, alias="HTTP_MAX_CONNECTIONS")
+    http_max_keepalive_connections: int = Field(default=20, alias="HTTP_MAX_KEEPALIVE_CONNECTIONS")
+    http_keepalive_expiry: float = Field(default=30.0, alias="HTTP_KEEPALIVE_EXPIRY")
+    http_timeout: float = Field(default=10.0, alias="HTTP_TIMEOUT")
+    http_connect_timeout: float = Field(default=5.0, alias="HTTP_CONNECT_TIMEOUT")
 
 @lru_cache
 def get_settings() -> Settings:
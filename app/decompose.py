@@ -0,0 +1,87 @@
+"""Split compound questions into independent tool calls without an LLM.
+
+"weather in Paris and Tokyo, and what is 17*23" becomes weather(Paris),
+weather(Tokyo) and math(17*23). ``route_query`` uses this to keep the local
+classifier from picking one tool for the whole question, and as the plan when
+the routing agent is unavailable or fails.
+
+Deliberately conservative. A question is only split when:
+
+- it has at least two parts;
+- at least one part is ``math`` or ``weather``;
+- every ``math`` / ``weather`` part yields its argument;
+- every ``llm`` part is a real question (3+ words);
+- a list of places ("Paris and Tokyo") is split on "and" / "&" only, and
+  only when every place is a distinct gazetteer city.
+
+So "cats and dogs" comparisons, "Hello, what is 2+2?" and "Paris, France"
+(a qualifier, not a second place) stay single calls.
+"""
+from __future__ import annotations
+
+import re
+
+from app.config import get_settings
+from app.gazetteer import lookup_city
+from app.local_router import extract_argument, extract_city
+from app.rules import heuristic_tool
+
+_QUESTION_START = r"(?:what|what's|how|who|when|where|why|which|is|are|can|calculate|compute|tell|give|weather|temperature|forecast)\b"
+# Clause boundaries: ';', '?' followed by more text, or ',' / ' and' (optionally
+# with 'also' / 'then') when a new question starts ("Paris, France" stays whole).
+_CLAUSES = re.compile(
+    rf"\s*;\s*|\?\s+|(?:\s*,|\s+and\b)(?:\s+and\b|\s+also\b|\s+then\b)*\s*(?={_QUESTION_START})",
+    re.IGNORECASE,
+)
+_PLACES = re.compile(r"\b(?:in|for|at)\s+(.+)$", re.IGNORECASE)
+_PLACE_LIST = re.compile(r"\s*(?:&|\band\b)\s*", re.IGNORECASE)
+_MIN_LLM_WORDS = 3
+
+
+def _place(text: str) -> str | None:
+    """"Paris, France today" -> "Paris, France": the qualifier is kept for the weather tool."""
+    head, _, qualifier = text.partition(",")
+    city = extract_city(f"in {head}")
+    if city is None or not qualifier.strip():
+        return city
+    qualifier = extract_city(f"in {qualifier}")
+    return f"{city}, {qualifier}" if qualifier else None
+
+
+def _calls_for(part: str) -> list[tuple[str, str]] | None:
+    tool = heuristic_tool(part)
+    if tool == "llm":
+        return [("llm", part)] if len(part.split()) >= _MIN_LLM_WORDS else None
+    if tool == "weather":
+        # "weather in Paris and Tokyo": one call per city
+        places = _PLACES.search(part)
+        cities = [_place(p) for p in _PLACE_LIST.split(places.group(1)) if p] if places else []
+        if not cities or None in cities:
+            return None
+        if len(cities) > 1:
+            # "Bosnia and Herzegovina" is one place: every part must be its own city
+            found = [lookup_city(city) for city in cities]
+            if None in found or len({city.id for city in found}) < len(found):
+                return None
+        return [("weather", city) for city in cities]
+    argument = extract_argument(tool, part)
+    return [(tool, argument)] if argument else None
+
+
+def split_intents(query: str) -> list[tuple[str, str]] | None:
+    """``[(tool, input), ...]`` for a compound question, None for a single one."""
+    settings = get_settings()
+    if not settings.multi_intent_enabled:
+        return None
+    parts = [p.strip(" ?!.") for p in _CLAUSES.split(query.strip())]
+    calls: list[tuple[str, str]] = []
+    for part in filter(None, parts):
+        found = _calls_for(part)
+        if found is None:
+            return None
+        calls += found
+    if len(calls) < 2 or len(calls) > settings.multi_intent_max_calls:
+        return None
+    if all(tool == "llm" for tool, _ in calls):
+        return None
+    return calls
@@ -0,0 +1,266 @@
+"""Offline city gazetteer: city names to OpenWeatherMap city ids.
+
+The index is a single binary file, memory-mapped and searched in place.
+Nothing is copied to the heap, so a full OpenWeatherMap city list (about
+200k cities) costs page cache rather than per-worker RSS. It holds:
+
+- sorted, normalized lookup keys (UTF-8 blob plus offsets) with their city;
+- per city, the OpenWeatherMap id, country code and display name.
+
+Keys are the city name and its aliases (accents, case and punctuation
+dropped), each also with the country code ("paris fr"). A name that is not a
+key is matched to the closest key within a small edit distance ("Pariss",
+"Dehli"), as long as exactly one city is that close. ``lookup_city`` only
+does this against a ``GAZETTEER_PATH`` index, not the bundled one.
+
+The bundled ``app/data/cities.gaz`` is built from ``app/data/cities.csv`` (major
+cities). Build a bigger one from OpenWeatherMap's ``city.list.json.gz`` and
+point ``GAZETTEER_PATH`` at it. CLI::
+
+    python -m app.gazetteer build --source app/data/cities.csv --out app/data/cities.gaz
+    python -m app.gazetteer lookup --index app/data/cities.gaz "Sao Paolo" "munchen"
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import csv
+import gzip
+import json
+import logging
+import struct
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Sequence
+
+import numpy as np
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_INDEX = Path(__file__).parent / "data" / "cities.gaz"
+_MAGIC = b"GAZ1"
+_HEADER = struct.Struct("<4s4I")  # magic, keys, cities, key blob bytes, name blob bytes
+_MIN_FUZZY_CHARS = 4
+_LONG_NAME_CHARS = 9  # shorter names get at most one edit
+
+
+class City(NamedTuple):
+    id: int
+    name: str
+    country: str
+
+
+def normalize_city(name: str) -> str:
+    """Lookup key: accents, case and punctuation dropped ("São Paulo!" -> "sao paulo")."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    text = "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+
+def _edit_distance(a: bytes, b: bytes, limit: int) -> int:
+    """Optimal string alignment distance (adjacent swaps count once), capped at ``limit + 1``."""
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return current[-1]
+
+
+class _Keys(Sequence[bytes]):
+    """Sorted keys decoded on access, so ``bisect`` searches the mapped blob."""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):  # type: ignore[override]
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+
+class Gazetteer:
+    """Memory-mapped city index; see the module docstring for the layout."""
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, keys, cities, key_bytes, name_bytes = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a gazetteer index")
+        offset = _HEADER.size
+        sections = []
+        for dtype, count in (
+            ("<u4", keys + 1), ("<u4", keys), ("<u4", cities), ("<u4", cities + 1),
+            ("S2", cities), ("u1", key_bytes), ("u1", name_bytes),
+        ):
+            sections.append(np.frombuffer(self._map, dtype=dtype, count=count, offset=offset))
+            offset += sections[-1].nbytes
+        key_offsets, self._key_city, self._ids, name_offsets, self._countries, key_blob, name_blob = sections
+        self._keys = _Keys(key_offsets, key_blob)
+        self._names = _Keys(name_offsets, name_blob)
+        self._closest = lru_cache(maxsize=4096)(self._closest_uncached)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def city(self, index: int) -> City:
+        return City(int(self._ids[index]), self._names[index].decode(), self._countries[index].decode())
+
+    def lookup(self, name: str, max_edits: int = 2) -> City | None:
+        """The city ``name`` (or "name, CC") refers to, allowing small misspellings."""
+        key = normalize_city(name).encode()
+        if not key:
+            return None
+        index = self._exact(key)
+        if index is None and max_edits > 0:
+            index = self._closest(key, max_edits)
+        return None if index is None else self.city(index)
+
+    def _exact(self, key: bytes) -> int | None:
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return int(self._key_city[i])
+        return None
+
+    def _closest_uncached(self, key: bytes, max_edits: int) -> int | None:
+        if len(key) < _MIN_FUZZY_CHARS:
+            return None
+        limit = 1 if len(key) < _LONG_NAME_CHARS else max_edits
+        # Typos rarely hit the first letter: only keys sharing it are compared,
+        # and only those whose length is within ``limit``
+        lo = bisect.bisect_left(self._keys, key[:1])
+        hi = bisect.bisect_left(self._keys, bytes([key[0] + 1])) if key[0] < 255 else len(self._keys)
+        lengths = np.diff(self._keys.offsets[lo:hi + 1]).astype(np.int64)
+        best, found = limit + 1, set()
+        for i in np.flatnonzero(np.abs(lengths - len(key)) <= limit) + lo:
+            distance = _edit_distance(key, self._keys[i], min(best, limit))
+            if distance < best:
+                best, found = distance, {int(self._key_city[i])}
+            elif distance == best:
+                found.add(int(self._key_city[i]))
+        # Two cities equally close is a guess, not a correction
+        return found.pop() if best <= limit and len(found) == 1 else None
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"cities": len(self), "keys": len(self._keys), "bytes": int(self._map.nbytes)}
+
+
+def write_index(cities: Iterable[tuple[int, str, str, Sequence[str]]], path: str | Path) -> Gazetteer:
+    """Build an index from ``(id, name, country, aliases)`` rows.
+
+    When two cities share a key (two "Springfield"s), the earlier row keeps
+    it, so list bigger cities first. "Name, CC" always tells them apart.
+    """
+    ids: list[int] = []
+    names: list[bytes] = []
+    countries: list[bytes] = []
+    keys: dict[bytes, int] = {}
+    for city_id, name, country, aliases in cities:
+        index = len(ids)
+        ids.append(int(city_id))
+        names.append(name.encode())
+        countries.append(country.upper().encode()[:2])
+        for alias in (name, *aliases):
+            key = normalize_city(alias)
+            if not key:
+                continue
+            for variant in (key, f"{key} {country.casefold()}") if country else (key,):
+                keys.setdefault(variant.encode(), index)
+    ordered = sorted(keys)
+    key_blob, name_blob = b"".join(ordered), b"".join(names)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(ordered), len(ids), len(key_blob), len(name_blob)))
+        for array in (
+            np.cumsum([0] + [len(k) for k in ordered], dtype="<u4"),
+            np.array([keys[k] for k in ordered], dtype="<u4"),
+            np.array(ids, dtype="<u4"),
+            np.cumsum([0] + [len(n) for n in names], dtype="<u4"),
+            np.array(countries, dtype="S2"),
+        ):
+            f.write(array.tobytes())
+        f.write(key_blob)
+        f.write(name_blob)
+    return Gazetteer(path)
+
+
+def read_source(path: str | Path) -> Iterator[tuple[int, str, str, list[str]]]:
+    """Rows from our CSV (``id,name,country,aliases`` with ``|``-separated aliases)
+    or OpenWeatherMap's ``city.list.json[.gz]``."""
+    path = str(path)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        if path.endswith((".json", ".json.gz")):
+            for city in json.load(f):
+                yield city["id"], city["name"], city.get("country", ""), []
+            return
+        for row in csv.DictReader(f):
+            aliases = [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()]
+            yield int(row["id"]), row["name"], row["country"], aliases
+
+
+@lru_cache
+def get_gazetteer() -> Gazetteer | None:
+    settings = get_settings()
+    if not settings.gazetteer_enabled:
+        return None
+    path = settings.gazetteer_path or BUNDLED_INDEX
+    try:
+        return Gazetteer(path)
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning("City gazetteer disabled, cannot load %s: %s", path, e)
+        return None
+
+
+def lookup_city(name: str) -> City | None:
+    """``GAZETTEER_PATH`` lookup of a user-supplied city name (None when unknown).
+
+    Misspellings are only corrected against a configured (full) city list. The
+    bundled index knows ~100 cities, so its closest match for a real city it
+    lacks ("Kiel") would be a different city ("Kyiv"); there only exact names
+    and aliases match, and anything else goes upstream by name.
+    """
+    gazetteer = get_gazetteer()
+    if gazetteer is None:
+        return None
+    settings = get_settings()
+    return gazetteer.lookup(name, settings.gazetteer_max_edits if settings.gazetteer_path else 0)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.gazetteer", description="Build / query the city index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="compile a CSV or OpenWeatherMap city list into an index")
+    build.add_argument("--source", required=True, help="cities.csv or city.list.json[.gz]")
+    build.add_argument("--out", required=True, help="output .gaz path")
+
+    find = sub.add_parser("lookup", help="resolve city names against an index")
+    find.add_argument("--index", default=str(BUNDLED_INDEX))
+    find.add_argument("--max-edits", type=int, default=2)
+    find.add_argument("names", nargs="+")
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        gazetteer = write_index(read_source(args.source), args.out)
+        print(json.dumps({"out": args.out, **gazetteer.stats}))
+    else:
+        gazetteer = Gazetteer(args.index)
+        for name in args.names:
+            city = gazetteer.lookup(name, args.max_edits)
+            print(json.dumps({"query": name, "match": city._asdict() if city else None}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
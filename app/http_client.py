@@ -0,0 +1,65 @@
+"""Shared async HTTP client for outbound tool calls.
+
+The client is opened once in the FastAPI lifespan (see ``app.main``) so every
+request reuses the same keep-alive connection pool instead of spending an
+executor thread and a fresh TCP/TLS handshake per upstream call.
+"""
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+
+from app.config import Settings, get_settings
+
+_client: httpx.AsyncClient | None = None
+
+
+def build_http_client(settings: Settings | None = None) -> httpx.AsyncClient:
+    """Create an AsyncClient sized and timed from settings."""
+    settings = settings or get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout)
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """Open the process-wide client (idempotent)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_http_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient | None:
+    """Return the shared client if the app lifespan has started it."""
+    if _client is None or _client.is_closed:
+        return None
+    return _client
+
+
+@asynccontextmanager
+async def http_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Yield the shared client, or a short-lived one outside the app lifespan.
+
+    Tools are also used directly (tests, scripts) without the FastAPI app
+    running; those callers get a temporary client that is closed afterwards.
+    """
+    shared = get_http_client()
+    if shared is not None:
+        yield shared
+        return
+    async with build_http_client() as client:
+        yield client
@@ -0,0 +1,413 @@
+"""Local learned router: hashed n-gram softmax classifier in NumPy.
+
+Runs before the Gemini router. When the model is confident (probability at or
+above ``LOCAL_ROUTER_THRESHOLD``) and the tool argument can be extracted
+locally, the routing LLM call is skipped; otherwise the query is deferred to
+the LLM router as before.
+
+Training data comes from logged ``ToolSelection`` decisions (``ROUTING_LOG_PATH``,
+one JSON object per line) plus seed examples built from ``TOOL_DESCRIPTIONS``.
+
+CLI::
+
+    python -m app.local_router train --log routing_log.jsonl --out router.npz
+    python -m app.local_router evaluate --model router.npz --data eval.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import logging
+import queue
+import random
+import re
+import time
+import zlib
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from app.config import get_settings
+from app.tools.math_tool import MathTool
+
+logger = logging.getLogger(__name__)
+
+LABELS = ("math", "weather", "llm")
+_TOKEN = re.compile(r"\d+(?:\.\d+)?|\w+|[^\w\s]")
+
+
+def _hash(feature: str, dim: int) -> int:
+    # crc32 is stable across processes (unlike hash()), so saved models stay valid
+    return 1 + zlib.crc32(feature.encode("utf-8")) % (dim - 1)
+
+
+def featurize(query: str, dim: int) -> tuple[np.ndarray, np.ndarray]:
+    """Sparse (indices, values) of hashed word 1-2 grams and char 3-grams.
+
+    Index 0 is reserved for the bias feature. Values are L2-normalized.
+    """
+    q = query.casefold()
+    tokens = ["<num>" if t[0].isdigit() else t for t in _TOKEN.findall(q)]
+    feats = [f"w:{t}" for t in tokens]
+    feats += [f"b:{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    padded = f" {' '.join(q.split())} "
+    feats += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    counts: dict[int, float] = {0: 1.0}
+    for feat in feats:
+        idx = _hash(feat, dim)
+        counts[idx] = counts.get(idx, 0.0) + 1.0
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    values /= np.linalg.norm(values)
+    return indices, values
+
+
+def _batch(queries: Sequence[str], dim: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CSR-style (indices, values, row_starts) for a batch of queries."""
+    rows = [featurize(q, dim) for q in queries]
+    indices = np.concatenate([r[0] for r in rows])
+    values = np.concatenate([r[1] for r in rows])
+    starts = np.cumsum([0] + [len(r[0]) for r in rows[:-1]])
+    return indices, values, starts
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = logits - logits.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+class LocalRouter:
+    def __init__(self, dim: int = 2 ** 14, labels: Sequence[str] = LABELS):
+        self.dim = dim
+        self.labels = tuple(labels)
+        self.weights = np.zeros((dim, len(self.labels)), dtype=np.float32)
+
+    def fit(
+        self,
+        queries: Sequence[str],
+        tools: Sequence[str],
+        epochs: int = 200,
+        lr: float = 2.0,
+        l2: float = 1e-4,
+    ) -> "LocalRouter":
+        """Full-batch gradient descent on softmax cross-entropy."""
+        indices, values, starts = _batch(queries, self.dim)
+        rows = np.repeat(np.arange(len(queries)), np.diff(np.append(starts, len(indices))))
+        target = np.zeros((len(queries), len(self.labels)), dtype=np.float32)
+        target[np.arange(len(queries)), [self.labels.index(t) for t in tools]] = 1.0
+        for _ in range(epochs):
+            logits = np.add.reduceat(self.weights[indices] * values[:, None], starts, axis=0)
+            grad_rows = (_softmax(logits) - target) / len(queries)
+            grad = np.zeros_like(self.weights)
+            np.add.at(grad, indices, values[:, None] * grad_rows[rows])
+            self.weights -= lr * (grad + l2 * self.weights)
+        return self
+
+    def predict_proba(self, query: str) -> np.ndarray:
+        indices, values = featurize(query, self.dim)
+        return _softmax(values @ self.weights[indices])
+
+    def predict(self, query: str) -> tuple[str, float]:
+        proba = self.predict_proba(query)
+        best = int(proba.argmax())
+        return self.labels[best], float(proba[best])
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, weights=self.weights, labels=np.array(self.labels))
+
+    @classmethod
+    def load(cls, path: str) -> "LocalRouter":
+        data = np.load(path)
+        router = cls(dim=data["weights"].shape[0], labels=[str(l) for l in data["labels"]])
+        router.weights = data["weights"].astype(np.float32)
+        return router
+
+
+# --- argument extraction -------------------------------------------------
+
+_math = MathTool()
+_EXPR = re.compile(r"[-+(]*\d[\d\s+\-*/%().<>&|^]*")
+_CITY = re.compile(r"\b(?:in|for|at)\s+([^?!,.;]+)", re.IGNORECASE)
+_TRAILING = re.compile(
+    r"\s+(?:today|tonight|tomorrow|now|right now|this (?:morning|afternoon|evening|week)|please)$",
+    re.IGNORECASE,
+)
+
+
+def extract_city(query: str) -> str | None:
+    matches = _CITY.findall(query)
+    if not matches:
+        return None
+    city = matches[-1].strip()
+    while True:
+        trimmed = _TRAILING.sub("", city).strip()
+        if trimmed == city:
+            break
+        city = trimmed
+    if not city or len(city.split()) > 4:
+        return None
+    return city
+
+
+def extract_expression(query: str) -> str | None:
+    normalized = _math._extract_expression(query)
+    if normalized is None:
+        return None
+    match = _EXPR.search(normalized)
+    if match is None:
+        return None
+    expr = match.group().strip()
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError:
+        return None
+    return expr if _math._is_allowed(tree) else None
+
+
+def extract_argument(tool: str, query: str) -> str | None:
+    """Tool input the LLM router would have produced, or None to defer."""
+    if tool == "math":
+        return extract_expression(query)
+    if tool == "weather":
+        return extract_city(query)
+    return query
+
+
+def route_locally(query: str, threshold: float | None = None) -> tuple[str, str, float] | None:
+    """Return (tool, input, confidence) if confident, else None."""
+    router = get_local_router()
+    if router is None:
+        return None
+    if threshold is None:
+        threshold = get_settings().local_router_threshold
+    tool, confidence = router.predict(query)
+    if confidence < threshold:
+        return None
+    tool_input = extract_argument(tool, query)
+    if tool_input is None:
+        return None
+    return tool, tool_input, confidence
+
+
+@lru_cache
+def get_local_router() -> LocalRouter | None:
+    path = get_settings().local_router_path
+    if not path:
+        return None
+    try:
+        return LocalRouter.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Local router disabled, cannot load %s: %s", path, e)
+        return None
+
+
+_decision_listeners: list[QueueListener] = []
+
+
+@lru_cache
+def _decision_logger(path: str) -> logging.Logger:
+    """JSONL lines appended to ``path`` by a background logging thread."""
+    handler = logging.FileHandler(path, encoding="utf-8", delay=True)  # write errors go to stderr, not callers
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(records, handler)
+    listener.start()
+    _decision_listeners.append(listener)
+    decisions = logging.Logger(f"{__name__}.decisions", logging.INFO)  # outside the logging tree
+    decisions.addHandler(QueueHandler(records))
+    return decisions
+
+
+def log_decision(query: str, tool: str, tool_input: str) -> None:
+    """Append an LLM routing decision to ROUTING_LOG_PATH (training data).
+
+    Called from the event loop, so the line is only queued here; the file is
+    written by a logging thread.
+    """
+    path = get_settings().routing_log_path
+    if not path:
+        return
+    _decision_logger(path).info(json.dumps({"query": query, "tool": tool, "input": tool_input}))
+
+
+def close_decision_log() -> None:
+    """Write out queued decisions and close the log (app shutdown)."""
+    while _decision_listeners:
+        listener = _decision_listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+    _decision_logger.cache_clear()
+
+
+# --- training data -------------------------------------------------------
+
+_CITIES = [
+    "Paris", "Tokyo", "Jakarta", "New York", "London", "Berlin", "Sydney", "Cairo",
+    "Mumbai", "Toronto", "Madrid", "Rome", "Seoul", "Bangkok", "Nairobi", "Lima",
+    "San Francisco", "Mexico City", "Istanbul", "Singapore", "Bandung", "Oslo",
+]
+_WEATHER_TEMPLATES = [
+    "weather in {c}", "What's the weather like in {c}?", "How's the weather in {c} today?",
+    "temperature in {c}", "Is it going to rain in {c}?", "forecast for {c}",
+    "What is the temperature in {c} right now?", "Will it be sunny in {c} tomorrow?",
+    "how hot is it in {c}", "Weather for {c} please", "is it cold in {c}",
+]
+_MATH_TEMPLATES = [
+    "What is {e}?", "{e}", "calculate {e}", "Compute {e}", "what's {e}", "evaluate {e}",
+    "how much is {e}", "{e} = ?", "solve {e}",
+]
+_LLM_QUESTIONS = [
+    "What is the capital of France?", "Who is the president of France?", "Tell me about history",
+    "Tell me a fun fact about space.", "Who wrote Hamlet?", "Explain quantum computing simply",
+    "What is photosynthesis?", "Recommend a good book", "How do vaccines work?",
+    "What is the meaning of life?", "Translate hello into Spanish", "Who painted the Mona Lisa?",
+    "Write a haiku about autumn", "What is machine learning?", "Why is the sky blue?",
+    "How tall is Mount Everest?", "What language is spoken in Brazil?", "Summarize World War II",
+    "Give me a recipe for pancakes", "What does DNA stand for?", "Who invented the telephone?",
+    "What is the population of Tokyo?", "Describe the climate of Jakarta",
+    "What is the history of Paris?", "How do airplanes fly?", "What is the speed of light?",
+    "Tell me a joke", "What is Python used for?", "How many continents are there?",
+    "What is inflation?",
+]
+
+
+def _expressions(rng: random.Random, n: int) -> list[str]:
+    ops = ["+", "-", "*", "/", "**", "%", "//"]
+    out = []
+    for _ in range(n):
+        terms = [str(rng.randint(1, 999)) for _ in range(rng.randint(2, 3))]
+        expr = terms[0]
+        for t in terms[1:]:
+            expr += f" {rng.choice(ops[:4] if rng.random() < 0.8 else ops)} {t}"
+        out.append(expr)
+    return out
+
+
+def seed_examples(seed: int = 0) -> list[dict[str, str]]:
+    """Labelled examples derived from TOOL_DESCRIPTIONS and common phrasings."""
+    from app.agent import TOOL_DESCRIPTIONS
+
+    rng = random.Random(seed)
+    rows: list[dict[str, str]] = []
+    # Example inputs quoted in the router prompt itself
+    for line in TOOL_DESCRIPTIONS.strip().splitlines():
+        tool, _, text = line.lstrip("- ").partition(":")
+        for example in re.findall(r'"([^"]+)"', text):
+            if tool == "weather":
+                rows.append({"query": f"weather in {example}", "tool": tool, "input": example})
+            elif tool == "math":
+                rows.append({"query": example, "tool": tool, "input": example})
+    for city in _CITIES:
+        for template in rng.sample(_WEATHER_TEMPLATES, 5):
+            rows.append({"query": template.format(c=city), "tool": "weather", "input": city})
+    for expr in _expressions(rng, 120):
+        rows.append({"query": rng.choice(_MATH_TEMPLATES).format(e=expr), "tool": "math", "input": expr})
+    for question in _LLM_QUESTIONS:
+        rows.append({"query": question, "tool": "llm", "input": question})
+        rows.append({"query": question.lower().rstrip("?.!"), "tool": "llm", "input": question})
+    return rows
+
+
+def read_jsonl(path: str) -> list[dict[str, str]]:
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [r for r in rows if r.get("tool") in LABELS and r.get("query")]
+
+
+# --- evaluation ----------------------------------------------------------
+
+def evaluate(
+    router: LocalRouter,
+    rows: Iterable[dict[str, str]],
+    thresholds: Sequence[float] = (0.5, 0.7, 0.8, 0.9, 0.95, 0.99),
+    llm_latency_ms: float = 400.0,
+) -> list[dict[str, float]]:
+    """Accuracy / coverage / expected routing latency per confidence threshold.
+
+    ``coverage`` is the share of queries routed locally; ``accuracy`` is over
+    those queries only (tool and extracted argument both match). Deferred
+    queries are assumed to cost ``llm_latency_ms`` on the LLM router.
+    """
+    rows = list(rows)
+    results = []
+    for row in rows:
+        start = time.perf_counter()
+        tool, confidence = router.predict(row["query"])
+        tool_input = extract_argument(tool, row["query"])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        correct = tool == row["tool"] and (
+            tool == "llm" or "input" not in row or _same_argument(tool_input, row["input"])
+        )
+        results.append((confidence, tool_input is not None, correct, elapsed_ms))
+
+    local_ms = float(np.mean([r[3] for r in results])) if results else 0.0
+    report = []
+    for threshold in thresholds:
+        taken = [r for r in results if r[0] >= threshold and r[1]]
+        coverage = len(taken) / len(results) if results else 0.0
+        accuracy = sum(r[2] for r in taken) / len(taken) if taken else 1.0
+        report.append({
+            "threshold": threshold,
+            "coverage": round(coverage, 4),
+            "accuracy": round(accuracy, 4),
+            "local_ms": round(local_ms, 4),
+            "expected_routing_ms": round(local_ms + (1 - coverage) * llm_latency_ms, 2),
+        })
+    return report
+
+
+def _same_argument(predicted: str | None, expected: str) -> bool:
+    if predicted is None:
+        return False
+    return "".join(predicted.casefold().split()) == "".join(expected.casefold().split())
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.local_router", description="Train / evaluate the local router.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train = sub.add_parser("train", help="fit a model from logged decisions + seed examples")
+    train.add_argument("--log", action="append", default=[], help="JSONL routing log (repeatable)")
+    train.add_argument("--out", required=True, help="output .npz path")
+    train.add_argument("--dim", type=int, default=2 ** 14)
+    train.add_argument("--epochs", type=int, default=200)
+    train.add_argument("--no-seed", action="store_true", help="train on logs only")
+    train.add_argument("--holdout", type=float, default=0.2, help="fraction held out for the report")
+
+    ev = sub.add_parser("evaluate", help="accuracy-vs-latency report for a saved model")
+    ev.add_argument("--model", required=True)
+    ev.add_argument("--data", action="append", default=[], help="labelled JSONL (default: seed examples)")
+
+    for p in (train, ev):
+        p.add_argument("--llm-latency-ms", type=float, default=400.0, help="assumed LLM routing latency")
+
+    args = parser.parse_args(argv)
+    if args.command == "train":
+        rows = [] if args.no_seed else seed_examples()
+        for path in args.log:
+            rows += read_jsonl(path)
+        random.Random(0).shuffle(rows)
+        split = int(len(rows) * (1 - args.holdout))
+        train_rows, test_rows = rows[:split], rows[split:] or rows
+        router = LocalRouter(dim=args.dim).fit(
+            [r["query"] for r in train_rows], [r["tool"] for r in train_rows], epochs=args.epochs,
+        )
+        router.save(args.out)
+        print(f"trained on {len(train_rows)} examples -> {args.out}")
+        report = evaluate(router, test_rows, llm_latency_ms=args.llm_latency_ms)
+    else:
+        router = LocalRouter.load(args.model)
+        rows = []
+        for path in args.data:
+            rows += read_jsonl(path)
+        report = evaluate(router, rows or seed_examples(seed=1), llm_latency_ms=args.llm_latency_ms)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
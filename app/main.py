@@ -1,18 +1,119 @@
+from app.startup import STATE as STARTUP, FirstRequestTimer  # first: times the imports below
+
+import asyncio
+import contextlib
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+
+from app.admission import admission_stats
+from app.agent import TOOLS_MAP, warmup
+from app.cache import cache_stats
+from app.cache_backend import close_shared_backend
+from app.config import get_settings
+from app.metrics import monitor_event_loop, render as render_metrics
+from app.http_client import start_http_client, close_http_client
+from app.local_router import close_decision_log
+from app.providers import close_providers
+from app.routing_cache import load_routing_cache, save_routing_cache
+from app.routers import router, ws_router, math_router
+from app.tools.registry import get_registry
+
+STARTUP.mark_imported()
+
+logger = logging.getLogger(__name__)
+
+
+async def _warm_then_ready() -> None:
+    try:
+        STARTUP.warmup_seconds = await warmup()
+    except Exception as e:  # a failed warmup only means a slower first request
+        STARTUP.warmup_error = str(e)
+    STARTUP.mark_ready()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    await start_http_client()
+    load_routing_cache()
+    interval = settings.event_loop_lag_interval
+    lag_monitor = asyncio.create_task(monitor_event_loop(interval)) if interval > 0 else None
+    # Warm up in the background: live (serving /health) at once, ready when done
+    warming = asyncio.create_task(_warm_then_ready()) if settings.startup_warmup else None
+    if warming is None:
+        STARTUP.mark_ready()
+    try:
+        yield
+    finally:
+        STARTUP.ready = False
+        for task in (warming, lag_monitor):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        try:
+            save_routing_cache()
+        except Exception:  # never skip the cleanup below
+            logger.exception("Could not save the routing cache")
+        close_decision_log()
+        await close_providers()
+        await close_http_client()
+        await close_shared_backend()
+        get_registry().shutdown()
 
-from app.routers import router, ws_router
 
 app = FastAPI(
     title="Simple Tool Router", 
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
     )
 app.include_router(router)
 app.include_router(ws_router)
+app.include_router(math_router)
+app.add_middleware(FirstRequestTimer)
 
 @app.get("/health")
 async def health():
-    return {"status": "ok, made by Jordinia"}
+    return {"status": "ok, made by Jordinia", "live": True, "ready": STARTUP.ready, "startup": STARTUP.report()}
+
+
+@app.get("/health/live")
+async def liveness():
+    return {"live": True}
+
+
+@app.get("/health/ready")
+async def readiness():
+    return JSONResponse(status_code=200 if STARTUP.ready else 503, content={"ready": STARTUP.ready})
+
+
+@app.get("/cache/stats")
+async def cache_stats_endpoint():
+    return cache_stats()
+
+
+@app.get("/providers/stats")
+async def provider_stats_endpoint():
+    return TOOLS_MAP["llm"].health_stats()
+
+
+@app.get("/admission/stats")
+async def admission_stats_endpoint():
+    return admission_stats()
+
+
+@app.get("/tools/stats")
+async def tool_stats_endpoint():
+    return get_registry().stats
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
 
 
 @app.exception_handler(Exception)
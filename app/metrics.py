@@ -0,0 +1,131 @@
+"""Prometheus metrics for the request pipeline (served at ``/metrics``).
+
+Hot paths only touch pre-declared ``prometheus_client`` metrics (a lock and a
+float add per observation). Cache counters are not duplicated on the hot path:
+``CacheCollector`` reads the existing ``/cache/stats`` counters at scrape time.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from app.cache import cache_stats
+
+# Routing and tools are sub-millisecond to seconds; LLM calls go up to the timeout
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+ROUTING_SECONDS = Histogram(
+    "router_routing_seconds", "Time to pick a tool, by decision source", ["source"], buckets=BUCKETS,
+)
+TOOL_SECONDS = Histogram(
+    "router_tool_seconds", "Tool execution time", ["tool"], buckets=BUCKETS,
+)
+TOOL_ERRORS = Counter("router_tool_errors_total", "Tool executions that raised", ["tool"])
+PROVIDER_SECONDS = Histogram(
+    "router_llm_provider_seconds", "LLM provider attempt time", ["provider", "outcome"], buckets=BUCKETS,
+)
+PROVIDER_ERRORS = Counter("router_llm_provider_errors_total", "Failed LLM provider attempts", ["provider"])
+AGENT_FAILURES = Counter("router_agent_failures_total", "Routing agent calls that failed or returned an unknown tool")
+FALLBACKS = Counter(
+    "router_fallbacks_total", "Fallback paths taken (routing_heuristic, llm_stub)", ["kind"],
+)
+WS_MESSAGE_SECONDS = Histogram(
+    "router_ws_message_seconds", "WebSocket request time, receive to response sent", buckets=BUCKETS,
+)
+WS_CONNECTIONS = Gauge("router_ws_connections", "Open WebSocket connections")
+IN_FLIGHT = Gauge("router_in_flight_requests", "Requests being processed", ["endpoint"])
+QUEUE_SECONDS = Histogram(
+    "router_tool_queue_seconds", "Time waiting for a tool concurrency slot", ["tool"], buckets=BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "router_admission_rejected_total", "Requests shed (queue_full) or given up while queued (queue_timeout)",
+    ["tool", "reason"],
+)
+DEADLINE_EXCEEDED = Counter(
+    "router_deadline_exceeded_total", "Requests cancelled at their deadline, by stage", ["stage"],
+)
+TOOL_TIMEOUTS = Counter(
+    "router_tool_timeouts_total", "Thread/process tool calls stopped at TOOL_HARD_TIMEOUT", ["tool"],
+)
+SPECULATIONS = Counter(
+    "router_speculations_total",
+    "Predicted tool runs started while the routing agent decides, by outcome (hit / miss / aborted)",
+    ["tool", "outcome"],
+)
+SPECULATION_SAVED_SECONDS = Counter(
+    "router_speculation_saved_seconds_total", "Tool time overlapped with routing by speculative hits", ["tool"],
+)
+SPECULATION_WASTED_SECONDS = Counter(
+    "router_speculation_wasted_seconds_total", "Tool time spent on discarded speculative runs", ["tool"],
+)
+WEATHER_UPSTREAM = Counter(
+    "router_weather_upstream_requests_total", "OpenWeatherMap requests, by endpoint (weather / group)", ["endpoint"],
+)
+EVENT_LOOP_LAG = Histogram(
+    "router_event_loop_lag_seconds", "How late a periodic timer fires (event loop blocked or saturated)",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+class CacheCollector(Collector):
+    """Export every registered cache's counters (see ``app.cache.cache_stats``)."""
+
+    COUNTERS = ("hits", "stale_hits", "shared_hits", "disk_hits", "misses", "evictions")
+
+    def collect(self):
+        stats = cache_stats()
+        families = {
+            name: CounterMetricFamily(f"router_cache_{name}", f"Cache {name.replace('_', ' ')}", labels=["cache"])
+            for name in self.COUNTERS
+        }
+        size = GaugeMetricFamily("router_cache_entries", "Entries held per cache", labels=["cache"])
+        for cache, values in stats.items():
+            for name, family in families.items():
+                if name in values:
+                    family.add_metric([cache], values[name])
+            size.add_metric([cache], values.get("size", 0))
+        yield from families.values()
+        yield size
+
+
+REGISTRY.register(CacheCollector())
+
+
+@contextmanager
+def observe(histogram: Histogram) -> Iterator[None]:
+    """Observe the block's duration (also when it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+
+async def track_in_flight(stream: AsyncIterator[str], endpoint: str) -> AsyncIterator[str]:
+    """Count a streaming response as in flight until its body is fully sent."""
+    gauge = IN_FLIGHT.labels(endpoint)
+    gauge.inc()
+    try:
+        async for line in stream:
+            yield line
+    finally:
+        gauge.dec()
+
+
+async def monitor_event_loop(interval: float) -> None:
+    """Sample event loop lag every ``interval`` seconds until cancelled."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - start - interval))
+
+
+def render() -> tuple[bytes, str]:
+    """Body and content type for the ``/metrics`` route."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,7 +1,7 @@
 
 # Pydantic models for /query endpoint request and response schema
-from pydantic import BaseModel
-from typing import Literal, Union
+from pydantic import BaseModel, FiniteFloat, Field, model_validator
+from typing import Dict, List, Literal, Optional, Union
 
 
 class QueryIn(BaseModel):
@@ -9,6 +9,21 @@ class QueryIn(BaseModel):
     Pydantic Request model for /query endpoint.
     """
     query: str
+    stream: bool = True  # NDJSON events (route, deltas, result); False = one result line
+    bypass_cache: bool = False  # skip cached LLM answers for this request
+    deadline_ms: Optional[float] = Field(default=None, gt=0)  # shortens REQUEST_DEADLINE for this request
+
+
+class ToolCallOut(BaseModel):
+    """One call of a multi-call (compound question) response."""
+    index: int
+    tool_used: Literal["weather", "math", "llm"]
+    input: str
+    result: Optional[Union[str, float, int]] = None  # absent when the call failed
+    queued_ms: Optional[float] = None
+    error: Optional[str] = None
+    status: Optional[int] = None  # admission rejections only
+    reason: Optional[str] = None
 
 
 class QueryOut(BaseModel):
@@ -16,5 +31,44 @@ class QueryOut(BaseModel):
     Pydantic Response model for /query endpoint.
     """
     query: str
-    tool_used: Literal["weather", "math", "llm"]
+    tool_used: Literal["weather", "math", "llm", "multi"]
     result: Union[str, float, int]
+    calls: Optional[List[ToolCallOut]] = None  # tool_used == "multi": one entry per call
+
+
+class QueryBatchIn(BaseModel):
+    """
+    Pydantic Request model for /query/batch endpoint.
+    """
+    queries: List[str]
+    bypass_cache: bool = False
+    deadline_ms: Optional[float] = Field(default=None, gt=0)  # one deadline for the whole batch
+
+
+class VariableRange(BaseModel):
+    """Half-open numeric range [start, stop) for a batch math variable."""
+    start: FiniteFloat
+    stop: FiniteFloat
+    step: FiniteFloat = 1.0
+
+
+class MathBatchIn(BaseModel):
+    """
+    Pydantic Request model for /math/batch endpoint.
+
+    Either one `expression` or a list of `expressions`; with `variables` each
+    expression is evaluated vectorized over the variable arrays.
+    """
+    expression: Optional[str] = None
+    expressions: Optional[List[str]] = None
+    variables: Optional[Dict[str, Union[List[FiniteFloat], VariableRange]]] = None
+    chunk_size: Optional[int] = None
+
+    @model_validator(mode="after")
+    def _one_of_expression(self):
+        if (self.expression is None) == (self.expressions is None):
+            raise ValueError("Provide exactly one of 'expression' or 'expressions'")
+        return self
+
+    def expression_list(self) -> List[str]:
+        return [self.expression] if self.expression is not None else list(self.expressions or [])
@@ -0,0 +1,108 @@
+"""Rolling health tracking and circuit breaking for LLM providers.
+
+``LLMTool`` keeps one ``ProviderHealth`` per provider. It records the outcome
+and latency of every attempt over a sliding window, which feeds:
+
+- the circuit breaker: after ``failure_threshold`` consecutive failures the
+  provider is skipped for ``cooldown`` seconds, then a single probe request is
+  let through (half-open); success closes the circuit, failure re-opens it.
+- latency percentiles used for fastest-first ordering and hedging delays.
+"""
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from typing import Any, Callable
+
+
+class ProviderHealth:
+    def __init__(
+        self,
+        window: int = 100,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._latencies: deque[float] = deque(maxlen=window)  # successful attempts only
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self.successes = 0
+        self.failures = 0
+        self.short_circuits = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._probing or self._clock() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (claims the probe when half-open)."""
+        if self.opened_at is None:
+            return True
+        if self._probing or self._clock() - self.opened_at < self.cooldown:
+            self.short_circuits += 1
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self, latency: float) -> None:
+        self.successes += 1
+        self._outcomes.append(True)
+        self._latencies.append(latency)
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self, latency: float) -> None:
+        self.failures += 1
+        self._outcomes.append(False)
+        self.consecutive_failures += 1
+        if self._probing or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+        self._probing = False
+
+    def release(self) -> None:
+        """Attempt abandoned (e.g. lost a hedge race): no outcome to record."""
+        self._probing = False
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def percentile(self, q: float) -> float | None:
+        """Latency percentile (0 < q <= 1) over recent successes, None if no data."""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "short_circuits": self.short_circuits,
+            "error_rate": self.error_rate,
+            "p50_ms": _ms(self.percentile(0.5)),
+            "p95_ms": _ms(self.percentile(0.95)),
+        }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 2)
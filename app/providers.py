@@ -0,0 +1,196 @@
+"""Async LLM providers with long-lived, pooled clients.
+
+Each provider wraps one upstream (OpenRouter, OpenAI, Gemini) and is built once
+per process, so ``LLMTool`` never blocks the event loop on a synchronous SDK
+call and never pays for client construction per request.
+
+Fallback order (same as before): OpenRouter > OpenAI > Google Gemini.
+
+The ``openai`` and ``langchain_google_genai`` SDKs are imported when a
+provider using them is built, not with this module: they take most of the
+process's import time and are not needed without the matching API key.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator
+
+import httpx
+
+from app.config import Settings, get_settings
+
+class LLMProvider(ABC):
+    name: str
+
+    @abstractmethod
+    async def complete(self, prompt: str) -> str:
+        ...
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield answer text incrementally (default: one chunk)."""
+        yield await self.complete(prompt)
+
+    def prepare(self) -> None:
+        """Load lazily imported SDK parts ahead of the first call (no network)."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Chat completions over ``AsyncOpenAI`` (used for OpenAI and OpenRouter)."""
+
+    def __init__(
+        self,
+        name: str,
+        api_key: str,
+        model: str,
+        base_url: str | None = None,
+        extra_headers: dict[str, str] | None = None,
+        timeout: float = 60.0,
+        max_connections: int = 20,
+        http_client: httpx.AsyncClient | None = None,
+        max_retries: int = 2,
+    ):
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        self.name = name
+        self.model = model
+        self.extra_headers = extra_headers or {}
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=max_retries,
+            http_client=http_client or DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+            ),
+        )
+
+    async def complete(self, prompt: str) -> str:
+        completion = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            extra_headers=self.extra_headers or None,
+        )
+        return completion.choices[0].message.content  # type: ignore[return-value]
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        chunks = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            extra_headers=self.extra_headers or None,
+            stream=True,
+        )
+        async for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def prepare(self) -> None:
+        _ = self.client.chat.completions  # resource modules are imported on first access
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gemini-2.0-flash",
+        temperature: float = 0.7,
+        base_url: str | None = None,
+    ):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        self.model = model
+        self.llm = ChatGoogleGenerativeAI(
+            model=model, google_api_key=api_key, temperature=temperature, base_url=base_url,
+        )
+
+    async def complete(self, prompt: str) -> str:
+        response = await self.llm.ainvoke(prompt)
+        return response.content  # type: ignore[return-value]
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        async for chunk in self.llm.astream(prompt):
+            if chunk.content:
+                yield chunk.content  # type: ignore[misc]
+
+    def prepare(self) -> None:
+        prepare_chat_model(self.llm)
+
+
+def prepare_chat_model(llm: Any) -> None:
+    """Build, but don't send, one Gemini request.
+
+    The SDK builds its pydantic request schemas on first use (~100 ms). This
+    is best effort because it goes through a private langchain hook.
+    """
+    build_request = getattr(llm, "_prepare_request", None)
+    if build_request is None:
+        return
+    from langchain_core.messages import HumanMessage
+
+    try:
+        build_request([HumanMessage("warmup")])
+    except Exception:
+        pass
+
+
+def build_providers(settings: Settings | None = None) -> list[LLMProvider]:
+    """Instantiate every configured provider, in fallback order."""
+    settings = settings or get_settings()
+    providers: list[LLMProvider] = []
+    if settings.openrouter_api_key:
+        providers.append(OpenAICompatibleProvider(
+            name="openrouter",
+            api_key=settings.openrouter_api_key,
+            model=settings.model_name or "openai/gpt-5-nano",
+            base_url=settings.openrouter_base_url,
+            extra_headers={
+                k: v
+                for k, v in {
+                    "HTTP-Referer": settings.openrouter_site_url,
+                    "X-Title": settings.openrouter_title,
+                }.items() if v
+            },
+            timeout=settings.llm_timeout,
+            max_connections=settings.llm_max_connections,
+        ))
+    if settings.openai_api_key:
+        providers.append(OpenAICompatibleProvider(
+            name="openai",
+            api_key=settings.openai_api_key,
+            model=settings.model_name or "gpt-4o-mini",
+            base_url=settings.openai_base_url,
+            timeout=settings.llm_timeout,
+            max_connections=settings.llm_max_connections,
+        ))
+    if settings.google_api_key:
+        providers.append(GeminiProvider(api_key=settings.google_api_key, base_url=settings.gemini_base_url))
+    return providers
+
+
+_providers: list[LLMProvider] | None = None
+
+
+def get_providers() -> list[LLMProvider]:
+    global _providers
+    if _providers is None:
+        _providers = build_providers()
+    return _providers
+
+
+async def close_providers() -> None:
+    global _providers
+    if _providers is not None:
+        for provider in _providers:
+            await provider.aclose()
+        _providers = None
+
@@ -1,4 +1,5 @@
 from .query import router  # re-export for convenience
 from .ws import ws_router
+from .math import math_router
 
-__all__ = ["router", "ws_router"]
+__all__ = ["router", "ws_router", "math_router"]
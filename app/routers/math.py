@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+import asyncio
+
+from app.metrics import track_in_flight
+from app.models.query_models import MathBatchIn
+from app.tools.math_batch import BatchPlan
+
+math_router = APIRouter()
+
+
+async def _stream(plan: BatchPlan):
+    for line in plan.lines():
+        yield line
+        await asyncio.sleep(0)  # let other requests run between chunks
+
+
+@math_router.post("/math/batch")
+async def math_batch_endpoint(payload: MathBatchIn):
+    variables = {
+        name: values.model_dump() if hasattr(values, "model_dump") else values
+        for name, values in (payload.variables or {}).items()
+    }
+    try:
+        # Validate and compile up front so bad input is a 400, not a broken stream
+        plan = BatchPlan(payload.expression_list(), variables, payload.chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(track_in_flight(_stream(plan), "math_batch"), media_type="application/x-ndjson")
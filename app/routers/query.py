@@ -1,28 +1,54 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 import json
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any
 
-from app.models.query_models import QueryIn, QueryOut
-from app.agent import agentic_select_and_run, agentic_stream
+from app.admission import AdmissionError, new_deadline
+from app.config import get_settings
+from app.metrics import track_in_flight
+from app.models.query_models import QueryIn, QueryOut, QueryBatchIn
+from app.agent import agentic_select_and_run, agentic_stream, agentic_result_line, agentic_batch_stream
+from app.rules import heuristic_tool
 
 router = APIRouter()
 
 def select_tool(query: str):  # simple fallback for other modules (e.g. ws)
-    q = query.lower()
-    if any(k in q for k in ["weather", "temperature", "rain", "forecast"]):
-        return "weather"
-    if any(sym in q for sym in ["+", "-", "*", "/"]) and any(ch.isdigit() for ch in q):
-        return "math"
-    return "llm"
+    return heuristic_tool(query)
+
+async def _prepend(first: str, rest: AsyncIterator[str]) -> AsyncIterator[str]:
+    yield first
+    async for line in rest:
+        yield line
+
 
 @router.post("/query", response_model=QueryOut)
 async def query_endpoint(payload: QueryIn):
     query = payload.query.strip()
+    deadline = new_deadline(payload.deadline_ms)
     try:
         # We still compute a dict for the response_model (docs/schema) while streaming.
         # FastAPI will not build body since we override with StreamingResponse.
-        stream = agentic_stream(query)
-        return StreamingResponse(stream, media_type="application/json")
+        if payload.stream:
+            stream = agentic_stream(query, payload.bypass_cache, deadline)
+        else:
+            stream = agentic_result_line(query, payload.bypass_cache, deadline)
+        # Route and wait for admission before committing to a 200 status
+        first = await anext(stream)
+    except AdmissionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail(), headers=e.headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(track_in_flight(_prepend(first, stream), "query"), media_type="application/x-ndjson")
+
+
+@router.post("/query/batch")
+async def query_batch_endpoint(payload: QueryBatchIn):
+    max_size = get_settings().query_batch_max_size
+    if len(payload.queries) > max_size:
+        raise HTTPException(status_code=400, detail=f"Too many queries (max {max_size})")
+    queries = [q.strip() for q in payload.queries]
+    # One NDJSON line per query, in completion order, tagged with its index
+    stream = agentic_batch_stream(
+        queries, bypass_cache=payload.bypass_cache, deadline=new_deadline(payload.deadline_ms),
+    )
+    return StreamingResponse(track_in_flight(stream, "query_batch"), media_type="application/x-ndjson")
@@ -1,20 +1,91 @@
+import asyncio
+import json
+from typing import Any
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.admission import AdmissionError, new_deadline
 from app.agent import agentic_select_and_run
+from app.config import get_settings
+from app.metrics import IN_FLIGHT, WS_CONNECTIONS, WS_MESSAGE_SECONDS, observe
 
 ws_router = APIRouter()
 
+
+def _parse_message(data: str) -> tuple[Any, str, bool, float | None]:
+    """Return (request id, query, bypass_cache, deadline_ms) for a JSON ``{"id", "query"}`` frame or plain text."""
+    try:
+        message = json.loads(data)
+    except ValueError:
+        return None, data, False, None
+    if isinstance(message, dict) and isinstance(message.get("query"), str):
+        deadline_ms = message.get("deadline_ms")
+        if not isinstance(deadline_ms, (int, float)) or isinstance(deadline_ms, bool):
+            deadline_ms = None
+        return message.get("id"), message["query"], bool(message.get("bypass_cache")), deadline_ms
+    return None, data, False, None
+
+
 @ws_router.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
+    """Pipelined WebSocket: many requests in flight, answered as they finish.
+
+    Frames are either plain text queries or ``{"id": ..., "query": ...}``
+    (optionally ``"deadline_ms"``); the id is echoed back so out-of-order
+    responses can be matched. At most
+    ``WS_MAX_IN_FLIGHT`` requests run per connection; beyond that we stop
+    reading frames (backpressure) until one completes.
+    """
     await ws.accept()
-    try:
-        while True:
-            data = await ws.receive_text()
+    slots = asyncio.Semaphore(get_settings().ws_max_in_flight)
+    send_lock = asyncio.Lock()
+    in_flight: set[asyncio.Task] = set()
+    in_flight_gauge = IN_FLIGHT.labels("ws")
+
+    async def handle(request_id: Any, query: str, bypass_cache: bool, deadline_ms: float | None) -> None:
+        # The slot was acquired before the frame was read; give it back however we exit
+        try:
+            deadline = new_deadline(deadline_ms)
+            with in_flight_gauge.track_inprogress(), observe(WS_MESSAGE_SECONDS):
+                await respond(request_id, query, bypass_cache, deadline)
+        finally:
+            slots.release()
+
+    async def respond(request_id: Any, query: str, bypass_cache: bool, deadline: float | None) -> None:
+        try:
             # Use the same agentic routing as the /query endpoint
-            result = await agentic_select_and_run(data)
-            await ws.send_json({
+            result = await agentic_select_and_run(query, bypass_cache, deadline)
+            response = {
                 "query": result["query"],
                 "tool_used": result["tool_used"],
-                "result": result["result"]
-            })
+                "result": result["result"],
+                **({"calls": result["calls"]} if "calls" in result else {}),
+            }
+        except AdmissionError as e:
+            response = {"query": query, **e.detail()}
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise  # this request was cancelled: the client is gone
+            # Cancelled from inside (e.g. a shared call gave up): still answer
+            response = {"query": query, "error": "Request cancelled"}
+        except Exception as e:
+            response = {"query": query, "error": str(e)}
+        if request_id is not None:
+            response = {"id": request_id, **response}
+        async with send_lock:
+            await ws.send_json(response)
+
+    WS_CONNECTIONS.inc()
+    try:
+        while True:
+            await slots.acquire()
+            data = await ws.receive_text()
+            task = asyncio.create_task(handle(*_parse_message(data)))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
     except WebSocketDisconnect:
         pass
+    finally:
+        # Client is gone: nobody can receive these answers
+        for task in in_flight:
+            task.cancel()
+        WS_CONNECTIONS.dec()
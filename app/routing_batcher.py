@@ -0,0 +1,160 @@
+"""Micro-batched routing: one LLM call decides for many concurrent queries.
+
+Queries arriving within ``ROUTING_BATCH_WINDOW_MS`` (or until
+``ROUTING_BATCH_MAX_SIZE`` are pending) share a single prompt. The tool list
+and format instructions are sent once per batch instead of once per query. The
+model answers with a JSON array of ``{index, tool, input}`` objects that is
+fanned back out to the waiting callers. A compound question may get several
+objects with the same index, one per independent part (``route_calls``).
+
+Parsing is per item: a missing or malformed entry resolves that caller to
+``None`` (the agent then falls back to the heuristic) without affecting the
+rest of the batch.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from typing import TYPE_CHECKING, Any, Sequence
+
+from pydantic import BaseModel, ValidationError
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import PromptTemplate
+
+BATCH_PROMPT = """You are a tool router that selects the best tool for each user question.
+
+Available tools:
+{tools}
+
+Instructions:
+- Handle every numbered question independently
+- A question asking for several independent things gets one object per part, all with that question's index
+- For math queries: input is ONLY the mathematical expression (e.g., "42 * 7")
+- For weather queries: input is ONLY the city name (e.g., "Jakarta") - NO extra words
+- For other queries: input is the original question
+
+Respond with ONLY a JSON array, one object per question, in order:
+[{{"index": 1, "tool": "math|weather|llm", "input": "..."}}]
+
+Questions:
+{questions}"""
+
+
+def build_batch_prompt_template() -> PromptTemplate:
+    from langchain_core.prompts import PromptTemplate
+
+    return PromptTemplate(template=BATCH_PROMPT, input_variables=["tools", "questions"])
+
+
+def format_questions(queries: Sequence[str]) -> str:
+    # json.dumps keeps quotes/newlines in a query from breaking the numbering
+    return "\n".join(f"{i}. {json.dumps(q, ensure_ascii=False)}" for i, q in enumerate(queries, start=1))
+
+
+_ARRAY = re.compile(r"\[.*\]", re.DOTALL)
+
+
+def parse_batch_response(
+    text: str, count: int, selection_model: type[BaseModel], tools: Sequence[str], multi: bool = False,
+) -> list[Any]:
+    """Map the model's JSON answer to one selection (or None) per query.
+
+    With ``multi``, each query gets the list of all its valid selections (or None).
+    """
+    match = _ARRAY.search(text)
+    if match is None:
+        return [None] * count
+    try:
+        items = json.loads(match.group())
+    except ValueError:
+        return [None] * count
+    selections: list[Any] = [None] * count
+    for position, item in enumerate(items if isinstance(items, list) else []):
+        if not isinstance(item, dict):
+            continue
+        index = item.get("index", position + 1)
+        if not isinstance(index, int) or not 1 <= index <= count:
+            continue
+        if selections[index - 1] is not None and not multi:
+            continue
+        try:
+            selection = selection_model(tool=item.get("tool"), input=item.get("input"))
+        except ValidationError:
+            continue
+        if selection.tool not in tools:
+            continue
+        if multi:
+            selections[index - 1] = (selections[index - 1] or []) + [selection]
+        else:
+            selections[index - 1] = selection
+    return selections
+
+
+class RoutingBatcher:
+    """Collect concurrent routing requests and resolve them with one LLM call."""
+
+    def __init__(
+        self,
+        llm: Any,
+        tool_descriptions: str,
+        selection_model: type[BaseModel],
+        tools: Sequence[str],
+        window: float = 0.01,
+        max_size: int = 16,
+    ):
+        self.chain = build_batch_prompt_template() | llm
+        self.tool_descriptions = tool_descriptions
+        self.selection_model = selection_model
+        self.tools = tuple(tools)
+        self.window = window
+        self.max_size = max_size
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.queries = 0
+
+    async def route(self, query: str) -> Any:
+        """Selection for ``query`` (None if the batch answer had no valid entry)."""
+        calls = await self.route_calls(query)
+        return calls[0] if calls else None
+
+    async def route_calls(self, query: str) -> list[Any] | None:
+        """Every selection for ``query`` (one per independent part), or None."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._resolve(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        queries = [q for q, _ in batch]
+        self.batches += 1
+        self.queries += len(queries)
+        try:
+            response = await self.chain.ainvoke({
+                "tools": self.tool_descriptions,
+                "questions": format_questions(queries),
+            })
+            text = getattr(response, "content", response)
+            selections = parse_batch_response(str(text), len(queries), self.selection_model, self.tools, multi=True)
+        except Exception:
+            selections = [None] * len(queries)
+        for (_, future), selection in zip(batch, selections):
+            if not future.done():
+                future.set_result(selection)
@@ -0,0 +1,82 @@
+"""Cache of routing decisions keyed on a normalized query.
+
+Repeated questions ("what is the weather in Jakarta") skip the Gemini routing
+call entirely. Entries are (tool, input) pairs as produced by the router, or
+a list of such pairs for a compound question, and can optionally be persisted
+to a JSON file across restarts.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+
+from app.cache import TTLCache
+from app.cache_backend import get_shared_backend
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Punctuation that never changes meaning; math operators and brackets are kept.
+_STRIP = re.compile(r"[?!,;:\"'`“”‘’¿¡]")
+# A dot is only meaningful between digits (2.5); drop sentence full stops.
+_DOT = re.compile(r"(?<!\d)\.|\.(?!\d)")
+
+
+def normalize_query(query: str) -> str:
+    q = _STRIP.sub("", query.casefold())
+    q = _DOT.sub("", q)
+    return " ".join(q.split())
+
+
+@lru_cache
+def get_routing_cache() -> TTLCache:
+    settings = get_settings()
+    return TTLCache(
+        maxsize=settings.routing_cache_size,
+        ttl=settings.routing_cache_ttl,
+        name="routing",
+        shared=get_shared_backend(),
+    )
+
+
+def _decision(row: dict) -> tuple[str, str] | list[list[str]]:
+    if "calls" in row:
+        return [[str(tool), str(tool_input)] for tool, tool_input in row["calls"]]
+    return (row["tool"], row["input"])
+
+
+def _row(key: str, decision, stored_at: float) -> dict:
+    if isinstance(decision[0], str):
+        tool, tool_input = decision
+        return {"query": key, "tool": tool, "input": tool_input, "stored_at": stored_at}
+    return {"query": key, "calls": [list(call) for call in decision], "stored_at": stored_at}
+
+
+def load_routing_cache(path: str | None = None) -> int:
+    """Restore persisted decisions (no-op when no path is configured)."""
+    path = path or get_settings().routing_cache_path
+    if not path or not os.path.exists(path):
+        return 0
+    try:
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+        entries = [(r["query"], _decision(r), r["stored_at"]) for r in rows]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("Ignoring unreadable routing cache %s: %s", path, e)
+        return 0
+    return get_routing_cache().restore(entries)
+
+
+def save_routing_cache(path: str | None = None) -> int:
+    path = path or get_settings().routing_cache_path
+    if not path:
+        return 0
+    rows = [_row(key, decision, stored_at) for key, decision, stored_at in get_routing_cache().snapshot()]
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(rows, f)
+    os.replace(tmp, path)
+    return len(rows)
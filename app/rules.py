@@ -0,0 +1,161 @@
+"""Declarative keyword rules compiled into trie-shaped regex matchers.
+
+The fallback heuristic (used when the routing agent is unavailable or fails) is
+expressed as a rule table. Each keyword group is folded into a trie-shaped
+regex searched on its own, so the cost does not grow with the number of
+keywords, and keywords that overlap across groups ("rain" inside "train",
+"weather" inside "weather report") all count. One alternation over every group
+would report only the leftmost, non-overlapping matches.
+
+A rule fires when any (``require="any"``) or all (``require="all"``) of its
+groups match; the highest-priority firing rule wins, else ``default_tool``.
+The table can be replaced with a JSON file via ``ROUTING_RULES_PATH``. Rules
+naming a tool that is not registered (a typo in that file) are logged and
+routed to ``default_tool`` instead (``llm`` if that is unknown too).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import Collection, Literal
+
+from pydantic import BaseModel, Field
+
+from app.config import get_settings
+from app.tools.registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordGroup(BaseModel):
+    keywords: list[str]
+    whole_word: bool = False  # substring match otherwise (previous behavior)
+    lang: str | None = None
+
+
+class Rule(BaseModel):
+    tool: str
+    priority: int = 0
+    require: Literal["any", "all"] = "any"
+    groups: list[KeywordGroup]
+
+
+class RuleTable(BaseModel):
+    default_tool: str = "llm"
+    rules: list[Rule] = Field(default_factory=list)
+
+
+DEFAULT_RULES = RuleTable(rules=[
+    Rule(tool="weather", priority=20, groups=[
+        KeywordGroup(lang="en", keywords=["weather", "temperature", "rain", "forecast"]),
+        KeywordGroup(lang="id", whole_word=True, keywords=["cuaca", "suhu", "hujan", "prakiraan"]),
+        KeywordGroup(lang="es", whole_word=True, keywords=["qué tiempo hace", "que tiempo hace", "temperatura", "lluvia", "pronóstico"]),
+        KeywordGroup(lang="fr", whole_word=True, keywords=["météo", "meteo", "température", "pluie", "prévisions"]),
+        KeywordGroup(lang="de", whole_word=True, keywords=["wetter", "temperatur", "regen", "wettervorhersage"]),
+    ]),
+    Rule(tool="math", priority=10, require="all", groups=[
+        KeywordGroup(keywords=["+", "-", "*", "/"]),
+        KeywordGroup(keywords=list("0123456789")),
+    ]),
+])
+
+
+def _trie_pattern(words: list[str]) -> str:
+    """Regex equivalent to ``a|b|c`` but shaped as a trie (shared prefixes)."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str | None:
+        if "" in node and len(node) == 1:
+            return None  # end of word, nothing follows
+        branches, leaves = [], []
+        for ch in sorted(k for k in node if k):
+            sub = build(node[ch])
+            if sub is None:
+                leaves.append(re.escape(ch))
+            else:
+                branches.append(re.escape(ch) + sub)
+        leaves_only = not branches
+        if leaves:
+            branches.append(leaves[0] if len(leaves) == 1 else "[" + "".join(leaves) + "]")
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:  # a keyword may also end here
+            body = body + "?" if leaves_only else "(?:" + body + ")?"
+        return body
+
+    return build(trie) or ""
+
+
+class RuleEngine:
+    def __init__(self, table: RuleTable, tools: Collection[str] | None = None):
+        if tools is not None:
+            table = _known_tools(table, tools)
+        self.table = table
+        # (rule, named groups it owns) in descending priority
+        self._rules: list[tuple[Rule, list[str]]] = []
+        self._groups: list[tuple[str, re.Pattern[str]]] = []
+        for r, rule in enumerate(table.rules):
+            names = []
+            for g, group in enumerate(rule.groups):
+                words = sorted({k.casefold() for k in group.keywords if k})
+                if not words:
+                    continue
+                name = f"r{r}g{g}"
+                pattern = _trie_pattern(words)
+                if group.whole_word:
+                    pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+                self._groups.append((name, re.compile(pattern)))
+                names.append(name)
+            if names:
+                self._rules.append((rule, names))
+        self._rules.sort(key=lambda item: -item[0].priority)
+
+    def matched_groups(self, query: str) -> set[str]:
+        q = query.casefold()
+        return {name for name, pattern in self._groups if pattern.search(q)}
+
+    def match(self, query: str) -> str:
+        """Tool chosen by the highest-priority rule that fires."""
+        hits = self.matched_groups(query)
+        for rule, names in self._rules:
+            check = any if rule.require == "any" else all
+            if check(n in hits for n in names):
+                return rule.tool
+        return self.table.default_tool
+
+
+def _known_tools(table: RuleTable, tools: Collection[str]) -> RuleTable:
+    fallback = table.default_tool if table.default_tool in tools else "llm"
+    if fallback != table.default_tool:
+        logger.warning("Routing rules: unknown default tool %r, using %r", table.default_tool, fallback)
+    rules = []
+    for rule in table.rules:
+        if rule.tool not in tools:
+            logger.warning("Routing rules: unknown tool %r, routing its rule to %r", rule.tool, fallback)
+            rule = rule.model_copy(update={"tool": fallback})
+        rules.append(rule)
+    return table.model_copy(update={"default_tool": fallback, "rules": rules})
+
+
+def load_rule_table(path: str | None = None) -> RuleTable:
+    path = path or get_settings().routing_rules_path
+    if not path:
+        return DEFAULT_RULES
+    with open(path, encoding="utf-8") as f:
+        return RuleTable.model_validate(json.load(f))
+
+
+@lru_cache
+def get_rule_engine() -> RuleEngine:
+    return RuleEngine(load_rule_table(), get_registry().tools)
+
+
+def heuristic_tool(query: str) -> str:
+    """Keyword fallback used when the routing agent is unavailable."""
+    return get_rule_engine().match(query)
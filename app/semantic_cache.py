@@ -0,0 +1,275 @@
+"""Near-duplicate LLM answer cache over local hashed n-gram embeddings.
+
+Paraphrases ("who is France's president" / "president of france?") miss the
+exact-match answer cache. Here each question is embedded without any network
+call: content words (stop words dropped, possessive / plural ``s`` stripped)
+plus their character 3-grams, signed-hashed into ``dim`` buckets and
+L2-normalized. Cosine similarity is then one matrix-vector product over a
+preallocated ``(capacity, dim)`` float32 matrix.
+
+Memory is fixed at ``capacity * dim * 4`` bytes. Inserts write one row in
+place (incremental, no rebuild); when full, expired rows and then the least
+recently used row are reused. A lookup hits when the best similarity among
+live entries of an allowed provider is at least ``threshold``.
+
+``evaluate`` reports hit rate, false-hit rate and lookup latency on a labelled
+paraphrase set (see ``benchmarks/bench_semantic_cache.py``).
+"""
+from __future__ import annotations
+
+import re
+import time
+import zlib
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Sequence
+
+import numpy as np
+
+from app.cache import register_stats
+from app.config import get_settings
+from app.providers import LLMProvider
+from app.routing_cache import normalize_query
+
+_WORD = re.compile(r"[^\W_]+(?:['’][^\W_]+)?")
+STOPWORDS = frozenset("""
+    a an the is are was were be been being am of in on at to for from by with about as into
+    what who whom whose which how why when where does do did can could would should will
+    tell me please you your i my we our it its this that these those there and or
+    give explain describe know some any
+""".split())
+_CHAR_WEIGHT = 0.5  # total weight of a word's 3-grams relative to the word itself
+
+
+def terms(query: str) -> list[str]:
+    out = []
+    for word in _WORD.findall(query.casefold()):
+        word = re.sub(r"['’]s$", "", word).replace("'", "").replace("’", "")
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        out.append(word)
+    return out
+
+
+def _add(vec: np.ndarray, feature: str, weight: float) -> None:
+    h = zlib.crc32(feature.encode("utf-8"))
+    vec[(h & 0x7FFFFFFF) % len(vec)] += weight if h & 0x80000000 else -weight
+
+
+def embed(query: str, dim: int = 512) -> np.ndarray:
+    """Unit-length float32 embedding (all zeros when no content word is left)."""
+    vec = np.zeros(dim, dtype=np.float32)
+    for term in terms(query):
+        _add(vec, f"w:{term}", 1.0)
+        padded = f"<{term}>"
+        grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for gram in grams:
+            _add(vec, f"c:{gram}", _CHAR_WEIGHT / len(grams))
+    norm = np.linalg.norm(vec)
+    if norm:
+        vec /= norm
+    return vec
+
+
+def _tag(provider: LLMProvider | str) -> str:
+    """Entries are only served to the provider (and model) that produced them.
+
+    A plain string is used as the tag itself (``evaluate`` tags its entries
+    without a provider).
+    """
+    if isinstance(provider, str):
+        return provider
+    return f"{provider.name}:{getattr(provider, 'model', '')}"
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        capacity: int = 4096,
+        dim: int = 512,
+        threshold: float = 0.9,
+        ttl: float = 86400.0,
+        name: str | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.dim = dim
+        self.threshold = threshold
+        self.ttl = ttl
+        self._clock = clock
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._expires = np.full(capacity, -np.inf)  # -inf marks a free slot
+        self._last_used = np.zeros(capacity)
+        self._tags = np.zeros(capacity, dtype=np.int32)
+        self._answers: list[str | None] = [None] * capacity
+        self._queries: list[str | None] = [None] * capacity
+        self._tag_ids: dict[str, int] = {}
+        self._slots: dict[tuple[str, int], int] = {}  # (query, tag) -> slot, for in-place updates
+        self._used = 0  # high-water mark: rows past it were never written
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if name:
+            register_stats(name, self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0 and self.ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._slots),
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "index_bytes": self._vectors.nbytes,
+        }
+
+    def clear(self) -> None:
+        self._expires[:] = -np.inf
+        self._answers = [None] * self.capacity
+        self._queries = [None] * self.capacity
+        self._slots.clear()
+        self._used = 0
+
+    def _free(self, slot: int) -> None:
+        query = self._queries[slot]
+        if query is not None:
+            self._slots.pop((query, int(self._tags[slot])), None)
+        self._expires[slot] = -np.inf
+        self._answers[slot] = self._queries[slot] = None
+
+    def search(self, query: str, providers: Sequence[LLMProvider | str]) -> tuple[str, float] | None:
+        """(answer, similarity) of the closest live entry above the threshold."""
+        if not self.enabled or not self._slots:
+            return None
+        allowed = [self._tag_ids[t] for t in map(_tag, providers) if t in self._tag_ids]
+        vec = embed(query, self.dim)
+        if not allowed or not vec.any():
+            self.misses += 1
+            return None
+        n = self._used
+        now = self._clock()
+        sims = self._vectors[:n] @ vec
+        live = (self._expires[:n] > now) & np.isin(self._tags[:n], allowed)
+        sims[~live] = -1.0
+        best = int(sims.argmax())
+        if sims[best] < self.threshold:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._last_used[best] = now
+        return self._answers[best], float(sims[best])  # type: ignore[return-value]
+
+    def get(self, query: str, providers: Sequence[LLMProvider | str]) -> str | None:
+        found = self.search(query, providers)
+        return None if found is None else found[0]
+
+    def set(self, query: str, provider: LLMProvider | str, answer: str) -> None:
+        if not self.enabled or not isinstance(answer, str) or not answer:
+            return
+        vec = embed(query, self.dim)
+        if not vec.any():
+            return  # nothing to match on (e.g. only stop words)
+        tag = self._tag_ids.setdefault(_tag(provider), len(self._tag_ids))
+        now = self._clock()
+        key = (normalize_query(query), tag)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._allocate(now)
+            self._slots[key] = slot
+        self._vectors[slot] = vec
+        self._expires[slot] = now + self.ttl
+        self._last_used[slot] = now
+        self._tags[slot] = tag
+        self._answers[slot] = answer
+        self._queries[slot] = key[0]
+
+    def _allocate(self, now: float) -> int:
+        if self._used < self.capacity:
+            self._used += 1
+            return self._used - 1
+        free = np.flatnonzero(self._expires <= now)
+        if len(free):
+            slot = int(free[0])
+        else:
+            slot = int(self._last_used.argmin())
+            self.evictions += 1
+        self._free(slot)
+        return slot
+
+
+@lru_cache
+def get_semantic_cache() -> SemanticCache | None:
+    settings = get_settings()
+    if not settings.semantic_cache_enabled:
+        return None
+    return SemanticCache(
+        capacity=settings.semantic_cache_size,
+        dim=settings.semantic_cache_dim,
+        threshold=settings.semantic_cache_threshold,
+        ttl=settings.semantic_cache_ttl,
+        name="semantic",
+    )
+
+
+def evaluate(
+    rows: Iterable[dict[str, Any]],
+    thresholds: Sequence[float],
+    dim: int = 512,
+    distractors: Sequence[str] = (),
+) -> list[dict[str, Any]]:
+    """Hit / false-hit rate and lookup latency per threshold on labelled paraphrases.
+
+    Rows are ``{"query", "group"}``. The first query of every group with two or
+    more members is cached (answer = group); every other row is a probe. A
+    probe hits correctly when it returns its own group's answer, and falsely
+    when it returns another group's (probes from singleton groups should
+    always miss). ``distractors`` are cached too, to measure latency on a
+    fuller index.
+    """
+    rows = list(rows)
+    members: dict[str, list[str]] = {}
+    for row in rows:
+        members.setdefault(str(row["group"]), []).append(row["query"])
+    seeds = {group: queries[0] for group, queries in members.items() if len(queries) > 1}
+    probes = [(row["query"], str(row["group"])) for row in rows if seeds.get(str(row["group"])) != row["query"]]
+    positives = sum(1 for _, group in probes if group in seeds)
+    tag = "eval"
+
+    report = []
+    for threshold in thresholds:
+        cache = SemanticCache(capacity=len(seeds) + len(distractors), dim=dim, threshold=threshold)
+        for i, text in enumerate(distractors):
+            cache.set(text, tag, f"distractor-{i}")
+        for group, query in seeds.items():
+            cache.set(query, tag, group)
+        hits = false_hits = 0
+        latencies = []
+        for query, group in probes:
+            start = time.perf_counter()
+            answer = cache.get(query, [tag])
+            latencies.append(time.perf_counter() - start)
+            if answer == group:
+                hits += 1
+            elif answer is not None:
+                false_hits += 1
+        latencies.sort()
+        report.append({
+            "threshold": threshold,
+            "hit_rate": round(hits / positives, 4) if positives else 0.0,
+            "false_hit_rate": round(false_hits / len(probes), 4) if probes else 0.0,
+            "entries": len(cache),
+            "lookup_p50_us": round(latencies[len(latencies) // 2] * 1e6, 1) if latencies else 0.0,
+            "lookup_p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1) if latencies else 0.0,
+        })
+    return report
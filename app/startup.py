@@ -0,0 +1,78 @@
+"""Startup timing and readiness (``/health``).
+
+``app.main`` imports this module first, so ``STATE.import_seconds`` covers
+importing the app and everything it pulls in. Liveness only means the process
+answers HTTP. Readiness comes later: after the lifespan startup and, with
+``STARTUP_WARMUP``, after the routing chain, providers and caches are built
+(``app.agent.warmup``), so the first user request doesn't pay for them.
+``FirstRequestTimer`` records how long the first request took.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any
+
+_started = time.perf_counter()
+
+
+class StartupState:
+    def __init__(self, started: float):
+        self.started = started
+        self.import_seconds: float | None = None
+        self.warmup_seconds: dict[str, float] | None = None
+        self.warmup_error: str | None = None
+        self.ready_after: float | None = None  # seconds since import start
+        self.first_request_seconds: float | None = None
+        self.first_request_path: str | None = None
+        self.ready = False
+
+    def mark_imported(self) -> None:
+        self.import_seconds = time.perf_counter() - self.started
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        self.ready_after = time.perf_counter() - self.started
+
+    def report(self) -> dict[str, Any]:
+        def ms(seconds: float | None) -> float | None:
+            return None if seconds is None else round(seconds * 1000, 1)
+
+        report: dict[str, Any] = {
+            "import_ms": ms(self.import_seconds),
+            "ready_after_ms": ms(self.ready_after),
+            "first_request_ms": ms(self.first_request_seconds),
+        }
+        if self.first_request_path is not None:
+            report["first_request_path"] = self.first_request_path
+        if self.warmup_seconds is not None:
+            report["warmup_ms"] = {step: ms(seconds) for step, seconds in self.warmup_seconds.items()}
+        if self.warmup_error is not None:
+            report["warmup_error"] = self.warmup_error
+        return report
+
+
+STATE = StartupState(_started)
+
+
+class FirstRequestTimer:
+    """ASGI middleware timing the first non-health HTTP request, then a pass-through."""
+
+    def __init__(self, app: Any, state: StartupState = STATE):
+        self.app = app
+        self.state = state
+        self.pending = True
+
+    async def __call__(self, scope, receive, send) -> None:
+        if not self.pending or scope["type"] != "http" or scope["path"].startswith("/health"):
+            await self.app(scope, receive, send)
+            return
+        self.pending = False
+        start = time.perf_counter()
+
+        async def timed_send(message) -> None:
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                self.state.first_request_seconds = time.perf_counter() - start
+                self.state.first_request_path = scope["path"]
+
+        await self.app(scope, receive, timed_send)
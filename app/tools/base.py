@@ -1,10 +1,22 @@
 from abc import ABC, abstractmethod
 from typing import Any
 
+from app.admission import within_deadline
+
+
 class Tool(ABC):
     name: str
     description: str
+    execution: str = "inline"  # inline | thread | process, see app.tools.registry
 
     @abstractmethod
     async def run(self, query: str) -> Any:
         ...
+
+    def run_sync(self, query: str) -> Any:
+        """Blocking ``run`` for the thread and process policies."""
+        raise NotImplementedError(f"{type(self).__name__} can only run inline")
+
+    async def run_until(self, query: str, deadline: float | None) -> Any:
+        """``run``, cancelled with ``DeadlineExceeded`` once ``deadline`` (monotonic) passes."""
+        return await within_deadline(self.run(query), deadline, "tool", self.name)
@@ -1,71 +1,219 @@
-from typing import Any
+import asyncio
+import time
+from typing import Any, AsyncIterator, Iterator
 from .base import Tool
+from app.answer_cache import AnswerCache, answer_cache_bypassed, get_answer_cache
 from app.config import get_settings
+from app.metrics import FALLBACKS, PROVIDER_ERRORS, PROVIDER_SECONDS
+from app.provider_health import ProviderHealth
+from app.providers import LLMProvider, get_providers
+from app.semantic_cache import SemanticCache, get_semantic_cache
+
+# Latency samples needed before the hedge delay follows the provider's p95
+HEDGE_MIN_SAMPLES = 10
 
-from openai import OpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
 
 class LLMTool(Tool):
     name = "llm"
     description = "Answers general knowledge or open-ended questions via OpenRouter, OpenAI, or Google Gemini (auto-fallback)."
 
+    def __init__(
+        self,
+        providers: list[LLMProvider] | None = None,
+        cache: AnswerCache | None = None,
+        semantic_cache: SemanticCache | None = None,
+    ):
+        # None -> process-wide providers / caches built from settings on first use
+        self._providers = providers
+        self._cache = cache
+        self._semantic_cache = semantic_cache
+        self._health: dict[str, ProviderHealth] = {}
+
+    @property
+    def providers(self) -> list[LLMProvider]:
+        return self._providers if self._providers is not None else get_providers()
+
+    @property
+    def cache(self) -> AnswerCache:
+        return self._cache if self._cache is not None else get_answer_cache()
+
+    @property
+    def semantic_cache(self) -> SemanticCache | None:
+        return self._semantic_cache if self._semantic_cache is not None else get_semantic_cache()
+
+    async def _cached(self, query: str) -> str | None:
+        if answer_cache_bypassed():
+            return None
+        answer = await self.cache.get(query, self.providers)
+        if answer is None and self.semantic_cache is not None:
+            # Paraphrase of a question answered before
+            answer = self.semantic_cache.get(query, self.providers)
+        return answer
+
+    async def _store(self, query: str, provider: LLMProvider, answer: str) -> None:
+        await self.cache.set(query, provider, answer)
+        if self.semantic_cache is not None:
+            self.semantic_cache.set(query, provider, answer)
+
+    def health(self, provider: LLMProvider) -> ProviderHealth:
+        tracker = self._health.get(provider.name)
+        if tracker is None:
+            settings = get_settings()
+            tracker = self._health[provider.name] = ProviderHealth(
+                window=settings.llm_health_window,
+                failure_threshold=settings.llm_breaker_failures,
+                cooldown=settings.llm_breaker_cooldown,
+            )
+        return tracker
+
+    def health_stats(self) -> dict[str, dict[str, Any]]:
+        return {provider.name: self.health(provider).stats for provider in self.providers}
+
+    def _available(self) -> Iterator[LLMProvider]:
+        """Providers to try, in order, skipping those with an open circuit.
+
+        Lazy so a half-open provider's probe is only claimed when it is tried.
+        """
+        providers = list(self.providers)
+        if get_settings().llm_prefer_fastest:
+            # Stable: ties (and providers without data yet) keep preference order
+            providers.sort(key=lambda p: self.health(p).percentile(0.5) or 0.0)
+        return (p for p in providers if self.health(p).allow())
+
+    async def _attempt(self, provider: LLMProvider, query: str) -> str:
+        health = self.health(provider)
+        start = time.perf_counter()
+        try:
+            answer = await provider.complete(query)
+        except asyncio.CancelledError:
+            health.release()
+            _observe(provider, "cancelled", start)
+            raise
+        except Exception:
+            health.record_failure(_observe(provider, "error", start))
+            raise
+        health.record_success(_observe(provider, "ok", start))
+        return answer
+
     async def run(self, query: str) -> Any:
-        settings = get_settings()
-        
+        cached = await self._cached(query)
+        if cached is not None:
+            return cached
+        if get_settings().llm_hedge_enabled:
+            ask = lambda: self._run_hedged(query)  # noqa: E731
+        else:
+            ask = lambda: self._run_in_order(query)  # noqa: E731
+        # With a shared cache backend, one worker asks while the others wait for its answer
+        answered = await self.cache.compute_once(query, self.providers, ask)
+        if answered is None:
+            # Never cached, so a provider coming back is picked up at once
+            FALLBACKS.labels("llm_stub").inc()
+            return self._stub(query)
+        provider, answer = answered
+        await self._store(query, provider, answer)
+        return answer
+
+    async def _run_in_order(self, query: str) -> tuple[LLMProvider, str] | None:
         # Preference: OpenRouter > OpenAI > Google Gemini > stub
-        use_openrouter = bool(settings.openrouter_api_key)
-        openai_key = settings.openai_api_key
-        google_key = settings.google_api_key
-        
-        # Try OpenRouter first
-        if use_openrouter and OpenAI is not None:
+        for provider in self._available():
             try:
-                client = OpenAI(api_key=settings.openrouter_api_key, base_url="https://openrouter.ai/api/v1")
-                model = settings.model_name or "openai/gpt-5-nano"
-                completion = client.chat.completions.create(
-                    model=model,
-                    messages=[{"role": "user", "content": query}],
-                    extra_headers={
-                        k: v
-                        for k, v in {
-                            "HTTP-Referer": settings.openrouter_site_url,
-                            "X-Title": settings.openrouter_title,
-                        }.items() if v
-                    },
-                )
-                return completion.choices[0].message.content  # type: ignore[attr-defined]
-            except Exception as e:  # pragma: no cover - network path
+                return provider, await self._attempt(provider, query)
+            except Exception:  # pragma: no cover - network path
                 # Fall through to next option
-                pass
-        
-        # Try OpenAI second
-        elif openai_key and OpenAI is not None:
-            try:
-                client = OpenAI(api_key=openai_key)
-                completion = client.chat.completions.create(
-                    model=settings.model_name or "gpt-4o-mini",
-                    messages=[{"role": "user", "content": query}],
-                )
-                return completion.choices[0].message.content  # type: ignore[attr-defined]
-            except Exception as e:  # pragma: no cover - network path
-                # Fall through to next option
-                pass
-        
-        # Try Google Gemini third
-        if google_key and ChatGoogleGenerativeAI is not None:
+                continue
+        return None
+
+    def _hedge_delay(self, provider: LLMProvider) -> float:
+        health = self.health(provider)
+        if health.samples < HEDGE_MIN_SAMPLES:
+            return get_settings().llm_hedge_delay
+        return health.percentile(0.95)  # type: ignore[return-value]
+
+    async def _run_hedged(self, query: str) -> tuple[LLMProvider, str] | None:
+        """Fallback order, but also start the next provider once the current one
+        is slower than its usual p95; the first answer wins, the rest are cancelled.
+
+        At most one hedge is in flight; a failure starts the next provider at once.
+        """
+        available = self._available()
+        pending: dict[asyncio.Task, LLMProvider] = {}
+        hedged = False
+
+        def launch() -> bool:
+            provider = next(available, None)
+            if provider is None:
+                return False
+            pending[asyncio.create_task(self._attempt(provider, query))] = provider
+            return True
+
+        try:
+            launch()
+            while pending:
+                timeout = None
+                if not hedged and len(pending) == 1:
+                    timeout = self._hedge_delay(next(iter(pending.values())))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    launch()
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        return provider, task.result()
+                if len(pending) < 2:
+                    launch()
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, query: str) -> AsyncIterator[str]:
+        """Yield the answer incrementally, with the same fallback order as run().
+
+        Not hedged: racing two streams would mean discarding already-sent text.
+        A cached answer is yielded as a single chunk.
+        """
+        cached = await self._cached(query)
+        if cached is not None:
+            yield cached
+            return
+        for provider in self._available():
+            health = self.health(provider)
+            start = time.perf_counter()
+            parts: list[str] = []
             try:
-                llm = ChatGoogleGenerativeAI(
-                    model="gemini-2.0-flash", 
-                    google_api_key=google_key, 
-                    temperature=0.7
-                )
-                response = await llm.ainvoke(query)
-                return response.content
-            except Exception as e:  # pragma: no cover - network path
-                # Fall through to stub
-                pass
-        
+                async for delta in provider.stream(query):
+                    parts.append(delta)
+                    yield delta
+            except Exception:  # pragma: no cover - network path
+                health.record_failure(_observe(provider, "error", start))
+                if parts:
+                    # Part of the answer is already out; can't switch providers
+                    raise
+                continue
+            except BaseException:
+                # Consumer went away mid-stream
+                health.release()
+                _observe(provider, "cancelled", start)
+                raise
+            health.record_success(_observe(provider, "ok", start))
+            await self._store(query, provider, "".join(parts))
+            return
+        FALLBACKS.labels("llm_stub").inc()
+        yield self._stub(query)
+
+    def _stub(self, query: str) -> str:
         # Fallback to stub responses
         if "president of france" in query.lower():
             return "The president of France is Emmanuel Macron."
         return "(stub) LLM response not available. Set OPENROUTER_API_KEY, OPENAI_API_KEY, or GOOGLE_API_KEY to enable real answers."
+
+
+def _observe(provider: LLMProvider, outcome: str, start: float) -> float:
+    """Record one provider attempt; returns its duration."""
+    elapsed = time.perf_counter() - start
+    PROVIDER_SECONDS.labels(provider.name, outcome).observe(elapsed)
+    if outcome == "error":
+        PROVIDER_ERRORS.labels(provider.name).inc()
+    return elapsed
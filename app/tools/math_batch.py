@@ -0,0 +1,190 @@
+"""Vectorized batch evaluation for the math tool.
+
+Expressions use the same AST whitelist as ``MathTool`` (``_ALLOWED_NODES`` /
+``_OPERATORS``) plus names for declared variables, and are evaluated with
+NumPy over whole arrays of variable values at once. Without variables, many
+expressions are evaluated one by one with the exact (big-int) ``MathTool``.
+
+Vectorized results are float64 (bitwise and shift operators work on int64),
+so they follow IEEE / fixed-width semantics rather than Python big integers;
+non-finite values are reported as ``null``.
+"""
+from __future__ import annotations
+
+import ast
+import json
+import math
+from typing import Any, Callable, Iterator, Mapping, Sequence
+
+import numpy as np
+
+from app.config import get_settings
+from .math_tool import MathTool, _ALLOWED_NODES, _OPERATORS
+
+_INT_OPERATORS = {ast.LShift, ast.RShift, ast.BitOr, ast.BitAnd, ast.BitXor}
+
+_Vectorized = Callable[[Mapping[str, np.ndarray]], np.ndarray]
+
+
+def _normalize(expr: str) -> str:
+    return expr.replace("×", "*").replace("∗", "*").strip()
+
+
+def compile_vectorized(expr: str, names: Sequence[str]) -> _Vectorized:
+    """Compile ``expr`` into a function of {name: array} -> array."""
+    try:
+        tree = ast.parse(_normalize(expr), mode="eval")
+    except (SyntaxError, RecursionError):
+        raise ValueError(f"Invalid expression: {expr!r}")
+    allowed_names = set(names)
+    for child in ast.walk(tree):
+        if isinstance(child, ast.Name):
+            if child.id not in allowed_names:
+                raise ValueError(f"Unknown variable {child.id!r} in {expr!r}")
+        elif type(child) not in _ALLOWED_NODES:
+            raise ValueError(f"Disallowed expression: {expr!r}")
+    return _compile(tree.body)
+
+
+def _compile(node: ast.AST) -> _Vectorized:
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError("Disallowed expression")
+        try:
+            value = np.float64(node.value)
+        except OverflowError:  # an int literal beyond float range
+            raise ValueError("Number too large") from None
+        return lambda env: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda env: env[name]
+    if isinstance(node, ast.BinOp):
+        op_type = type(node.op)
+        if op_type not in _OPERATORS:
+            raise ValueError("Operator not allowed")
+        op = _OPERATORS[op_type]
+        left, right = _compile(node.left), _compile(node.right)
+        if op_type in _INT_OPERATORS:
+            return lambda env: op(
+                np.asarray(left(env)).astype(np.int64), np.asarray(right(env)).astype(np.int64),
+            ).astype(np.float64)
+        return lambda env: op(left(env), right(env))
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile(node.operand)
+        if isinstance(node.op, ast.UAdd):
+            return lambda env: +operand(env)
+        if isinstance(node.op, ast.USub):
+            return lambda env: -operand(env)
+    raise ValueError("Unsupported expression")
+
+
+def materialize(values: Sequence[float] | Mapping[str, float], max_points: int) -> np.ndarray:
+    """Array from an explicit list or a ``{start, stop, step}`` range."""
+    if isinstance(values, Mapping):
+        start, stop, step = float(values["start"]), float(values["stop"]), float(values.get("step", 1))
+        if step == 0:
+            raise ValueError("Range step must be non-zero")
+        try:
+            count = max(0, math.ceil((stop - start) / step))
+        except (OverflowError, ValueError):  # inf / nan bounds, or a step too small to count
+            raise ValueError("Range must be finite") from None
+        if count > max_points:
+            raise ValueError(f"Too many points ({count} > {max_points})")
+        return start + step * np.arange(count, dtype=np.float64)
+    if len(values) > max_points:
+        raise ValueError(f"Too many points ({len(values)} > {max_points})")
+    return np.asarray(values, dtype=np.float64)
+
+
+def _json_values(array: np.ndarray) -> list[Any]:
+    out: list[Any] = array.tolist()
+    if not np.isfinite(array).all():
+        out = [v if math.isfinite(v) else None for v in out]
+    elif (np.abs(array) < 2 ** 53).all() and (array == np.floor(array)).all():
+        out = array.astype(np.int64).tolist()
+    return out
+
+
+class BatchPlan:
+    """Validated batch: compiled expressions and broadcast variable arrays.
+
+    Building the plan raises ``ValueError`` for bad input, so the HTTP layer
+    can answer 400 before streaming starts.
+    """
+
+    def __init__(
+        self,
+        expressions: Sequence[str],
+        variables: Mapping[str, Sequence[float] | Mapping[str, float]] | None = None,
+        chunk_size: int | None = None,
+    ):
+        settings = get_settings()
+        if not expressions:
+            raise ValueError("No expressions given")
+        if len(expressions) > settings.math_batch_max_expressions:
+            raise ValueError(f"Too many expressions (max {settings.math_batch_max_expressions})")
+        self.expressions = list(expressions)
+        self.chunk_size = max(1, min(chunk_size or settings.math_batch_chunk_size, settings.math_batch_max_points))
+        self.variables = {
+            name: materialize(values, settings.math_batch_max_points)
+            for name, values in (variables or {}).items()
+        }
+        if self.variables:
+            lengths = {len(a) for a in self.variables.values() if len(a) != 1}
+            if len(lengths) > 1:
+                raise ValueError("Variable arrays must have equal length (or length 1)")
+            self.points = lengths.pop() if lengths else 1
+            if self.points * len(self.expressions) > settings.math_batch_max_points:
+                raise ValueError(f"Too many points (max {settings.math_batch_max_points})")
+            self.compiled = [compile_vectorized(e, list(self.variables)) for e in self.expressions]
+        else:
+            self.points = 1
+            self.compiled = []
+
+    def lines(self) -> Iterator[str]:
+        """NDJSON lines: one per chunk, then a summary line."""
+        if self.compiled:
+            yield from self._vectorized_lines()
+        else:
+            yield from self._scalar_lines()
+        yield json.dumps({"done": True, "expressions": len(self.expressions), "points": self.points}) + "\n"
+
+    def _vectorized_lines(self) -> Iterator[str]:
+        with np.errstate(all="ignore"):
+            for index, (expr, fn) in enumerate(zip(self.expressions, self.compiled)):
+                result = np.broadcast_to(np.asarray(fn(self.variables), dtype=np.float64), (self.points,))
+                for offset in range(0, self.points, self.chunk_size):
+                    chunk = result[offset:offset + self.chunk_size]
+                    yield json.dumps({
+                        "index": index,
+                        "expression": expr,
+                        "offset": offset,
+                        "results": _json_values(chunk),
+                    }) + "\n"
+
+    def _scalar_lines(self) -> Iterator[str]:
+        tool = _scalar_tool()
+        for offset in range(0, len(self.expressions), self.chunk_size):
+            results: list[str | None] = []
+            errors: dict[str, str] = {}
+            for i, expr in enumerate(self.expressions[offset:offset + self.chunk_size], start=offset):
+                try:
+                    results.append(tool.evaluate(_normalize(expr)))
+                except (ValueError, OverflowError) as e:
+                    results.append(None)
+                    errors[str(i)] = str(e)
+            yield json.dumps({
+                "offset": offset,
+                "results": results,
+                **({"errors": errors} if errors else {}),
+            }) + "\n"
+
+
+_tool: MathTool | None = None
+
+
+def _scalar_tool() -> MathTool:
+    global _tool
+    if _tool is None:
+        _tool = MathTool()
+    return _tool
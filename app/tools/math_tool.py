@@ -1,8 +1,11 @@
 import ast
 import operator
-from typing import Any
+import time
+from functools import lru_cache
+from typing import Any, Callable
 
 from .base import Tool
+from app.config import get_settings
 
 _ALLOWED_NODES = {
     ast.Expression,
@@ -42,19 +45,147 @@ _OPERATORS = {
     ast.BitXor: operator.xor,
 }
 
+class _Budget:
+    """Resource limits for one evaluation, checked before each operation."""
+
+    __slots__ = ("max_exponent", "max_shift", "max_bits", "deadline")
+
+    def __init__(self, max_exponent: int, max_shift: int, max_bits: int, timeout: float):
+        self.max_exponent = max_exponent
+        self.max_shift = max_shift
+        self.max_bits = max_bits
+        self.deadline = time.perf_counter() + timeout
+
+    def tick(self) -> None:
+        if time.perf_counter() > self.deadline:
+            raise ValueError("Math evaluation exceeded time budget")
+
+    def check_bits(self, bits: int) -> None:
+        if bits > self.max_bits:
+            raise ValueError(f"Result too large (over {self.max_bits} bits)")
+
+
+def _pow(b: _Budget, x, y):
+    if isinstance(x, int) and isinstance(y, int) and y > 0 and abs(x) > 1:
+        if y > b.max_exponent:
+            raise ValueError(f"Exponent too large (max {b.max_exponent})")
+        b.check_bits((abs(x).bit_length() - 1) * y)
+    return x ** y
+
+
+def _mul(b: _Budget, x, y):
+    if isinstance(x, int) and isinstance(y, int):
+        b.check_bits(x.bit_length() + y.bit_length() - 1)
+    return x * y
+
+
+def _lshift(b: _Budget, x, y):
+    if isinstance(y, int) and y > b.max_shift:
+        raise ValueError(f"Shift too large (max {b.max_shift})")
+    if isinstance(x, int) and isinstance(y, int):
+        b.check_bits(x.bit_length() + y)
+    return x << y
+
+
+# Operators that can blow up get pre-checked; the rest cannot grow results
+# by more than a bit.
+_CHECKED = {
+    ast.Pow: _pow,
+    ast.Mult: _mul,
+    ast.LShift: _lshift,
+}
+
+_Compiled = Callable[[_Budget], Any]
+
+
+def _compile(node: ast.AST) -> _Compiled:
+    """Turn a whitelisted AST into nested closures (done once per expression)."""
+    if isinstance(node, ast.Expression):
+        return _compile(node.body)
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError("Disallowed expression")
+        return lambda b: value
+    if isinstance(node, ast.BinOp):
+        op_type = type(node.op)
+        if op_type not in _OPERATORS:
+            raise ValueError("Operator not allowed")
+        left, right = _compile(node.left), _compile(node.right)
+        checked = _CHECKED.get(op_type)
+        if checked is not None:
+            def binop(b: _Budget):
+                x, y = left(b), right(b)
+                b.tick()
+                return checked(b, x, y)
+        else:
+            plain = _OPERATORS[op_type]
+
+            def binop(b: _Budget):
+                x, y = left(b), right(b)
+                b.tick()
+                return plain(x, y)
+        return binop
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile(node.operand)
+        if isinstance(node.op, ast.UAdd):
+            return lambda b: +operand(b)
+        if isinstance(node.op, ast.USub):
+            return lambda b: -operand(b)
+    raise ValueError("Unsupported expression")
+
+
 class MathTool(Tool):
     name = "math"
     description = "Evaluates simple math expressions like '2 + 2 * 5' safely."
+    execution = "inline"  # TOOL_EXECUTION=math=process moves big-integer work off the loop
+
+    def __init__(self):
+        # Compiled closures are reused for repeated expressions
+        self._compile_cached = lru_cache(maxsize=get_settings().math_cache_size)(self._compile_expression)
 
     async def run(self, query: str) -> Any:
+        return self.run_sync(query)
+
+    def run_sync(self, query: str) -> Any:
         expr = self._extract_expression(query)
         if expr is None:
             raise ValueError("No math expression detected")
-        tree = ast.parse(expr, mode="eval")
+        return self.evaluate(expr)
+
+    def evaluate(self, expr: str) -> str:
+        """Evaluate a normalized expression under the configured limits."""
+        settings = get_settings()
+        if len(expr) > settings.math_max_length:
+            raise ValueError(f"Expression too long (max {settings.math_max_length} characters)")
+        compiled = self._compile_cached(" ".join(expr.split()))
+        budget = _Budget(
+            max_exponent=settings.math_max_exponent,
+            max_shift=settings.math_max_shift,
+            max_bits=settings.math_max_result_bits,
+            timeout=settings.math_timeout,
+        )
+        try:
+            result = compiled(budget)
+        except ZeroDivisionError:
+            raise ValueError("Division by zero")
+        except (OverflowError, TypeError) as e:
+            raise ValueError(f"Invalid math operation: {e}")
+        if isinstance(result, int):
+            budget.check_bits(result.bit_length())
+        return str(result)
+
+    def _compile_expression(self, expr: str) -> _Compiled:
+        try:
+            tree = ast.parse(expr, mode="eval")
+        except (SyntaxError, RecursionError, MemoryError):
+            raise ValueError("Invalid expression")
         if not self._is_allowed(tree):
             raise ValueError("Disallowed expression")
-        result = self._eval(tree.body)
-        return str(result)
+        try:
+            return _compile(tree)
+        except RecursionError:
+            raise ValueError("Expression too deeply nested")
 
     def _extract_expression(self, query: str) -> str | None:
         # Normalize common multiplication notations
@@ -78,21 +209,3 @@ class MathTool(Tool):
             if type(child) not in _ALLOWED_NODES:
                 return False
         return True
-
-    def _eval(self, node: ast.AST):
-        if isinstance(node, ast.Constant):
-            return node.value
-        if isinstance(node, ast.Num): 
-            return node.n
-        if isinstance(node, ast.BinOp):
-            op_type = type(node.op)
-            if op_type not in _OPERATORS:
-                raise ValueError("Operator not allowed")
-            return _OPERATORS[op_type](self._eval(node.left), self._eval(node.right))
-        if isinstance(node, ast.UnaryOp):
-            operand = self._eval(node.operand)
-            if isinstance(node.op, ast.UAdd):
-                return +operand
-            if isinstance(node.op, ast.USub):
-                return -operand
-        raise ValueError("Unsupported expression")
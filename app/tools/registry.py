@@ -0,0 +1,461 @@
+"""Tool discovery and per-tool execution policies.
+
+Tools come from three places, later ones replacing earlier ones of the same
+name:
+
+- the built-in ``math``, ``weather`` and ``llm`` tools;
+- ``TOOLS``: comma-separated ``module:attr`` specs (a ``Tool`` subclass,
+  instance or zero-argument factory);
+- installed packages exposing the same kind of object under the
+  ``simple_tool_router.tools`` entry-point group (``TOOL_ENTRY_POINTS``).
+
+Each tool declares how it runs (``Tool.execution``, overridable per tool with
+``TOOL_EXECUTION=math=process,...``):
+
+- ``inline``: ``await tool.run`` on the event loop (async I/O tools).
+- ``thread``: ``tool.run_sync`` in a shared thread pool (blocking I/O, or C
+  code that releases the GIL). Threads can't be killed, so a call past
+  ``TOOL_HARD_TIMEOUT`` is abandoned rather than stopped.
+- ``process``: ``tool.run_sync`` in a shared pool of worker processes (CPU-bound
+  pure-Python work), so it uses other cores instead of stalling the loop.
+  A call past ``TOOL_HARD_TIMEOUT`` gets its worker killed. Workers are
+  recycled after ``TOOL_PROCESS_MAX_TASKS`` calls. Each worker builds its own
+  instance from the tool's class, so process tools must be constructible
+  without arguments.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import os
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from importlib.metadata import entry_points
+from typing import Any, AsyncIterator, Iterable
+
+from app.admission import DeadlineExceeded, ToolTimeout, remaining
+from app.config import get_settings
+from app.metrics import DEADLINE_EXCEEDED, TOOL_TIMEOUTS
+from app.tools.base import Tool
+
+logger = logging.getLogger(__name__)
+
+INLINE, THREAD, PROCESS = "inline", "thread", "process"
+POLICIES = (INLINE, THREAD, PROCESS)
+
+BUILTIN_TOOLS = (
+    "app.tools.math_tool:MathTool",
+    "app.tools.weather_tool:WeatherTool",
+    "app.tools.llm_tool:LLMTool",
+)
+ENTRY_POINT_GROUP = "simple_tool_router.tools"
+
+
+def tool_spec(tool: Tool) -> str:
+    cls = type(tool)
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _instantiate(obj: Any, origin: str) -> Tool:
+    if isinstance(obj, Tool):
+        return obj
+    if callable(obj):
+        obj = obj()
+    if not isinstance(obj, Tool):
+        raise TypeError(f"{origin} is not a Tool")
+    return obj
+
+
+def load_tool(spec: str) -> Tool:
+    """Build a tool from ``module:attr`` (class, instance or factory)."""
+    module_name, _, attr = spec.strip().partition(":")
+    if not module_name or not attr:
+        raise ValueError(f"Tool spec {spec!r} should look like 'package.module:ToolClass'")
+    obj: Any = importlib.import_module(module_name)
+    for part in attr.split("."):
+        obj = getattr(obj, part)
+    return _instantiate(obj, spec)
+
+
+def discover_tools(extra: str = "", use_entry_points: bool = True) -> list[Tool]:
+    tools = [load_tool(spec) for spec in BUILTIN_TOOLS]
+    tools += [load_tool(spec) for spec in extra.split(",") if spec.strip()]
+    if use_entry_points:
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                tools.append(_instantiate(ep.load(), f"entry point {ep.name!r}"))
+            except Exception:
+                # A broken plugin shouldn't take the built-in tools down with it
+                logger.exception("Skipping tool entry point %r", ep.name)
+    return tools
+
+
+def parse_policies(value: str) -> dict[str, str]:
+    """``"math=process,weather=inline"`` -> {tool: policy}."""
+    policies = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, policy = item.partition("=")
+        policy = policy.strip().lower()
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown execution policy {policy!r} for tool {name.strip()!r} (expected {', '.join(POLICIES)})")
+        policies[name.strip()] = policy
+    return policies
+
+
+# -- worker process side ------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _worker_tool(spec: str) -> Tool:
+    return load_tool(spec)
+
+
+def _run_in_worker(spec: str, query: str) -> Any:
+    return _worker_tool(spec).run_sync(query)
+
+
+def _load_in_worker(spec: str) -> None:
+    _worker_tool(spec)
+
+
+def _report_pid(pids: Any) -> None:
+    """Pool initializer: tell the parent which process to kill on a hard timeout."""
+    pids.put(os.getpid())
+
+
+# -- executors ----------------------------------------------------------------
+
+class ToolExecutor(ABC):
+    policy: str
+
+    def __init__(self):
+        self.calls = 0
+        self.timeouts = 0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {"calls": self.calls, "timeouts": self.timeouts}
+
+    @abstractmethod
+    async def run(self, tool: Tool, query: str, deadline: float | None) -> Any:
+        ...
+
+    async def start(self, tools: Iterable[Tool]) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InlineExecutor(ToolExecutor):
+    policy = INLINE
+
+    async def run(self, tool, query, deadline):
+        self.calls += 1
+        return await tool.run_until(query, deadline)
+
+
+class _PoolExecutor(ToolExecutor):
+    """Runs ``run_sync`` in a concurrent.futures pool under a hard timeout.
+
+    At most ``workers`` calls are handed to the pool at once; the rest wait
+    here, so the hard timeout only counts time spent running.
+    """
+
+    def __init__(self, workers: int, hard_timeout: float):
+        super().__init__()
+        self.workers = workers
+        self.hard_timeout = hard_timeout
+        self._pool: Executor | None = None
+        self._slots: dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}  # per loop (tests run several)
+
+    @abstractmethod
+    def _new_pool(self) -> Executor:
+        ...
+
+    @abstractmethod
+    def _submit(self, pool: Executor, tool: Tool, query: str) -> Future:
+        ...
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            self._pool = self._new_pool()
+        return self._pool
+
+    def _on_timeout(self, pool: Executor) -> None:
+        pass
+
+    def _on_broken(self, pool: Executor) -> None:
+        if pool is self._pool:
+            self._pool = None
+
+    @asynccontextmanager
+    async def _slot(self, tool: Tool, deadline: float | None) -> AsyncIterator[None]:
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            self._slots = {l: s for l, s in self._slots.items() if not l.is_closed()}
+            slots = self._slots[loop] = asyncio.Semaphore(self.workers)
+        try:
+            async with asyncio.timeout(remaining(deadline)):
+                await slots.acquire()
+        except TimeoutError:
+            DEADLINE_EXCEEDED.labels("tool").inc()
+            raise DeadlineExceeded("Deadline exceeded waiting for a tool worker", tool.name) from None
+        try:
+            yield
+        finally:
+            slots.release()
+
+    async def _call(self, tool: Tool, query: str, deadline: float | None) -> Any:
+        async with self._slot(tool, deadline):
+            return await self._call_now(tool, query, deadline)
+
+    async def _call_now(self, tool: Tool, query: str, deadline: float | None) -> Any:
+        left = remaining(deadline)
+        if left is not None and left <= 0:
+            DEADLINE_EXCEEDED.labels("tool").inc()
+            raise DeadlineExceeded("Deadline exceeded before tool", tool.name)
+        timeout = self.hard_timeout if left is None else min(left, self.hard_timeout)
+        pool = self._get_pool()
+        self.calls += 1
+        future = self._submit(pool, tool, query)
+        try:
+            async with asyncio.timeout(timeout):
+                return await asyncio.wrap_future(future)
+        except TimeoutError:
+            future.cancel()
+            self.timeouts += 1
+            self._on_timeout(pool)
+            if left is not None and left <= self.hard_timeout:
+                DEADLINE_EXCEEDED.labels("tool").inc()
+                raise DeadlineExceeded("Deadline exceeded during tool", tool.name) from None
+            TOOL_TIMEOUTS.labels(tool.name).inc()
+            raise ToolTimeout(f"Tool {tool.name!r} exceeded {self.hard_timeout:g}s", tool.name) from None
+        except BrokenExecutor:
+            self._on_broken(pool)
+            raise
+        except asyncio.CancelledError:
+            future.cancel()  # only stops calls still queued; a running one finishes in its worker
+            raise
+
+    async def run(self, tool, query, deadline):
+        return await self._call(tool, query, deadline)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class ThreadExecutor(_PoolExecutor):
+    policy = THREAD
+
+    def __init__(self, workers: int, hard_timeout: float):
+        super().__init__(workers, hard_timeout)
+        self.abandoned = 0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {**super().stats, "workers": self.workers, "abandoned": self.abandoned}
+
+    def _new_pool(self) -> Executor:
+        return ThreadPoolExecutor(self.workers, thread_name_prefix="tool")
+
+    def _submit(self, pool, tool, query):
+        return pool.submit(tool.run_sync, query)
+
+    def _on_timeout(self, pool):
+        self.abandoned += 1  # the thread keeps running until run_sync returns
+
+
+class ProcessExecutor(_PoolExecutor):
+    policy = PROCESS
+
+    def __init__(self, workers: int, hard_timeout: float, max_tasks: int = 0):
+        super().__init__(workers, hard_timeout)
+        self.max_tasks = max_tasks
+        self.restarts = 0
+        self.retries = 0
+        self._pids: dict[Executor, tuple[Any, set[int]]] = {}  # pool -> (queue workers report on, pids)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            **super().stats,
+            "workers": self.workers,
+            "max_tasks_per_worker": self.max_tasks,
+            "restarts": self.restarts,
+            "retries": self.retries,
+        }
+
+    def _new_pool(self) -> Executor:
+        context = multiprocessing.get_context("spawn")  # fork is unsafe with the server's threads
+        pids = context.SimpleQueue()
+        pool = ProcessPoolExecutor(
+            self.workers,
+            mp_context=context,
+            initializer=_report_pid,
+            initargs=(pids,),
+            max_tasks_per_child=self.max_tasks or None,
+        )
+        self._pids[pool] = (pids, set())
+        return pool
+
+    def _worker_pids(self, pool: Executor) -> set[int]:
+        queue, pids = self._pids[pool]
+        while not queue.empty():  # drained per call, so recycled workers never fill the pipe
+            pids.add(queue.get())
+        return pids
+
+    def _submit(self, pool, tool, query):
+        self._worker_pids(pool)
+        return pool.submit(_run_in_worker, tool_spec(tool), query)
+
+    def _on_timeout(self, pool):
+        self._kill(pool)
+
+    def _on_broken(self, pool):
+        self._kill(pool)  # a worker crashed (or was killed): replace the pool
+
+    def _kill(self, pool: Executor) -> None:
+        """Kill ``pool``'s workers (a stuck call can't be interrupted otherwise)."""
+        if pool is not self._pool:
+            return  # already replaced
+        self._pool = None
+        self.restarts += 1
+        # Workers report their pid when they start (recycled ones too); only
+        # live children of ours are killed, so a reused pid is never hit
+        reported = self._worker_pids(pool)
+        self._pids.pop(pool)[0].close()
+        for process in multiprocessing.active_children():
+            if process.pid in reported:
+                process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, tool, query, deadline):
+        try:
+            return await self._call(tool, query, deadline)
+        except BrokenProcessPool:
+            # Another call's timeout (or a crashed worker) took the pool down
+            # with this call in it: retry once on a fresh pool.
+            self.retries += 1
+            return await self._call(tool, query, deadline)
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        for queue, _ in self._pids.values():
+            queue.close()
+        self._pids.clear()
+
+    async def start(self, tools):
+        """Spawn every worker and import the tools there ahead of the first call."""
+        specs = sorted({tool_spec(tool) for tool in tools})
+        if not specs:
+            return
+        pool = self._get_pool()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, _load_in_worker, specs[i % len(specs)])
+            for i in range(max(self.workers, len(specs)))
+        ))
+
+
+# -- registry -----------------------------------------------------------------
+
+class ToolRegistry:
+    """Tools by name (``tools`` is a plain dict), each run under its policy."""
+
+    def __init__(
+        self,
+        tools: Iterable[Tool] = (),
+        policies: dict[str, str] | None = None,
+        thread_workers: int = 8,
+        process_workers: int = 0,
+        process_max_tasks: int = 0,
+        hard_timeout: float = 5.0,
+    ):
+        self.tools: dict[str, Tool] = {}
+        self.policies = dict(policies or {})
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers or os.cpu_count() or 1
+        self.process_max_tasks = process_max_tasks
+        self.hard_timeout = hard_timeout
+        self._executors: dict[str, ToolExecutor] = {}
+        for tool in tools:
+            self.register(tool)
+
+    def register(self, tool: Tool, policy: str | None = None) -> None:
+        if policy is not None:
+            self.policies[tool.name] = policy
+        self.tools[tool.name] = tool
+        self._check(tool)
+
+    def _check(self, tool: Tool) -> None:
+        policy = self.policy(tool.name)
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown execution policy {policy!r} for tool {tool.name!r}")
+        if policy != INLINE and type(tool).run_sync is Tool.run_sync:
+            raise ValueError(f"Tool {tool.name!r} has no run_sync, so it can only run inline")
+
+    def policy(self, name: str) -> str:
+        return self.policies.get(name) or getattr(self.tools[name], "execution", INLINE)
+
+    def executor(self, policy: str) -> ToolExecutor:
+        executor = self._executors.get(policy)
+        if executor is None:
+            if policy == THREAD:
+                executor = ThreadExecutor(self.thread_workers, self.hard_timeout)
+            elif policy == PROCESS:
+                executor = ProcessExecutor(self.process_workers, self.hard_timeout, self.process_max_tasks)
+            else:
+                executor = InlineExecutor()
+            self._executors[policy] = executor
+        return executor
+
+    async def run(self, name: str, query: str, deadline: float | None = None) -> Any:
+        """Run tool ``name`` under its policy, within ``deadline`` (monotonic)."""
+        tool = self.tools[name]
+        return await self.executor(self.policy(name)).run(tool, query, deadline)
+
+    async def start(self) -> None:
+        """Start the pools the registered tools use (warmup)."""
+        by_policy: dict[str, list[Tool]] = {}
+        for name, tool in self.tools.items():
+            by_policy.setdefault(self.policy(name), []).append(tool)
+        for policy, tools in by_policy.items():
+            await self.executor(policy).start(tools)
+
+    def shutdown(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown()
+        self._executors.clear()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "tools": {
+                name: {"policy": self.policy(name), "class": tool_spec(tool), "description": tool.description}
+                for name, tool in self.tools.items()
+            },
+            "executors": {policy: executor.stats for policy, executor in self._executors.items()},
+        }
+
+
+@lru_cache
+def get_registry() -> ToolRegistry:
+    settings = get_settings()
+    return ToolRegistry(
+        discover_tools(settings.tools, settings.tool_entry_points),
+        policies=parse_policies(settings.tool_execution),
+        thread_workers=settings.tool_thread_workers,
+        process_workers=settings.tool_process_workers,
+        process_max_tasks=settings.tool_process_max_tasks,
+        hard_timeout=settings.tool_hard_timeout,
+    )
@@ -1,9 +1,32 @@
+from functools import lru_cache
 from typing import Any
-import asyncio
-import requests
 
 from .base import Tool
+from app.cache import TTLCache
+from app.cache_backend import get_shared_backend
 from app.config import get_settings
+from app.gazetteer import lookup_city
+from app.http_client import http_client
+from app.metrics import WEATHER_UPSTREAM
+from app.weather_batcher import get_weather_batcher
+
+
+@lru_cache
+def get_weather_cache() -> TTLCache:
+    """Process-wide cache of raw OpenWeatherMap payloads."""
+    settings = get_settings()
+    return TTLCache(
+        maxsize=settings.weather_cache_size,
+        ttl=settings.weather_cache_ttl,
+        stale_ttl=settings.weather_cache_stale_ttl,
+        name="weather",
+        shared=get_shared_backend(),
+    )
+
+
+def _cache_key(city: str, units: str) -> tuple[str, str]:
+    return " ".join(city.casefold().split()), units
+
 
 class WeatherTool(Tool):
     name = "weather"
@@ -15,22 +38,21 @@ class WeatherTool(Tool):
             city = get_settings().weather_default_city
         
         settings = get_settings()
-
-        params = {
-            "q": city.strip(),
-            "appid": settings.openweather_api_key,
-            "units": settings.weather_units,
-        }
+        city = city.strip()
+        # Misspelled / aliased names become the gazetteer's name ("Pariss",
+        # "München" -> Paris, Munich), so they share cache entries too
+        match = lookup_city(city)
+        if match is not None:
+            city = match.name
+        batcher = get_weather_batcher() if match is not None else None
 
         try:
-            response = await asyncio.to_thread(
-                requests.get,
-                "https://api.openweathermap.org/data/2.5/weather",
-                params=params,
-                timeout=10,
+            # Cached per (city, units); concurrent misses share one upstream call,
+            # and with WEATHER_BATCH_ENABLED one group call with other cities
+            data = await get_weather_cache().get_or_fetch(
+                _cache_key(city, settings.weather_units),
+                (lambda: batcher.fetch(match.id)) if batcher else (lambda: self._fetch(city)),
             )
-            response.raise_for_status()
-            data = response.json()
             temp = data.get("main", {}).get("temp", "?")
             description = data.get("weather", [{}])[0].get("description", "unknown conditions")
             country = data.get("sys", {}).get("country", "")
@@ -41,3 +63,17 @@ class WeatherTool(Tool):
         except Exception:
             # Fallback for missing API key or network issues
             return f"I don't have access to weather data right now, but you asked about {city}."
+
+    async def _fetch(self, city: str) -> dict:
+        settings = get_settings()
+        params = {
+            "q": city,
+            "appid": settings.openweather_api_key,
+            "units": settings.weather_units,
+        }
+        WEATHER_UPSTREAM.labels("weather").inc()
+        # Pooled keep-alive client shared across requests (app lifespan)
+        async with http_client() as client:
+            response = await client.get(settings.openweather_url, params=params)
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,100 @@
+"""Micro-batch concurrent weather lookups into OpenWeatherMap group requests.
+
+City ids (from ``app.gazetteer``) requested within ``window`` seconds are
+collected, up to ``max_size``. They are then fetched with one
+``/data/2.5/group?id=1,2,3`` call, which returns the same payload per city as
+``/data/2.5/weather``. Each waiting lookup gets its own city's payload back.
+A city missing from the answer, or a failed group call, fails only the
+lookups it covers. ``WeatherTool`` then falls back as for a single fetch.
+"""
+from __future__ import annotations
+
+import asyncio
+from functools import lru_cache
+from typing import Any
+
+from app.config import get_settings
+from app.http_client import http_client
+from app.metrics import WEATHER_UPSTREAM
+
+GROUP_LIMIT = 20  # ids per group request accepted by OpenWeatherMap
+
+
+class WeatherBatcher:
+    """Collect concurrent city-id lookups and resolve them with group requests."""
+
+    def __init__(self, url: str, window: float = 0.01, max_size: int = GROUP_LIMIT):
+        self.url = url
+        self.window = window
+        self.max_size = max(1, min(max_size, GROUP_LIMIT))
+        self._pending: dict[int, list[asyncio.Future]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.lookups = 0
+
+    async def fetch(self, city_id: int) -> dict:
+        """Current weather payload for ``city_id``."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(city_id, []).append(future)
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.ensure_future(self._resolve(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: dict[int, list[asyncio.Future]]) -> None:
+        self.batches += 1
+        self.lookups += sum(len(futures) for futures in batch.values())
+        try:
+            payloads = await self._fetch_group(list(batch))
+        except Exception as e:
+            payloads, error = {}, e
+        else:
+            error = None
+        for city_id, futures in batch.items():
+            payload = payloads.get(city_id)
+            for future in futures:
+                if future.done():
+                    continue
+                if payload is not None:
+                    future.set_result(payload)
+                else:
+                    future.set_exception(error or LookupError(f"no weather for city id {city_id}"))
+
+    async def _fetch_group(self, city_ids: list[int]) -> dict[int, dict[str, Any]]:
+        settings = get_settings()
+        params = {
+            "id": ",".join(map(str, city_ids)),
+            "appid": settings.openweather_api_key,
+            "units": settings.weather_units,
+        }
+        WEATHER_UPSTREAM.labels("group").inc()
+        async with http_client() as client:
+            response = await client.get(self.url, params=params)
+        response.raise_for_status()
+        return {item["id"]: item for item in response.json().get("list", []) if "id" in item}
+
+
+@lru_cache
+def get_weather_batcher() -> WeatherBatcher | None:
+    """Shared collector (only when WEATHER_BATCH_ENABLED)."""
+    settings = get_settings()
+    if not settings.weather_batch_enabled:
+        return None
+    return WeatherBatcher(
+        settings.openweather_group_url,
+        window=settings.weather_batch_window_ms / 1000,
+        max_size=settings.weather_batch_max_size,
+    )
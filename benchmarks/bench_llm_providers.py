@@ -0,0 +1,87 @@
+"""LLMTool latency against flaky providers: plain fallback vs breaker vs hedging.
+
+Two local OpenAI-compatible stubs stand in for OpenRouter and OpenAI. The
+primary has a latency tail (``--tail-rate`` of requests take ``--tail-latency``)
+and an ``--error-rate``; the backup is steady. Prints p50/p95/p99 per mode.
+Usage::
+
+    python -m benchmarks.bench_llm_providers --requests 300 --concurrency 16
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.config import get_settings
+from app.providers import OpenAICompatibleProvider
+from app.tools.llm_tool import LLMTool
+from benchmarks.stubs import StubServer, chat_completions_app
+
+
+def _provider(name: str, url: str, timeout: float) -> OpenAICompatibleProvider:
+    return OpenAICompatibleProvider(
+        name=name, api_key="stub", model="stub-model", base_url=url + "/v1", timeout=timeout, max_retries=0,
+    )
+
+
+async def _run(urls: list[str], total: int, concurrency: int, timeout: float) -> list[float]:
+    providers = [_provider(name, url, timeout) for name, url in zip(["openrouter", "openai"], urls)]
+    tool = LLMTool(providers=providers)
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one():
+        async with sem:
+            start = time.perf_counter()
+            await tool.run("Tell me a fun fact about space.")
+            latencies.append(time.perf_counter() - start)
+
+    try:
+        await asyncio.gather(*(one() for _ in range(total)))
+    finally:
+        for provider in providers:
+            await provider.aclose()
+    return latencies
+
+
+def _report(label: str, latencies: list[float]) -> None:
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{label:<22} p50 {q[49] * 1000:7.1f} ms  p95 {q[94] * 1000:7.1f} ms  p99 {q[98] * 1000:7.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="typical upstream latency (s)")
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--tail-latency", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=2.0, help="per-provider timeout (s)")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    settings.llm_hedge_delay = args.latency * 3
+    primary = dict(latency=args.latency, tail_rate=args.tail_rate, tail_latency=args.tail_latency,
+                   error_rate=args.error_rate)
+    with StubServer(chat_completions_app, **primary) as flaky, \
+            StubServer(chat_completions_app, latency=args.latency) as steady, \
+            StubServer(chat_completions_app, latency=args.timeout * 2) as down:
+        urls = [flaky.url, steady.url]
+        run = lambda target: asyncio.run(_run(target, args.requests, args.concurrency, args.timeout))  # noqa: E731
+
+        settings.llm_breaker_failures = 10 ** 9
+        _report("fallback only", run(urls))
+        settings.llm_hedge_enabled = True
+        _report("hedged", run(urls))
+        settings.llm_hedge_enabled = False
+
+        _report("primary down", run([down.url, steady.url]))
+        settings.llm_breaker_failures = 5
+        _report("primary down+breaker", run([down.url, steady.url]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Per-query routing cost and latency: one prompt per query vs micro-batching.
+
+Both modes run against the same fake chat model. It charges ``--latency``
+seconds per call plus ``--per-token-ms`` per prompt token, and serves at most
+``--provider-concurrency`` calls at once (a typical provider rate limit).
+Prompt tokens are estimated as characters / 4. Usage::
+
+    python -m benchmarks.bench_routing_batcher --queries 200 --concurrency 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from app.agent import TOOL_DESCRIPTIONS, TOOLS_MAP, ToolSelection, build_prompt_template
+from app.routing_batcher import RoutingBatcher
+from app.rules import heuristic_tool
+
+SAMPLE = [
+    "What's the weather like today in Paris?", "What is 42 * 7?", "Who wrote Hamlet?",
+    "Temperature in Tokyo", "calculate 10 + 5 / 2", "Tell me a fun fact about space.",
+]
+
+
+class FakeModel:
+    def __init__(self, latency: float, per_token_ms: float, concurrency: int):
+        self.latency = latency
+        self.per_token = per_token_ms / 1000
+        self.limit = asyncio.Semaphore(concurrency)
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    async def __call__(self, prompt_value):
+        prompt = prompt_value.to_string()
+        tokens = len(prompt) // 4
+        self.calls += 1
+        self.prompt_tokens += tokens
+        async with self.limit:
+            await asyncio.sleep(self.latency + tokens * self.per_token)
+        numbered = re.findall(r"^\d+\. (.*)$", prompt, re.MULTILINE)
+        if numbered:
+            questions = [json.loads(q) for q in numbered]
+            return json.dumps([
+                {"index": i, "tool": heuristic_tool(q), "input": q} for i, q in enumerate(questions, start=1)
+            ])
+        question = prompt.rsplit("User question:", 1)[-1].strip()
+        return json.dumps({"tool": heuristic_tool(question), "input": question})
+
+
+async def _drive(route, total: int, concurrency: int) -> list[float]:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int):
+        async with sem:
+            start = time.perf_counter()
+            await route(SAMPLE[i % len(SAMPLE)])
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies
+
+
+async def run(args) -> dict[str, dict[str, float]]:
+    report = {}
+    for mode in ("per_query", "batched"):
+        model = FakeModel(args.latency, args.per_token_ms, args.provider_concurrency)
+        if mode == "per_query":
+            prompt, parser = build_prompt_template()
+            chain = prompt | RunnableLambda(model) | parser
+
+            async def route(q, chain=chain):
+                return await chain.ainvoke({"tools": TOOL_DESCRIPTIONS, "input": q})
+        else:
+            batcher = RoutingBatcher(
+                RunnableLambda(model), TOOL_DESCRIPTIONS, ToolSelection, list(TOOLS_MAP),
+                window=args.window_ms / 1000, max_size=args.max_batch,
+            )
+            route = batcher.route
+        start = time.perf_counter()
+        latencies = sorted(await _drive(route, args.queries, args.concurrency))
+        elapsed = time.perf_counter() - start
+        report[mode] = {
+            "llm_calls": model.calls,
+            "prompt_tokens_per_query": round(model.prompt_tokens / args.queries, 1),
+            "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+            "throughput_qps": round(args.queries / elapsed, 1),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent client queries")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake model base latency (s)")
+    parser.add_argument("--per-token-ms", type=float, default=0.05)
+    parser.add_argument("--provider-concurrency", type=int, default=8)
+    parser.add_argument("--window-ms", type=float, default=10.0)
+    parser.add_argument("--max-batch", type=int, default=16)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
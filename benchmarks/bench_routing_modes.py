@@ -0,0 +1,123 @@
+"""Routing tokens and latency: PydanticOutputParser prompt vs native structured output.
+
+Routes a fixed query set through each ``ROUTING_MODE`` chain as built by
+``app.agent``. The fake chat model counts tokens (characters / 4) for what a
+provider would bill: the prompt, the schema sent alongside it in the native
+modes (response schema or function declaration), and the output. It charges
+``--latency`` seconds per call, ``--per-token-ms`` per input token and
+``--per-output-token-ms`` per output token. ``local_ms`` is the rest of the
+time: prompt formatting and parsing. Usage::
+
+    python -m benchmarks.bench_routing_modes --latency 0.3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.agent import STRUCTURED_ROUTING_METHODS, TOOL_DESCRIPTIONS, build_prompt_template, build_structured_router
+from app.decompose import split_intents
+from app.local_router import extract_argument
+from app.rules import heuristic_tool
+
+QUERIES = [
+    "What is 42 * 7?", "calculate 10 + 5 / 2", "What's 2**8?",
+    "What's the weather like today in Paris?", "Temperature in Tokyo", "Is it raining in New York?",
+    "Who wrote Hamlet?", "Tell me a fun fact about space.", "What is the capital of Australia?",
+    "weather in Paris and Tokyo, and what is 17*23",
+]
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def _plan(question: str) -> dict:
+    calls = split_intents(question)
+    if calls is None:
+        tool = heuristic_tool(question)
+        calls = [(tool, extract_argument(tool, question) or question)]
+    return {"calls": [{"tool": tool, "input": text} for tool, text in calls]}
+
+
+class FakeModel:
+    """Token-counting stand-in for the Gemini router model."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.input_tokens = 0
+        self.schema_tokens = 0
+        self.output_tokens = 0
+        self.model_seconds = 0.0
+
+    async def _answer(self, prompt: str, schema_tokens: int = 0) -> str:
+        question = prompt.rsplit("User question:", 1)[-1].rsplit("Human:", 1)[-1].strip()
+        output = json.dumps(_plan(question))
+        tokens_in, tokens_out = _tokens(prompt) + schema_tokens, _tokens(output)
+        self.input_tokens += tokens_in
+        self.schema_tokens += schema_tokens
+        self.output_tokens += tokens_out
+        delay = self.args.latency + (tokens_in * self.args.per_token_ms + tokens_out * self.args.per_output_token_ms) / 1000
+        self.model_seconds += delay
+        await asyncio.sleep(delay)
+        return output
+
+    async def __call__(self, prompt_value) -> str:
+        return await self._answer(prompt_value.to_string())
+
+    def with_structured_output(self, schema, method: str = "json_schema"):
+        if method == "function_calling":
+            sent = convert_to_openai_tool(schema)
+        else:
+            sent = schema.model_json_schema()
+        schema_tokens = _tokens(json.dumps(sent))
+
+        async def structured(prompt_value):
+            return schema.model_validate_json(await self._answer(prompt_value.to_string(), schema_tokens))
+
+        return RunnableLambda(structured)
+
+
+async def run(mode: str, args: argparse.Namespace) -> dict[str, float]:
+    model = FakeModel(args)
+    if mode == "parser":
+        prompt, parser = build_prompt_template()
+        chain = prompt | RunnableLambda(model) | parser
+    else:
+        chain = build_structured_router(model, mode)
+    latencies: list[float] = []
+    correct = 0
+    for query in QUERIES:
+        start = time.perf_counter()
+        plan = await chain.ainvoke({"tools": TOOL_DESCRIPTIONS, "input": query})
+        latencies.append(time.perf_counter() - start)
+        correct += [[c.tool, c.input] for c in plan.calls] == [list(c.values()) for c in _plan(query)["calls"]]
+    n = len(QUERIES)
+    return {
+        "input_tokens_per_query": round(model.input_tokens / n, 1),
+        "of_which_schema": round(model.schema_tokens / n, 1),
+        "output_tokens_per_query": round(model.output_tokens / n, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "local_ms": round((sum(latencies) - model.model_seconds) / n * 1000, 3),
+        "plans_correct": f"{correct}/{n}",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="fake model base latency (s)")
+    parser.add_argument("--per-token-ms", type=float, default=0.05, help="per input token")
+    parser.add_argument("--per-output-token-ms", type=float, default=2.0, help="per output token")
+    args = parser.parse_args()
+    report = {mode: asyncio.run(run(mode, args)) for mode in ("parser", *STRUCTURED_ROUTING_METHODS)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Per-query cost of the compiled rule engine vs. the old keyword scan.
+
+The old heuristic ran ``any(k in q for k in keywords)``, which is linear in
+the number of keywords. The compiled engine searches the query once per keyword
+group, so its cost should stay flat as the keyword lists grow. Usage::
+
+    python -m benchmarks.bench_rule_engine
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import timeit
+
+from app.rules import KeywordGroup, Rule, RuleEngine, RuleTable
+
+QUERIES = [
+    "What's the weather like today in Paris?",
+    "What is 42 * 7?",
+    "Tell me a fun fact about space.",
+    "Wie ist das Wetter in Berlin morgen früh?",
+]
+
+
+def _keywords(n: int, rng: random.Random) -> list[str]:
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))) for _ in range(n)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'keywords':>9} {'naive us/query':>15} {'compiled us/query':>18}")
+    for size in args.sizes:
+        keywords = _keywords(size, rng)
+        engine = RuleEngine(RuleTable(rules=[Rule(tool="weather", groups=[KeywordGroup(keywords=keywords)])]))
+
+        def naive():
+            for q in QUERIES:
+                ql = q.lower()
+                any(k in ql for k in keywords)
+
+        def compiled():
+            for q in QUERIES:
+                engine.match(q)
+
+        n = max(1, args.repeat * 10 // size)
+        naive_us = timeit.timeit(naive, number=n) / (n * len(QUERIES)) * 1e6
+        compiled_us = timeit.timeit(compiled, number=args.repeat) / (args.repeat * len(QUERIES)) * 1e6
+        print(f"{size:>9} {naive_us:>15.2f} {compiled_us:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
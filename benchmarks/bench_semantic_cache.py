@@ -0,0 +1,42 @@
+"""Semantic cache quality and speed on a labelled paraphrase set.
+
+For each threshold, caches the first question of every paraphrase group and
+probes with the rest plus near-miss questions (same wording, different
+answer). Reports hit rate, false-hit rate and lookup latency as JSON, with the
+index padded by ``--distractors`` unrelated entries. Usage::
+
+    python -m benchmarks.bench_semantic_cache --distractors 4000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+
+from app.semantic_cache import evaluate
+
+DEFAULT_DATA = os.path.join(os.path.dirname(__file__), "data", "paraphrases.jsonl")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DEFAULT_DATA, help="JSONL rows of {query, group}")
+    parser.add_argument("--thresholds", default="0.6,0.7,0.8,0.9")
+    parser.add_argument("--distractors", type=int, default=4000)
+    parser.add_argument("--dim", type=int, default=512)
+    args = parser.parse_args()
+
+    with open(args.data, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    distractors = [f"tell me about item {i} in catalogue section {i % 97}" for i in range(args.distractors)]
+    report = evaluate(
+        rows,
+        [float(t) for t in args.thresholds.split(",")],
+        dim=args.dim,
+        distractors=distractors,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
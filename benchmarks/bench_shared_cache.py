@@ -0,0 +1,120 @@
+"""Upstream calls and latency with per-worker caches vs one shared Redis cache.
+
+Simulates ``--workers`` uvicorn workers, each with its own ``LLMTool`` and
+answer cache. Requests for ``--questions`` distinct questions arrive in
+bursts, spread round-robin over the workers, against a stub provider with
+``--latency`` seconds per call. With ``memory`` every worker asks upstream
+itself. With ``redis`` the workers share answers and one ``compute_once``
+per question. Without ``--redis-url`` a fakeredis TCP server (own process)
+stands in; it is far slower than Redis, so read latencies as an upper bound.
+Usage::
+
+    python -m benchmarks.bench_shared_cache --workers 8 --questions 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import socket
+import statistics
+import time
+
+from app.answer_cache import AnswerCache
+from app.cache_backend import RedisBackend
+from app.providers import LLMProvider
+from app.tools.llm_tool import LLMTool
+
+
+class StubProvider(LLMProvider):
+    name = "stub"
+    model = "stub-model"
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def complete(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return f"answer {self.calls}"
+
+
+def _serve_fake_redis(port: int) -> None:
+    from fakeredis import TcpFakeServer
+
+    TcpFakeServer(("127.0.0.1", port)).serve_forever()
+
+
+def fake_redis_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    multiprocessing.get_context("spawn").Process(target=_serve_fake_redis, args=(port,), daemon=True).start()
+    deadline = time.monotonic() + 15
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return f"redis://127.0.0.1:{port}/0"
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+async def run(backend: str, args: argparse.Namespace, redis_url: str) -> dict[str, float]:
+    provider = StubProvider(args.latency)
+    prefix = f"bench:{time.time_ns()}:"
+    shared = [
+        RedisBackend(url=redis_url, prefix=prefix, max_connections=args.connections) if backend == "redis" else None
+        for _ in range(args.workers)
+    ]
+    tools = [
+        LLMTool(providers=[provider], cache=AnswerCache(ttl=600, memory_bytes=1 << 20, shared=s))
+        for s in shared
+    ]
+    latencies: list[float] = []
+
+    async def ask(i: int, question: int) -> None:
+        start = time.perf_counter()
+        await tools[i % args.workers].run(f"Tell me a fact about topic {question}.")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for burst in range(args.bursts):
+        await asyncio.gather(*(
+            ask(burst * args.questions + q * args.workers + w, q)
+            for q in range(args.questions) for w in range(args.workers)
+        ))
+    elapsed = time.perf_counter() - start
+    for s in shared:
+        if s is not None:
+            await s.close()
+    latencies.sort()
+    return {
+        "upstream_calls": provider.calls,
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--bursts", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--connections", type=int, default=8, help="Redis pool size per worker")
+    parser.add_argument("--redis-url", default=None, help="real Redis; default: local fakeredis server")
+    args = parser.parse_args()
+
+    redis_url = args.redis_url or fake_redis_url()
+    report = {backend: asyncio.run(run(backend, args, redis_url)) for backend in ("memory", "redis")}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Latency with and without speculative tool execution during agent routing.
+
+Runs ``agentic_select_and_run`` over a mixed query set with a fake routing
+agent (``--agent-latency`` seconds). For a ``--disagree`` share of weather
+routes, the agent picks a different city than the heuristics extract. The weather tool
+is a stub taking ``--tool-latency`` seconds. Reports mean latency and the
+speculation hit / miss / wasted-seconds counters per mode. Usage::
+
+    python -m benchmarks.bench_speculation --requests 200 --agent-latency 0.3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
+from app.agent import TOOLS_MAP, ToolSelection, agentic_select_and_run
+from app.config import get_settings
+from app.local_router import extract_argument
+from app.routing_cache import get_routing_cache
+from app.rules import heuristic_tool
+
+QUERIES = [
+    "What's the weather in Paris?", "Temperature in Tokyo", "What is 42 * 7?", "calculate 10 + 5 / 2",
+    "Who wrote Hamlet?", "How's the weather in Jakarta?", "What is 2 ** 10?", "Tell me a fun fact about space.",
+]
+
+
+class FakeAgent:
+    def __init__(self, latency: float, disagree: float):
+        self.latency = latency
+        self.disagree = disagree
+        self.weather_routes = 0
+
+    async def ainvoke(self, inputs: dict) -> ToolSelection:
+        await asyncio.sleep(self.latency)
+        query = inputs["input"]
+        tool = heuristic_tool(query)
+        argument = extract_argument(tool, query) or query
+        if tool == "weather":
+            # exactly ``disagree`` of the weather routes, spread evenly
+            self.weather_routes += 1
+            if int(self.weather_routes * self.disagree) > int((self.weather_routes - 1) * self.disagree):
+                argument = "Berlin"
+        return ToolSelection(tool=tool, input=argument)
+
+
+def _counters() -> dict[str, float]:
+    return {
+        name: sum(
+            REGISTRY.get_sample_value(metric, {"tool": tool, **labels}) or 0.0
+            for tool in ("math", "weather")
+        )
+        for name, metric, labels in (
+            ("hits", "router_speculations_total", {"outcome": "hit"}),
+            ("misses", "router_speculations_total", {"outcome": "miss"}),
+            ("wasted_s", "router_speculation_wasted_seconds_total", {}),
+            ("saved_s", "router_speculation_saved_seconds_total", {}),
+        )
+    }
+
+
+async def run(speculative: bool, args: argparse.Namespace) -> dict[str, float]:
+    get_settings().speculative_execution = speculative
+    agent = FakeAgent(args.agent_latency, args.disagree)
+
+    async def weather(city: str) -> str:
+        await asyncio.sleep(args.tool_latency)
+        return f"sunny in {city}"
+
+    async def llm(question: str) -> str:
+        await asyncio.sleep(args.tool_latency)
+        return "stub answer"
+
+    before = _counters()
+    latencies = []
+    with patch("app.agent._get_agent", return_value=agent), \
+            patch.object(TOOLS_MAP["weather"], "run", weather), patch.object(TOOLS_MAP["llm"], "run", llm):
+        for i in range(args.requests):
+            get_routing_cache().clear()  # every request pays for routing
+            start = time.perf_counter()
+            await agentic_select_and_run(QUERIES[i % len(QUERIES)])
+            latencies.append(time.perf_counter() - start)
+    after = _counters()
+    return {
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        **{name: round(after[name] - before[name], 3) for name in after},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--agent-latency", type=float, default=0.3)
+    parser.add_argument("--tool-latency", type=float, default=0.15, help="weather / llm stub latency (s)")
+    parser.add_argument("--disagree", type=float, default=0.2, help="share of weather routes the agent changes")
+    args = parser.parse_args()
+    report = {mode: asyncio.run(run(mode == "speculative", args)) for mode in ("off", "speculative")}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
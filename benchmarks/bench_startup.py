@@ -0,0 +1,83 @@
+"""Cold start: import time, time to ready, and first vs second request latency.
+
+Import time is measured in fresh interpreters (``import app.main``). Each
+cold start spawns the service (uvicorn, own process) against local stub
+Gemini / OpenAI / OpenWeatherMap servers, waits for ``/health/ready``, then
+sends the same kind of ``llm`` question twice. Without warmup the first request
+builds the routing chain and provider clients. With ``STARTUP_WARMUP=true``
+that happens before readiness. Usage::
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+
+import httpx
+
+from benchmarks.loadtest import service_app
+from benchmarks.stubs import StubServer, chat_completions_app, gemini_app, weather_app
+
+_IMPORT = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def import_seconds(runs: int) -> list[float]:
+    return [
+        float(subprocess.run([sys.executable, "-c", _IMPORT], capture_output=True, text=True, check=True).stdout)
+        for _ in range(runs)
+    ]
+
+
+def cold_start(env: dict[str, str]) -> dict[str, float]:
+    start = time.perf_counter()
+    with StubServer(service_app, lifespan="on", startup_timeout=60, env=env) as service:
+        live = time.perf_counter() - start
+        with httpx.Client(base_url=service.url, timeout=60) as client:
+            while client.get("/health/ready").status_code != 200:
+                time.sleep(0.005)
+            ready = time.perf_counter() - start
+            latencies = []
+            for i in range(2):
+                t = time.perf_counter()
+                client.post("/query", json={"query": f"Tell me a fun fact about number {i}.", "stream": False})
+                latencies.append(time.perf_counter() - t)
+    return {"live": live, "ready": ready, "first": latencies[0], "second": latencies[1]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = import_seconds(args.runs)
+    print(f"import app.main: median {statistics.median(imports) * 1000:7.1f} ms  min {min(imports) * 1000:7.1f} ms")
+
+    with ExitStack() as stack:
+        gemini = stack.enter_context(StubServer(gemini_app, latency=0.01))
+        openai = stack.enter_context(StubServer(chat_completions_app, latency=0.01))
+        weather = stack.enter_context(StubServer(weather_app, latency=0.01))
+        env = {
+            "GOOGLE_API_KEY": "stub",
+            "GEMINI_BASE_URL": gemini.url,
+            "OPENAI_API_KEY": "stub",
+            "OPENAI_BASE_URL": openai.url + "/v1",
+            "OPENWEATHER_API_KEY": "stub",
+            "OPENWEATHER_URL": weather.url + "/data/2.5/weather",
+            "ROUTING_CACHE_TTL": "0",
+            "ANSWER_CACHE_TTL": "0",
+        }
+        print(f"{'warmup':<8}{'live':>10}{'ready':>10}{'1st req':>10}{'2nd req':>10}  (ms, medians)")
+        for warm in (False, True):
+            runs = [cold_start({**env, "STARTUP_WARMUP": str(warm).lower()}) for _ in range(args.runs)]
+            row = {k: statistics.median(r[k] for r in runs) * 1000 for k in runs[0]}
+            print(f"{'on' if warm else 'off':<8}{row['live']:>10.1f}{row['ready']:>10.1f}"
+                  f"{row['first']:>10.1f}{row['second']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Math tool throughput and event loop lag under each execution policy.
+
+``--concurrency`` clients send ``math`` calls through the tool registry for
+``--duration`` seconds, while a probe measures how late a 5 ms timer fires on
+the event loop (what every other request on the worker would wait). Two
+workloads: ``light`` (typical expressions, default limits) and ``heavy``
+(big-integer powers, with ``MATH_MAX_*`` raised to allow them). Usage::
+
+    python -m benchmarks.bench_tool_execution --concurrency 16 --duration 3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+WORKLOADS = {
+    "light": ["12345 * 6789", "2 ** 64 - 1", "(17 + 4) * 3 / 7", "2 ** 9999 % 1000003"],
+    "heavy": ["7 ** 300000 % 1000003", "3 ** 400000 % 999983", "(11 ** 250000 + 1) % 998244353"],
+}
+HEAVY_LIMITS = {"MATH_MAX_EXPONENT": "1000000", "MATH_MAX_RESULT_BITS": "2000000", "MATH_TIMEOUT": "5"}
+
+
+def _pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+async def run(policy: str, expressions: list[str], args: argparse.Namespace) -> dict[str, float]:
+    from app.tools.math_tool import MathTool
+    from app.tools.registry import ToolRegistry
+
+    registry = ToolRegistry([MathTool()], policies={"math": policy}, thread_workers=args.workers,
+                            process_workers=args.workers, hard_timeout=30)
+    await registry.start()
+    latencies: list[float] = []
+    lags: list[float] = []
+    stop = time.perf_counter() + args.duration
+
+    async def client(i: int) -> None:
+        n = i
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            await registry.run("math", expressions[n % len(expressions)])
+            latencies.append(time.perf_counter() - start)
+            n += 1
+            await asyncio.sleep(0)  # let the probe in even when the tool never yields
+
+    async def probe() -> None:
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - start - 0.005)
+
+    start = time.perf_counter()
+    await asyncio.gather(probe(), *(client(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    registry.shutdown()
+    return {
+        "calls_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(_pct(latencies, 0.99) * 1000, 3),
+        "loop_lag_p99_ms": round(_pct(lags, 0.99) * 1000, 3),
+        "loop_lag_max_ms": round(max(lags, default=0.0) * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="thread / process pool size")
+    parser.add_argument("--workloads", default="light,heavy")
+    parser.add_argument("--policies", default="inline,thread,process")
+    args = parser.parse_args()
+
+    from app.config import get_settings
+
+    report = {}
+    for workload in args.workloads.split(","):
+        # Process workers read the limits from the environment when they start
+        for key, value in HEAVY_LIMITS.items():
+            if workload == "heavy":
+                os.environ[key] = value
+            else:
+                os.environ.pop(key, None)
+        get_settings.cache_clear()
+        report[workload] = {
+            policy: asyncio.run(run(policy, WORKLOADS[workload], args)) for policy in args.policies.split(",")
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
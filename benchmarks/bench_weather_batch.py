@@ -0,0 +1,85 @@
+"""Upstream requests and latency: one call per city vs OpenWeatherMap group calls.
+
+``--concurrency`` clients ask for the weather in the bundled gazetteer's
+cities (cache disabled, so every lookup goes upstream) against a local stub
+with ``--latency`` seconds per request. ``single`` is one ``/weather`` call
+per lookup. ``group`` sets ``WEATHER_BATCH_ENABLED`` and merges lookups
+made within ``--window-ms`` into ``/group`` calls. Usage::
+
+    python -m benchmarks.bench_weather_batch --requests 2000 --concurrency 64
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.config import get_settings
+from app.gazetteer import BUNDLED_INDEX, read_source
+from app.http_client import close_http_client, start_http_client
+from app.metrics import WEATHER_UPSTREAM
+from app.tools.weather_tool import WeatherTool, get_weather_cache
+from app.weather_batcher import get_weather_batcher
+from benchmarks.stubs import StubServer, weather_app
+
+CITIES = [name for _, name, _, _ in read_source(BUNDLED_INDEX.with_name("cities.csv"))]
+
+
+def _upstream() -> float:
+    return sum(WEATHER_UPSTREAM.labels(endpoint)._value.get() for endpoint in ("weather", "group"))
+
+
+async def run(mode: str, args: argparse.Namespace) -> dict[str, float]:
+    settings = get_settings()
+    settings.weather_batch_enabled = mode == "group"
+    settings.weather_batch_window_ms = args.window_ms
+    get_weather_batcher.cache_clear()
+    get_weather_cache().ttl = 0  # every lookup goes upstream
+    tool = WeatherTool()
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int) -> None:
+        async with sem:
+            start = time.perf_counter()
+            result = await tool.run(CITIES[i % len(CITIES)])
+            latencies.append(time.perf_counter() - start)
+            assert "°C" in result, result
+
+    await start_http_client()
+    before = _upstream()
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+    finally:
+        await close_http_client()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "upstream_requests": int(_upstream() - before),
+        "req_per_s": round(args.requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub upstream latency (s)")
+    parser.add_argument("--window-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with StubServer(weather_app, latency=args.latency) as server:
+        settings = get_settings()
+        settings.openweather_url = server.url + "/data/2.5/weather"
+        settings.openweather_group_url = server.url + "/data/2.5/group"
+        report = {mode: asyncio.run(run(mode, args)) for mode in ("single", "group")}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
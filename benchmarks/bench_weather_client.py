@@ -0,0 +1,77 @@
+"""Weather lookup throughput: requests + to_thread vs pooled httpx client.
+
+Runs both strategies against a local OpenWeatherMap stub and prints
+requests/sec for each. Usage::
+
+    python -m benchmarks.bench_weather_client --requests 2000 --concurrency 64
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import requests
+
+from app.config import get_settings
+from app.http_client import close_http_client, start_http_client
+from app.tools.weather_tool import WeatherTool, get_weather_cache
+from benchmarks.stubs import StubServer, weather_app
+
+
+async def _drive(call, total: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with sem:
+            await call(f"City{i % 32}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def bench_before(url: str, total: int, concurrency: int) -> float:
+    """Previous implementation: one thread + fresh connection per lookup."""
+
+    async def call(city: str):
+        response = await asyncio.to_thread(
+            requests.get, url, params={"q": city, "units": "metric"}, timeout=10,
+        )
+        response.raise_for_status()
+        response.json()
+
+    return await _drive(call, total, concurrency)
+
+
+async def bench_after(total: int, concurrency: int) -> float:
+    """Current implementation: WeatherTool over the shared pooled client."""
+    tool = WeatherTool()
+    get_weather_cache().ttl = 0  # measure the client, not the cache
+    await start_http_client()
+    try:
+        return await _drive(tool.run, total, concurrency)
+    finally:
+        await close_http_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub upstream latency (s)")
+    args = parser.parse_args()
+
+    with StubServer(weather_app, latency=args.latency) as server:
+        url = server.url + "/data/2.5/weather"
+        get_settings().openweather_url = url
+
+        before = asyncio.run(bench_before(url, args.requests, args.concurrency))
+        after = asyncio.run(bench_after(args.requests, args.concurrency))
+
+    print(f"requests+to_thread : {before:8.1f} req/s")
+    print(f"pooled httpx client: {after:8.1f} req/s  ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""End-to-end load test of the service against local stub upstreams.
+
+Starts stub Gemini, OpenAI-compatible and OpenWeatherMap servers with the
+chosen latency / error profile, then the app itself (uvicorn, own process)
+pointed at them with API keys set, so the agent, LLM and weather paths run for
+real. Each scenario keeps ``--concurrency`` requests in flight for
+``--duration`` seconds and reports:
+
+- rps, errors and end-to-end latency p50/p95/p99 (ms)
+- ttfb: time to the first response byte (first NDJSON event / ws reply)
+- client_loop_lag: how late the driver's own timer fired (a high value means
+  the driver, not the service, is the bottleneck)
+- server_loop_lag: the service's ``router_event_loop_lag_seconds`` histogram
+  over the scenario (mean and bucket upper bound of p99)
+
+Output is JSON with sorted keys, meant to be saved per commit and diffed::
+
+    python -m benchmarks.loadtest --concurrency 32 --duration 10 --out before.json
+    python -m benchmarks.loadtest --profile flaky --scenarios query,ws
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+from typing import Any, Awaitable, Callable
+
+import httpx
+import websockets
+
+from benchmarks.stubs import StubServer, chat_completions_app, gemini_app, weather_app
+
+# Upstream behaviour per profile (applied to all three stubs; flaky adds a tail and errors)
+PROFILES: dict[str, dict[str, float]] = {
+    "fast": {"latency": 0.005},
+    "realistic": {"latency": 0.15, "tail_rate": 0.02, "tail_latency": 1.0, "token_latency": 0.005},
+    "flaky": {"latency": 0.15, "tail_rate": 0.1, "tail_latency": 2.0, "error_rate": 0.1, "token_latency": 0.005},
+}
+SCENARIOS = ("query", "query_batch", "math_batch", "ws")
+CITIES = ["Paris", "Tokyo", "Jakarta", "London", "Lagos", "Lima", "Oslo", "Seoul"]
+
+
+def service_app(env: dict[str, str]):
+    """App factory for the child process: configure through env, then import."""
+    os.environ.update(env)
+    from app.main import app
+    return app
+
+
+def _queries() -> itertools.cycle:
+    # Distinct text per request so, with caches on, repeats are still realistic
+    return itertools.cycle([
+        "What is {i} * 7?",
+        "What's the weather like today in {city}?",
+        "Tell me a fun fact about number {i}.",
+    ])
+
+
+def _query(templates: itertools.cycle, i: int) -> str:
+    return next(templates).format(i=i, city=CITIES[i % len(CITIES)])
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+    return {"p50": at(0.5), "p95": at(0.95), "p99": at(0.99), "max": round(ordered[-1] * 1000, 2)}
+
+
+async def _loop_lag(samples: list[float], interval: float = 0.01) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+
+_LAG_LINE = re.compile(r'^router_event_loop_lag_seconds_(bucket|sum|count)(?:\{le="([^"]+)"\})? (\S+)$', re.MULTILINE)
+
+
+async def _server_lag(client: httpx.AsyncClient) -> dict[str, Any]:
+    text = (await client.get("/metrics")).text
+    snapshot: dict[str, Any] = {"buckets": {}}
+    for kind, le, value in _LAG_LINE.findall(text):
+        if kind == "bucket":
+            snapshot["buckets"][float(le)] = float(value)
+        else:
+            snapshot[kind] = float(value)
+    return snapshot
+
+
+def _lag_delta(before: dict[str, Any], after: dict[str, Any]) -> dict[str, float]:
+    count = after.get("count", 0) - before.get("count", 0)
+    if count <= 0:
+        return {}
+    p99 = float("inf")
+    for le in sorted(after["buckets"]):
+        if after["buckets"][le] - before["buckets"].get(le, 0) >= 0.99 * count:
+            p99 = le
+            break
+    return {
+        "mean": round((after.get("sum", 0) - before.get("sum", 0)) / count * 1000, 3),
+        "p99_le": p99 * 1000 if p99 != float("inf") else None,  # type: ignore[dict-item]
+    }
+
+
+class Scenario:
+    """One request shape; ``request`` returns (ttfb, latency) in seconds."""
+
+    def __init__(self, base_url: str, args: argparse.Namespace):
+        self.base_url = base_url
+        self.args = args
+        self.templates = _queries()
+        self.counter = itertools.count()
+
+    async def setup(self, client: httpx.AsyncClient) -> None:
+        pass
+
+    async def teardown(self) -> None:
+        pass
+
+    async def request(self, client: httpx.AsyncClient) -> tuple[float, float]:
+        raise NotImplementedError
+
+    async def _stream(self, client: httpx.AsyncClient, path: str, body: dict) -> tuple[float, float]:
+        start = time.perf_counter()
+        ttfb = None
+        async with client.stream("POST", path, json=body) as response:
+            response.raise_for_status()
+            async for _ in response.aiter_bytes():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+        return ttfb or 0.0, time.perf_counter() - start
+
+
+class QueryScenario(Scenario):
+    async def request(self, client):
+        query = _query(self.templates, next(self.counter))
+        return await self._stream(client, "/query", {"query": query, "stream": True})
+
+
+class QueryBatchScenario(Scenario):
+    async def request(self, client):
+        queries = [_query(self.templates, next(self.counter)) for _ in range(self.args.batch_size)]
+        return await self._stream(client, "/query/batch", {"queries": queries})
+
+
+class MathBatchScenario(Scenario):
+    async def request(self, client):
+        return await self._stream(client, "/math/batch", {
+            "expression": "x * x + 2 * x + 1",
+            "variables": {"x": {"start": 0, "stop": self.args.math_points}},
+        })
+
+
+class WebSocketScenario(Scenario):
+    """Pipelined: ``--ws-connections`` sockets share the concurrency."""
+
+    async def setup(self, client):
+        url = self.base_url.replace("http", "ws", 1) + "/ws"
+        self.sockets = [await websockets.connect(url) for _ in range(self.args.ws_connections)]
+        self.waiters: dict[int, asyncio.Future] = {}
+        self.readers = [asyncio.create_task(self._read(ws)) for ws in self.sockets]
+
+    async def _read(self, ws) -> None:
+        async for message in ws:
+            reply = json.loads(message)
+            future = self.waiters.pop(reply.get("id"), None)
+            if future is not None and not future.done():
+                if "error" in reply:
+                    future.set_exception(RuntimeError(reply["error"]))
+                else:
+                    future.set_result(None)
+
+    async def teardown(self):
+        for task in self.readers:
+            task.cancel()
+        for ws in self.sockets:
+            await ws.close()
+
+    async def request(self, client):
+        i = next(self.counter)
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[i] = future
+        start = time.perf_counter()
+        await self.sockets[i % len(self.sockets)].send(json.dumps({"id": i, "query": _query(self.templates, i)}))
+        await future
+        elapsed = time.perf_counter() - start
+        return elapsed, elapsed
+
+
+SCENARIO_TYPES: dict[str, type[Scenario]] = {
+    "query": QueryScenario,
+    "query_batch": QueryBatchScenario,
+    "math_batch": MathBatchScenario,
+    "ws": WebSocketScenario,
+}
+
+
+async def run_scenario(name: str, base_url: str, args: argparse.Namespace) -> dict[str, Any]:
+    scenario = SCENARIO_TYPES[name](base_url, args)
+    limits = httpx.Limits(max_connections=args.concurrency + 2, max_keepalive_connections=args.concurrency + 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await scenario.setup(client)
+        latencies: list[float] = []
+        ttfbs: list[float] = []
+        errors = 0
+        measuring = False
+        lag: list[float] = []
+        lag_task = asyncio.create_task(_loop_lag(lag))
+
+        async def worker(deadline: float, request: Callable[[], Awaitable[tuple[float, float]]]) -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                try:
+                    ttfb, latency = await request()
+                except Exception:
+                    if measuring:
+                        errors += 1
+                    continue
+                if measuring:
+                    ttfbs.append(ttfb)
+                    latencies.append(latency)
+
+        try:
+            # Warm-up: connections, lazy clients, JIT-ish caches; not recorded
+            end = time.perf_counter() + args.warmup
+            await asyncio.gather(*(worker(end, lambda: scenario.request(client)) for _ in range(args.concurrency)))
+            lag.clear()
+            before = await _server_lag(client)
+            measuring = True
+            start = time.perf_counter()
+            end = start + args.duration
+            await asyncio.gather(*(worker(end, lambda: scenario.request(client)) for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - start
+            measuring = False
+            after = await _server_lag(client)
+        finally:
+            lag_task.cancel()
+            await scenario.teardown()
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": _percentiles(latencies),
+        "ttfb_ms": _percentiles(ttfbs),
+        "client_loop_lag_ms": _percentiles(lag),
+        "server_loop_lag_ms": _lag_delta(before, after),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--batch-size", type=int, default=10, help="queries per /query/batch request")
+    parser.add_argument("--math-points", type=int, default=10_000, help="points per /math/batch request")
+    parser.add_argument("--ws-connections", type=int, default=4)
+    parser.add_argument("--caches", action="store_true", help="keep routing/answer/weather caches on")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {sorted(unknown)}")
+
+    profile = PROFILES[args.profile]
+    upstream = {k: v for k, v in profile.items() if k != "token_latency"}
+    streaming = {"token_latency": profile.get("token_latency", 0.0)}
+    with ExitStack() as stack:
+        gemini = stack.enter_context(StubServer(gemini_app, **upstream, **streaming))
+        openai = stack.enter_context(StubServer(chat_completions_app, **upstream, **streaming))
+        weather = stack.enter_context(StubServer(weather_app, **upstream))
+        env = {
+            "GOOGLE_API_KEY": "stub",
+            "GEMINI_BASE_URL": gemini.url,
+            "OPENAI_API_KEY": "stub",
+            "OPENAI_BASE_URL": openai.url + "/v1",
+            "OPENWEATHER_API_KEY": "stub",
+            "OPENWEATHER_URL": weather.url + "/data/2.5/weather",
+            "EVENT_LOOP_LAG_INTERVAL": "0.01",
+            "WS_MAX_IN_FLIGHT": str(max(1, args.concurrency // args.ws_connections)),
+            "QUERY_BATCH_CONCURRENCY": str(args.batch_size),
+        }
+        if not args.caches:
+            env.update(ROUTING_CACHE_TTL="0", ANSWER_CACHE_TTL="0", WEATHER_CACHE_TTL="0")
+        service = stack.enter_context(StubServer(service_app, lifespan="on", startup_timeout=60, env=env))
+
+        results = {name: asyncio.run(run_scenario(name, service.url, args)) for name in scenarios}
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "profile": args.profile,
+            "upstream": profile,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "batch_size": args.batch_size,
+            "math_points": args.math_points,
+            "ws_connections": args.ws_connections,
+            "caches": args.caches,
+        },
+        "scenarios": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
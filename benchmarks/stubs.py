@@ -0,0 +1,246 @@
+"""Local stand-ins for upstream APIs used by the benchmarks.
+
+Each stub is a tiny Starlette app served by uvicorn in a child process, so
+benchmarks exercise real sockets (keep-alive, handshakes) without touching
+the network and without the stub competing for the client's GIL.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing
+import random
+import re
+import socket
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _delay(latency: float, tail_rate: float, tail_latency: float) -> float:
+    return tail_latency if tail_rate and random.random() < tail_rate else latency
+
+
+def _failed(error_rate: float) -> bool:
+    return bool(error_rate) and random.random() < error_rate
+
+
+def _words(answer_tokens: int) -> list[str]:
+    return [("stub" if i == 0 else " token") for i in range(answer_tokens)]
+
+
+def weather_app(
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    tail_rate: float = 0.0,
+    tail_latency: float = 0.0,
+) -> Starlette:
+    """OpenWeatherMap-compatible ``/data/2.5/weather`` and ``/data/2.5/group`` stub."""
+
+    def payload(city: str, city_id: int = 0) -> dict:
+        return {
+            "id": city_id,
+            "name": city,
+            "main": {"temp": 21.5},
+            "weather": [{"description": "clear sky"}],
+            "sys": {"country": "XX"},
+        }
+
+    async def weather(request: Request):
+        delay = _delay(latency, tail_rate, tail_latency)
+        if delay:
+            await asyncio.sleep(delay)
+        if _failed(error_rate):
+            return JSONResponse({"cod": 500, "message": "injected error"}, status_code=500)
+        return JSONResponse(payload(request.query_params.get("q", "Nowhere")))
+
+    async def group(request: Request):
+        delay = _delay(latency, tail_rate, tail_latency)
+        if delay:
+            await asyncio.sleep(delay)
+        if _failed(error_rate):
+            return JSONResponse({"cod": 500, "message": "injected error"}, status_code=500)
+        ids = [int(i) for i in request.query_params.get("id", "").split(",") if i]
+        return JSONResponse({"cnt": len(ids), "list": [payload(f"City {i}", i) for i in ids]})
+
+    return Starlette(routes=[Route("/data/2.5/weather", weather), Route("/data/2.5/group", group)])
+
+
+def chat_completions_app(
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    tail_rate: float = 0.0,
+    tail_latency: float = 0.0,
+    answer: str = "stub answer",
+    answer_tokens: int = 20,
+    token_latency: float = 0.0,
+) -> Starlette:
+    """OpenAI-compatible ``/v1/chat/completions`` stub.
+
+    ``tail_rate`` of the requests take ``tail_latency`` instead of ``latency``.
+    With ``"stream": true`` it sends ``answer_tokens`` SSE chunks,
+    ``token_latency`` apart.
+    """
+
+    def chunk(text: str) -> str:
+        return "data: " + json.dumps({
+            "id": "cmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "stub-model",
+            "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}],
+        }) + "\n\n"
+
+    async def events():
+        for word in _words(answer_tokens):
+            if token_latency:
+                await asyncio.sleep(token_latency)
+            yield chunk(word)
+        yield "data: [DONE]\n\n"
+
+    async def completions(request: Request):
+        body = await request.json()
+        delay = _delay(latency, tail_rate, tail_latency)
+        if delay:
+            await asyncio.sleep(delay)
+        if _failed(error_rate):
+            return JSONResponse({"error": {"message": "injected error"}}, status_code=500)
+        if body.get("stream"):
+            return StreamingResponse(events(), media_type="text/event-stream")
+        return JSONResponse({
+            "id": "cmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "stub-model",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": answer},
+            }],
+        })
+
+    return Starlette(routes=[Route("/v1/chat/completions", completions, methods=["POST"])])
+
+
+def gemini_app(
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    tail_rate: float = 0.0,
+    tail_latency: float = 0.0,
+    answer_tokens: int = 20,
+    token_latency: float = 0.0,
+) -> Starlette:
+    """Gemini REST stub (``models/{model}:generateContent`` / ``:streamGenerateContent``).
+
+    Routing prompts (single or numbered batch) are answered with the keyword
+    heuristic's decision in the JSON shape the router expects, so the agent
+    path runs end to end; anything else gets a plain text answer.
+    """
+    from app.local_router import extract_argument
+    from app.rules import heuristic_tool
+
+    def decide(question: str) -> dict:
+        tool = heuristic_tool(question)
+        return {"tool": tool, "input": extract_argument(tool, question) or question}
+
+    def reply(prompt: str) -> str:
+        if "User question:" in prompt:
+            return json.dumps(decide(prompt.rsplit("User question:", 1)[1].strip()))
+        numbered = re.findall(r"^(\d+)\. (.*)$", prompt.split("Questions:", 1)[-1], re.MULTILINE)
+        if "Questions:" in prompt and numbered:
+            return json.dumps([{"index": int(i), **decide(json.loads(q))} for i, q in numbered])
+        return "".join(_words(answer_tokens))
+
+    def candidate(text: str, done: bool) -> dict:
+        payload: dict = {"candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "index": 0,
+            **({"finishReason": "STOP"} if done else {}),
+        }]}
+        if done:
+            payload["usageMetadata"] = {"promptTokenCount": 1, "candidatesTokenCount": 1, "totalTokenCount": 2}
+        return payload
+
+    async def events(text: str):
+        words = [text] if text.startswith(("{", "[")) else _words(answer_tokens)
+        for i, word in enumerate(words):
+            if token_latency:
+                await asyncio.sleep(token_latency)
+            yield "data: " + json.dumps(candidate(word, i == len(words) - 1)) + "\r\n\r\n"
+
+    async def generate(request: Request):
+        body = await request.json()
+        prompt = "".join(part.get("text", "") for c in body.get("contents", []) for part in c.get("parts", []))
+        delay = _delay(latency, tail_rate, tail_latency)
+        if delay:
+            await asyncio.sleep(delay)
+        if _failed(error_rate):
+            return JSONResponse({"error": {"code": 500, "message": "injected error", "status": "INTERNAL"}},
+                                status_code=500)
+        text = reply(prompt)
+        if request.url.path.endswith(":streamGenerateContent"):
+            return StreamingResponse(events(text), media_type="text/event-stream")
+        return JSONResponse(candidate(text, True))
+
+    return Starlette(routes=[Route("/v1beta/models/{model:path}", generate, methods=["POST"])])
+
+
+def _serve(app_factory, kwargs: dict, host: str, port: int, lifespan: str) -> None:
+    uvicorn.run(app_factory(**kwargs), host=host, port=port, log_level="warning", lifespan=lifespan)
+
+
+class StubServer:
+    """Run a stub app factory on a uvicorn child process.
+
+    Usage::
+
+        with StubServer(weather_app, latency=0.02) as server:
+            url = server.url + "/data/2.5/weather"
+    """
+
+    def __init__(
+        self,
+        app_factory,
+        host: str = "127.0.0.1",
+        port: int | None = None,
+        lifespan: str = "off",
+        startup_timeout: float = 15.0,
+        **kwargs,
+    ):
+        self.host = host
+        self.startup_timeout = startup_timeout
+        self.port = port or _free_port()
+        self._process = multiprocessing.get_context("spawn").Process(
+            target=_serve, args=(app_factory, kwargs, self.host, self.port, lifespan), daemon=True,
+        )
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self) -> "StubServer":
+        self._process.start()
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                with socket.create_connection((self.host, self.port), timeout=0.2):
+                    return self
+            except OSError:
+                if time.monotonic() > deadline or not self._process.is_alive():
+                    self.__exit__()
+                    raise RuntimeError("stub server failed to start")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.join(timeout=5)
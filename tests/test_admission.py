@@ -0,0 +1,148 @@
+"""Tests for per-tool admission control and request deadlines."""
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.admission import (
+    DeadlineExceeded, QueueFull, QueueTimeout, ToolLimiter, get_limiter, new_deadline, within_deadline,
+)
+from app.agent import TOOLS_MAP, agentic_select_and_run
+from app.answer_cache import get_answer_cache
+from app.config import get_settings
+from app.providers import LLMProvider
+from app.tools.llm_tool import LLMTool
+
+
+class SlowProvider(LLMProvider):
+    name = "slow"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.cancelled = 0
+
+    async def complete(self, prompt: str) -> str:
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"answer to {prompt}"
+
+
+@pytest.fixture
+def slow_llm(monkeypatch):
+    """Heuristic routing, a slow llm tool with 1 slot + 1 queued, fresh limiters."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "llm_max_concurrency", 1)
+    monkeypatch.setattr(settings, "llm_max_queue", 1)
+    get_limiter.cache_clear()
+    get_answer_cache().clear()
+    provider = SlowProvider(0.1)
+    with patch('app.agent._get_agent', return_value=None), \
+            patch.dict(TOOLS_MAP, {"llm": LLMTool(providers=[provider])}):
+        yield provider
+    get_limiter.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_limiter_queues_then_sheds():
+    limiter = ToolLimiter("llm", limit=1, queue_size=1)
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.slot() as queued:
+            await release.wait()
+            return queued
+
+    first = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    second = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert limiter.stats["active"] == 1 and limiter.stats["waiting"] == 1
+
+    with pytest.raises(QueueFull) as shed:
+        async with limiter.slot():
+            pass
+    assert shed.value.status_code == 429
+
+    await asyncio.sleep(0.02)
+    release.set()
+    assert await first < 0.01
+    assert await second >= 0.02
+    assert limiter.stats["admitted"] == 2 and limiter.stats["shed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_limiter_gives_up_at_deadline():
+    limiter = ToolLimiter("weather", limit=1, queue_size=10)
+    async with limiter.slot():
+        with pytest.raises(QueueTimeout) as timed_out:
+            async with limiter.slot(time.monotonic() + 0.02):
+                pass
+    assert timed_out.value.status_code == 503
+    assert limiter.stats == {**limiter.stats, "active": 0, "waiting": 0, "timed_out": 1}
+
+
+@pytest.mark.asyncio
+async def test_within_deadline_cancels_work():
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        finally:
+            cancelled.set()
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        await within_deadline(slow(), time.monotonic() + 0.02, "tool")
+    assert time.perf_counter() - start < 0.5
+    assert cancelled.is_set()
+
+
+def test_client_deadline_only_shortens(monkeypatch):
+    monkeypatch.setattr(get_settings(), "request_deadline", 1.0)
+    assert new_deadline(50) - time.monotonic() <= 0.05
+    assert 0.9 < new_deadline(5000) - time.monotonic() <= 1.0
+    monkeypatch.setattr(get_settings(), "request_deadline", 0)
+    assert new_deadline() is None
+
+
+@pytest.mark.asyncio
+async def test_llm_burst_is_shed_without_blocking_math(slow_llm):
+    burst = [asyncio.create_task(agentic_select_and_run(f"Tell me about topic {i}")) for i in range(3)]
+    math = await agentic_select_and_run("What is 6 * 7?")
+    assert math["result"] == "42"
+    assert not any(task.done() for task in burst)  # math did not wait behind the llm queue
+
+    results = await asyncio.gather(*burst, return_exceptions=True)
+    assert sum(isinstance(r, QueueFull) for r in results) == 1
+    answered = [r for r in results if isinstance(r, dict)]
+    assert len(answered) == 2
+    assert max(r["queued_ms"] for r in answered) > 50
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_tool_run(slow_llm):
+    with pytest.raises(DeadlineExceeded):
+        await agentic_select_and_run("Tell me about history", deadline=time.monotonic() + 0.02)
+    assert slow_llm.cancelled == 1
+    assert get_limiter("llm").stats["active"] == 0
+
+
+def test_query_endpoint_reports_status(slow_llm):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    response = client.post("/query", json={"query": "Tell me about history", "stream": False, "deadline_ms": 20})
+    assert response.status_code == 504
+    assert response.json()["detail"]["reason"] == "deadline"
+
+    events = client.post("/query", json={"query": "Tell me about art", "deadline_ms": 20}).text.splitlines()
+    assert '"event": "error"' in events[-1] and '"status": 504' in events[-1]
+
+    stats = client.get("/admission/stats").json()
+    assert stats["llm"]["limit"] == 1 and stats["llm"]["active"] == 0
@@ -137,3 +137,325 @@ class TestAgentCaching:
         
         # Should be the same object (cached)
         assert agent1 is agent2
+
+
+class TestStructuredRouting:
+    """Test the native structured-output routing chain (ROUTING_MODE)."""
+
+    @pytest.mark.parametrize("mode", ["parser", "json_schema", "function_calling"])
+    def test_warmup_prepares_the_router_model(self, monkeypatch, mode):
+        from langchain_core.runnables import RunnableLambda
+        from app import agent
+        from app.config import get_settings
+
+        prepared = []
+
+        class FakeChatModel(RunnableLambda):
+            def __init__(self):
+                super().__init__(lambda prompt: "{}")
+
+            def _prepare_request(self, messages):
+                prepared.append(messages)
+
+            def with_structured_output(self, schema, method):
+                return RunnableLambda(lambda prompt: None)
+
+        monkeypatch.setattr(get_settings(), "routing_mode", mode)
+        monkeypatch.setattr(agent, "_build_router_llm", FakeChatModel)
+        monkeypatch.setattr(agent, "_agent_chain", None)
+        monkeypatch.setattr(agent, "_router_llm", None)
+        agent._prepare_router()
+        assert len(prepared) == 1
+
+    def test_unknown_routing_mode_is_rejected(self):
+        from pydantic import ValidationError
+        from app.config import Settings
+
+        assert Settings(ROUTING_MODE="function_calling").routing_mode == "function_calling"
+        with pytest.raises(ValidationError, match="ROUTING_MODE"):
+            Settings(ROUTING_MODE="json-schema")
+
+    @pytest.mark.asyncio
+    async def test_minimal_prompt_and_schema_constrained_plan(self):
+        from langchain_core.runnables import RunnableLambda
+        from app.agent import TOOL_DESCRIPTIONS, ToolPlan, build_prompt_template, build_structured_router
+        from app.routing_cache import get_routing_cache
+
+        prompts = []
+
+        class FakeStructuredModel:
+            def with_structured_output(self, schema, method):
+                assert schema is ToolPlan and method == "function_calling"
+
+                async def answer(prompt_value):
+                    prompts.append(prompt_value.to_string())
+                    return ToolPlan(calls=[{"tool": "math", "input": "6 * 7"}])
+
+                return RunnableLambda(answer)
+
+        chain = build_structured_router(FakeStructuredModel(), "function_calling")
+        get_routing_cache().clear()
+        with patch('app.agent._get_agent', return_value=chain):
+            result = await agentic_select_and_run("What is six times seven?")
+        get_routing_cache().clear()
+
+        assert result["result"] == "42" and result["routed_via_agent"] is True
+        parser_prompt = build_prompt_template()[0].format(tools=TOOL_DESCRIPTIONS, input="What is six times seven?")
+        assert "six times seven" in prompts[0] and "JSON" not in prompts[0]
+        assert len(prompts[0]) < len(parser_prompt) / 3
+
+
+class TestRoutingCache:
+    """Test caching of routing decisions."""
+
+    @pytest.fixture(autouse=True)
+    def _clear_routing_cache(self):
+        from app.routing_cache import get_routing_cache
+        get_routing_cache().clear()
+        yield
+        get_routing_cache().clear()
+
+    def test_normalize_query(self):
+        from app.routing_cache import normalize_query
+
+        assert normalize_query("What is the weather in Jakarta?") == normalize_query("  what is the WEATHER in jakarta ")
+        assert normalize_query("2 + 3") != normalize_query("2 - 3")
+        assert normalize_query("What is 2.5 * 4?") == "what is 2.5 * 4"
+
+    @pytest.mark.asyncio
+    async def test_repeat_query_skips_router(self):
+        from app.agent import ToolSelection
+
+        mock_agent = MagicMock()
+
+        async def ainvoke(_):
+            return ToolSelection(tool="math", input="6 * 7")
+
+        mock_agent.ainvoke = MagicMock(side_effect=ainvoke)
+        with patch('app.agent._get_agent', return_value=mock_agent):
+            first = await agentic_select_and_run("What is 6 times 7?")
+            second = await agentic_select_and_run("what is 6 times 7")
+
+        assert mock_agent.ainvoke.call_count == 1
+        assert first["routing_cache_hit"] is False
+        assert second["routing_cache_hit"] is True
+        assert second["routed_via_agent"] is True
+        assert second["result"] == first["result"] == "42"
+
+    @pytest.mark.asyncio
+    async def test_heuristic_decisions_not_cached(self):
+        with patch('app.agent._get_agent', return_value=None):
+            await agentic_select_and_run("What is 10 + 5?")
+            result = await agentic_select_and_run("What is 10 + 5?")
+        assert result["routing_cache_hit"] is False
+
+    def test_persistence_round_trip(self, tmp_path):
+        from app.routing_cache import get_routing_cache, load_routing_cache, save_routing_cache
+
+        path = str(tmp_path / "routing.json")
+        get_routing_cache().set("weather in paris", ("weather", "Paris"))
+        assert save_routing_cache(path) == 1
+        get_routing_cache().clear()
+        assert load_routing_cache(path) == 1
+        assert get_routing_cache().get("weather in paris") == ("weather", "Paris")
+
+    def test_persistence_round_trip_multi_call(self, tmp_path):
+        import json
+        from app.routing_cache import get_routing_cache, load_routing_cache, save_routing_cache
+
+        path = tmp_path / "routing.json"
+        calls = [["weather", "Paris"], ["weather", "Tokyo"], ["math", "17*23"]]
+        get_routing_cache().clear()
+        get_routing_cache().set("weather in paris and tokyo and 17*23", calls)
+        get_routing_cache().set("weather in paris", ("weather", "Paris"))
+        assert save_routing_cache(str(path)) == 2
+        rows = {row["query"]: row for row in json.loads(path.read_text())}
+        assert rows["weather in paris and tokyo and 17*23"]["calls"] == calls
+        get_routing_cache().clear()
+        assert load_routing_cache(str(path)) == 2
+        assert get_routing_cache().get("weather in paris and tokyo and 17*23") == calls
+        assert get_routing_cache().get("weather in paris") == ("weather", "Paris")
+        get_routing_cache().clear()
+
+
+class TestBatchQueries:
+    """Test the concurrent batch stream behind /query/batch."""
+
+    @pytest.mark.asyncio
+    async def test_completion_order_and_concurrency_cap(self):
+        import json
+        from app.agent import agentic_batch_stream
+
+        in_flight = 0
+        peak = 0
+
+        async def fake_run(query, bypass_cache=False, deadline=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(float(query))
+            in_flight -= 1
+            return {"query": query, "tool_used": "math", "result": query}
+
+        with patch('app.agent.agentic_select_and_run', side_effect=fake_run):
+            lines = [json.loads(line) async for line in agentic_batch_stream(["0.05", "0.01", "0.03", "0.02"], concurrency=2)]
+
+        assert sorted(line["index"] for line in lines) == [0, 1, 2, 3]
+        assert lines[0]["index"] == 1  # fastest query first, not submission order
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_are_reported_per_query(self):
+        import json
+        from app.agent import agentic_batch_stream
+
+        lines = [json.loads(line) async for line in agentic_batch_stream(["What is 6 * 7?", "1 / 0"])]
+        by_index = {line["index"]: line for line in lines}
+        assert by_index[0]["result"] == "42"
+        assert "Division by zero" in by_index[1]["error"]
+
+    def test_batch_endpoint(self):
+        import json
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        client = TestClient(app)
+        response = client.post("/query/batch", json={"queries": ["What is 2 + 2?", "What is 3 * 3?"]})
+        assert response.status_code == 200
+        results = {json.loads(line)["index"]: json.loads(line)["result"] for line in response.text.splitlines()}
+        assert results == {0: "4", 1: "9"}
+
+
+class TestIncrementalStream:
+    """Test NDJSON event streaming behind /query."""
+
+    @pytest.mark.asyncio
+    async def test_route_then_deltas_then_result(self):
+        import json
+        from app.agent import agentic_stream
+        from app.providers import LLMProvider
+        from app.tools.llm_tool import LLMTool
+
+        class StreamingProvider(LLMProvider):
+            name = "fake"
+
+            async def complete(self, prompt):
+                return "Hello world"
+
+            async def stream(self, prompt):
+                for token in ["Hello", " world"]:
+                    await asyncio.sleep(0.01)
+                    yield token
+
+        with patch('app.agent._get_agent', return_value=None), \
+                patch.dict(TOOLS_MAP, {"llm": LLMTool(providers=[StreamingProvider()])}):
+            events = [json.loads(line) async for line in agentic_stream("Tell me about history")]
+
+        assert [e["event"] for e in events] == ["route", "delta", "delta", "result"]
+        assert events[0]["tool_used"] == "llm"
+        assert events[-1]["result"] == "Hello world"
+        timings = events[-1]["timings"]
+        assert timings["routing_ms"] <= timings["first_token_ms"] <= timings["total_ms"]
+
+    @pytest.mark.asyncio
+    async def test_non_llm_tool_streams_route_and_result(self):
+        import json
+        from app.agent import agentic_stream
+
+        events = [json.loads(line) async for line in agentic_stream("What is 6 * 7?")]
+        assert [e["event"] for e in events] == ["route", "result"]
+        assert events[-1]["result"] == "42"
+
+    def test_query_endpoint_stream_flag(self):
+        import json
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        client = TestClient(app)
+        streamed = client.post("/query", json={"query": "What is 2 + 2?"}).text.splitlines()
+        assert json.loads(streamed[-1])["event"] == "result"
+        single = client.post("/query", json={"query": "What is 2 + 2?", "stream": False}).text.splitlines()
+        assert [json.loads(line) for line in single] == [{"query": "What is 2 + 2?", "tool_used": "math", "result": "4"}]
+
+
+class TestPipelinedWebSocket:
+    """Test multiple in-flight requests per /ws connection."""
+
+    @staticmethod
+    def _fake_run(state):
+        async def fake_run(query, bypass_cache=False, deadline=None):
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            try:
+                await asyncio.sleep(float(query))
+            except asyncio.CancelledError:
+                state["cancelled"] += 1
+                raise
+            finally:
+                state["in_flight"] -= 1
+            return {"query": query, "tool_used": "math", "result": query}
+        return fake_run
+
+    def test_out_of_order_responses_with_ids(self, monkeypatch):
+        from fastapi.testclient import TestClient
+        from app.config import get_settings
+        from app.main import app
+
+        monkeypatch.setattr(get_settings(), "ws_max_in_flight", 2)
+        state = {"in_flight": 0, "peak": 0, "cancelled": 0}
+        with patch('app.routers.ws.agentic_select_and_run', side_effect=self._fake_run(state)):
+            with TestClient(app).websocket_connect("/ws") as ws:
+                for request_id, delay in [("a", "0.2"), ("b", "0.01"), ("c", "0.01")]:
+                    ws.send_json({"id": request_id, "query": delay})
+                responses = [ws.receive_json() for _ in range(3)]
+
+        assert [r["id"] for r in responses] == ["b", "c", "a"]
+        assert state["peak"] == 2
+
+    def test_plain_text_frames_and_errors(self):
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        with TestClient(app).websocket_connect("/ws") as ws:
+            ws.send_text("What is 6 * 7?")
+            assert ws.receive_json() == {"query": "What is 6 * 7?", "tool_used": "math", "result": "42"}
+            ws.send_json({"id": 7, "query": "1 / 0"})
+            response = ws.receive_json()
+            assert response["id"] == 7 and "Division by zero" in response["error"]
+
+    def test_internal_cancellation_answers_and_frees_the_slot(self, monkeypatch):
+        from fastapi.testclient import TestClient
+        from app.config import get_settings
+        from app.main import app
+
+        async def fake_run(query, bypass_cache=False, deadline=None):
+            if query == "cancel":
+                raise asyncio.CancelledError()
+            return {"query": query, "tool_used": "math", "result": query}
+
+        monkeypatch.setattr(get_settings(), "ws_max_in_flight", 1)
+        with patch('app.routers.ws.agentic_select_and_run', side_effect=fake_run):
+            with TestClient(app).websocket_connect("/ws") as ws:
+                ws.send_json({"id": 1, "query": "cancel"})
+                assert ws.receive_json() == {"id": 1, "query": "cancel", "error": "Request cancelled"}
+                ws.send_json({"id": 2, "query": "ok"})  # the only slot is free again
+                assert ws.receive_json()["result"] == "ok"
+
+    def test_disconnect_cancels_in_flight(self):
+        import time
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        state = {"in_flight": 0, "peak": 0, "cancelled": 0}
+        with patch('app.routers.ws.agentic_select_and_run', side_effect=self._fake_run(state)):
+            with TestClient(app).websocket_connect("/ws") as ws:
+                ws.send_json({"id": 1, "query": "30"})
+                ws.send_json({"id": 2, "query": "30"})
+                deadline = time.monotonic() + 2
+                while state["in_flight"] < 2 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            deadline = time.monotonic() + 2
+            while state["cancelled"] < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        assert state["cancelled"] == 2
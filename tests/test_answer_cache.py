@@ -0,0 +1,116 @@
+"""Tests for the two-tier LLM answer cache."""
+import pytest
+
+from app.answer_cache import AnswerCache, bypass_answer_cache
+from app.providers import LLMProvider
+from app.tools.llm_tool import LLMTool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingProvider(LLMProvider):
+    def __init__(self, name: str = "openai", model: str = "gpt-test", answer: str = "Paris"):
+        self.name = name
+        self.model = model
+        self.answer = answer
+        self.calls = 0
+
+    async def complete(self, prompt: str) -> str:
+        self.calls += 1
+        return self.answer
+
+
+class DownProvider(LLMProvider):
+    name = "down"
+
+    async def complete(self, prompt: str) -> str:
+        raise RuntimeError("provider down")
+
+
+@pytest.mark.asyncio
+async def test_per_entry_ttl_and_normalized_key():
+    clock = FakeClock()
+    cache = AnswerCache(ttl=60, memory_bytes=10_000, clock=clock)
+    provider = CountingProvider()
+    await cache.set("What is the capital of France?", provider, "Paris")
+    await cache.set("Who wrote Hamlet?", provider, "Shakespeare", ttl=5)
+
+    assert await cache.get("what is the capital of france", [provider]) == "Paris"
+    clock.now += 10
+    assert await cache.get("Who wrote Hamlet?", [provider]) is None
+    assert await cache.get("What is the capital of France?", [provider]) == "Paris"
+    clock.now += 60
+    assert await cache.get("What is the capital of France?", [provider]) is None
+
+
+@pytest.mark.asyncio
+async def test_keyed_by_provider_and_model():
+    cache = AnswerCache(ttl=60, memory_bytes=10_000)
+    mini, large = CountingProvider(model="mini"), CountingProvider(model="large")
+    await cache.set("question", mini, "small answer")
+    assert await cache.get("question", [large]) is None
+    assert await cache.get("question", [large, mini]) == "small answer"
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_evicts_lru_by_bytes():
+    cache = AnswerCache(ttl=60, memory_bytes=300)  # ~86 bytes per entry
+    provider = CountingProvider()
+    for i in range(3):
+        await cache.set(f"question {i}", provider, "x" * 50)
+    assert await cache.get("question 0", [provider]) is not None  # now most recent
+    await cache.set("question 3", provider, "x" * 50)
+    assert await cache.get("question 1", [provider]) is None
+    assert await cache.get("question 0", [provider]) is not None
+    assert cache.stats["memory_bytes"] <= 300
+    assert cache.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart_and_respects_byte_cap(tmp_path):
+    path = str(tmp_path / "answers.sqlite")
+    provider = CountingProvider()
+    cache = AnswerCache(ttl=60, memory_bytes=10_000, path=path, disk_bytes=250)
+    for i in range(4):
+        await cache.set(f"question {i}", provider, "y" * 50)
+    assert cache.stats["disk_bytes"] <= 250
+    cache.close()
+
+    reopened = AnswerCache(ttl=60, memory_bytes=10_000, path=path, disk_bytes=250)
+    assert await reopened.get("question 3", [provider]) == "y" * 50
+    assert await reopened.get("question 0", [provider]) is None  # evicted (least recently used)
+    assert reopened.disk_hits == 1
+    assert await reopened.get("question 3", [provider]) == "y" * 50
+    assert reopened.hits == 1  # promoted to memory
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_llm_tool_reuses_answers_and_honours_bypass():
+    provider = CountingProvider()
+    tool = LLMTool(providers=[provider], cache=AnswerCache(ttl=60, memory_bytes=10_000))
+    assert await tool.run("Capital of France?") == "Paris"
+    assert await tool.run("capital of france") == "Paris"
+    assert provider.calls == 1
+
+    with bypass_answer_cache():
+        assert await tool.run("Capital of France?") == "Paris"
+    assert provider.calls == 2
+
+    assert [d async for d in tool.stream("Capital of France?")] == ["Paris"]
+    assert provider.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_stub_answers_are_never_cached():
+    cache = AnswerCache(ttl=60, memory_bytes=10_000)
+    tool = LLMTool(providers=[DownProvider()], cache=cache)
+    assert (await tool.run("Tell me a joke")).startswith("(stub)")
+    assert [d async for d in tool.stream("Tell me a joke")][0].startswith("(stub)")
+    assert cache.stats["size"] == 0
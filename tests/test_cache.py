@@ -0,0 +1,135 @@
+"""Tests for the in-process TTL cache."""
+import asyncio
+
+import pytest
+
+from app.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a becomes most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats["evictions"] == 1
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("k", "v")
+    clock.now = 4
+    assert cache.get("k") == "v"
+    clock.now = 6
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_disabled_when_ttl_zero():
+    cache = TTLCache(maxsize=10, ttl=0)
+    cache.set("k", "v")
+    assert cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    cache = TTLCache(maxsize=10, ttl=60)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(cache.get_or_fetch("k", fetch) for _ in range(10)))
+    assert results == ["value"] * 10
+    assert calls == 1
+    assert cache.stats["misses"] == 10
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_the_others():
+    cache = TTLCache(maxsize=10, ttl=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "value"
+
+    short = asyncio.create_task(asyncio.wait_for(cache.get_or_fetch("k", fetch), 0.02))
+    await asyncio.sleep(0.01)  # the short-deadline caller started the fetch
+    default = asyncio.create_task(cache.get_or_fetch("k", fetch))
+    with pytest.raises(asyncio.TimeoutError):
+        await short
+    assert await default == "value"
+    assert calls == [1] and cache.get("k") == "value"
+
+
+@pytest.mark.asyncio
+async def test_fetch_cancelled_when_every_waiter_gives_up():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cancelled = asyncio.Event()
+
+    async def fetch():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiters = [asyncio.create_task(cache.get_or_fetch("k", fetch)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), 0.5)
+    assert "k" not in cache._inflight
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached():
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        *(cache.get_or_fetch("k", fetch) for _ in range(3)), return_exceptions=True,
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, stale_ttl=10, clock=clock)
+    cache.set("k", "old")
+    clock.now = 8
+
+    async def fetch():
+        return "new"
+
+    assert await cache.get_or_fetch("k", fetch) == "old"
+    await asyncio.sleep(0)  # let the background refresh run
+    await asyncio.sleep(0)
+    assert await cache.get_or_fetch("k", fetch) == "new"
+    assert cache.stats["stale_hits"] == 1
+    assert cache.stats["refreshes"] == 1
+
+    clock.now = 100
+    assert await cache.get_or_fetch("k", fetch) == "new"
+    assert cache.stats["misses"] == 1
@@ -0,0 +1,148 @@
+"""Tests for the shared cache backends (Redis via fakeredis)."""
+import asyncio
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from app.answer_cache import AnswerCache
+from app.cache import TTLCache
+from app.cache_backend import MemoryBackend, RedisBackend
+from app.providers import LLMProvider
+from app.tools.llm_tool import LLMTool
+
+
+def redis_backend(server: FakeServer) -> RedisBackend:
+    # One client per backend: each stands in for a separate worker process
+    return RedisBackend(prefix="test:", lock_ttl=5, client=FakeAsyncRedis(server=server))
+
+
+class Counter:
+    def __init__(self, value="v", delay=0.05):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+class BrokenClient:
+    async def get(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+    set = delete = get
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_single_flight_and_ttl():
+    backend = MemoryBackend()
+    compute = Counter()
+    results = await asyncio.gather(*(backend.get_or_compute("k", compute, ttl=60) for _ in range(5)))
+    assert compute.calls == 1
+    assert [value for value, _ in results] == ["v"] * 5
+    assert (await backend.get("k"))[0] == "v"
+    await backend.set("gone", 1, ttl=0)
+    assert await backend.get("gone") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make", [MemoryBackend, lambda: redis_backend(FakeServer())], ids=["memory", "redis"])
+async def test_cancelled_owner_does_not_abort_local_waiters(make):
+    backend = make()
+    compute = Counter(delay=0.1)
+    owner = asyncio.create_task(asyncio.wait_for(backend.get_or_compute("k", compute, ttl=60), 0.02))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(backend.get_or_compute("k", compute, ttl=60))
+    with pytest.raises(asyncio.TimeoutError):
+        await owner
+    assert (await waiter)[0] == "v"
+    assert compute.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_single_flight_across_workers():
+    server = FakeServer()
+    workers = [redis_backend(server) for _ in range(3)]
+    compute = Counter(value={"answer": 42}, delay=0.1)
+    results = await asyncio.gather(*(w.get_or_compute("k", compute, ttl=60) for w in workers for _ in range(4)))
+    assert compute.calls == 1
+    assert all(value == {"answer": 42} for value, _ in results)
+    assert sum(w.computes for w in workers) == 1
+    # the lease is gone once the value is stored
+    assert await workers[0]._client.get("test:lock:k") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_and_uncacheable_results_release_the_lease():
+    server = FakeServer()
+    first, second = redis_backend(server), redis_backend(server)
+
+    async def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await first.get_or_compute("k", boom, ttl=60)
+    compute = Counter(value=None, delay=0)
+    value, _ = await second.get_or_compute("k", compute, ttl=60, cache_if=lambda v: v is not None)
+    assert value is None and compute.calls == 1
+    assert await second.get("k") is None  # not stored
+    await second.get_or_compute("k", compute, ttl=60, cache_if=lambda v: v is not None)
+    assert compute.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_backend_failure_falls_back_to_computing():
+    backend = RedisBackend(client=BrokenClient(), poll_interval=0)
+    compute = Counter(delay=0)
+    assert await backend.get("k") is None
+    assert await backend.get_or_compute("k", compute, ttl=60) == ("v", 0.0)
+    assert compute.calls == 1
+    assert backend.stats["errors"] >= 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_shares_values_and_age_between_workers():
+    server = FakeServer()
+    a = TTLCache(maxsize=10, ttl=60, shared=redis_backend(server))
+    b = TTLCache(maxsize=10, ttl=60, shared=redis_backend(server))
+    fetch = Counter(value=["weather", "Paris"], delay=0.05)
+    results = await asyncio.gather(a.get_or_fetch("paris", fetch), b.get_or_fetch("paris", fetch))
+    assert results == [["weather", "Paris"]] * 2
+    assert fetch.calls == 1
+    await a.aset("london", ["weather", "London"])
+    c = TTLCache(maxsize=10, ttl=60, shared=redis_backend(server))
+    assert await c.aget("london") == ["weather", "London"]
+    assert c.get("london") == ["weather", "London"]  # now in c's local tier
+    assert 0 <= c._lookup("london")[1] < 5
+
+
+class SlowProvider(LLMProvider):
+    name = "openai"
+    model = "gpt-test"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        return "Paris"
+
+
+@pytest.mark.asyncio
+async def test_llm_answers_computed_once_across_workers():
+    server = FakeServer()
+    provider = SlowProvider()
+    tools = [
+        LLMTool(providers=[provider], cache=AnswerCache(ttl=60, memory_bytes=1 << 16, shared=redis_backend(server)))
+        for _ in range(3)
+    ]
+    answers = await asyncio.gather(*(tool.run("Capital of France?") for tool in tools))
+    assert answers == ["Paris"] * 3
+    assert provider.calls == 1
+    # later lookups in any worker are plain shared-cache hits
+    fresh = AnswerCache(ttl=60, memory_bytes=1 << 16, shared=redis_backend(server))
+    assert await fresh.get("capital of france?", [provider]) == "Paris"
+    assert fresh.stats["shared_hits"] == 1
@@ -0,0 +1,112 @@
+"""Tests for multi-intent decomposition and parallel execution of the parts."""
+import asyncio
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.agent import TOOLS_MAP, ToolPlan, ToolSelection, agentic_select_and_run, agentic_stream
+from app.decompose import split_intents
+from app.models.query_models import QueryOut
+from app.routing_batcher import parse_batch_response
+from app.routing_cache import get_routing_cache
+from app.tools.base import Tool
+
+
+class SlowTool(Tool):
+    """Answers after 0.2 s; fails for "boom"."""
+
+    name = "slow"
+    description = "Slow test tool."
+
+    async def run(self, query: str) -> str:
+        await asyncio.sleep(0.2)
+        if query == "boom":
+            raise RuntimeError("upstream down")
+        return f"slow {query}"
+
+
+def plan_agent(*calls):
+    agent = MagicMock()
+
+    async def ainvoke(_):
+        return ToolPlan(calls=[ToolSelection(tool=tool, input=text) for tool, text in calls])
+
+    agent.ainvoke = MagicMock(side_effect=ainvoke)
+    return agent
+
+
+@pytest.fixture
+def slow_tool():
+    get_routing_cache().clear()
+    with patch.dict(TOOLS_MAP, {"slow": SlowTool()}):
+        yield
+    get_routing_cache().clear()
+
+
+def test_split_intents():
+    assert split_intents("weather in Paris and Tokyo, and what is 17*23") == [
+        ("weather", "Paris"), ("weather", "Tokyo"), ("math", "17*23"),
+    ]
+    assert split_intents("What is 2 + 2; weather in Berlin?") == [("math", "2 + 2"), ("weather", "Berlin")]
+    # single questions stay whole
+    assert split_intents("Hello, what is 2+2?") is None
+    assert split_intents("What is 1,000 + 2?") is None
+    assert split_intents("Weather in Paris") is None
+    # a trailing country or state qualifies the city, it is not a second place
+    assert split_intents("What is the weather in Paris, France?") is None
+    assert split_intents("Weather in Washington, DC") is None
+    assert split_intents("weather in Paris, TX") is None
+    assert split_intents("weather in Paris, France and what is 2+2") == [("weather", "Paris, France"), ("math", "2+2")]
+    assert split_intents("weather in Paris & Tokyo") == [("weather", "Paris"), ("weather", "Tokyo")]
+    assert split_intents("weather in Paris, London and Berlin") is None  # commas never split places
+    assert split_intents("weather in Bosnia and Herzegovina") is None  # not two gazetteer cities
+    assert split_intents("What is the difference between cats and dogs?") is None
+    with patch("app.decompose.get_settings") as settings:
+        settings.return_value.multi_intent_enabled = False
+        assert split_intents("weather in Paris and Tokyo") is None
+
+
+def test_plan_parsing_accepts_single_and_multiple_calls():
+    assert ToolPlan.model_validate({"tool": "math", "input": "1+1"}).calls == [ToolSelection(tool="math", input="1+1")]
+    text = json.dumps([
+        {"index": 1, "tool": "weather", "input": "Paris"},
+        {"index": 1, "tool": "math", "input": "2*3"},
+        {"index": 2, "tool": "nope", "input": "x"},
+    ])
+    first, second = parse_batch_response(text, 2, ToolSelection, list(TOOLS_MAP), multi=True)
+    assert [s.tool for s in first] == ["weather", "math"] and second is None
+    assert parse_batch_response(text, 2, ToolSelection, list(TOOLS_MAP))[0].tool == "weather"
+
+
+@pytest.mark.asyncio
+async def test_calls_run_in_parallel_and_fail_independently(slow_tool):
+    agent = plan_agent(("slow", "a"), ("slow", "boom"), ("slow", "c"), ("math", "6*7"))
+    with patch("app.agent._get_agent", return_value=agent):
+        start = time.perf_counter()
+        result = await agentic_select_and_run("do a, boom and c, and what is 6*7")
+        elapsed = time.perf_counter() - start
+        again = await agentic_select_and_run("do a, boom and c, and what is 6*7")
+
+    assert elapsed < 0.35  # the slowest call, not the sum
+    assert result["tool_used"] == "multi"
+    assert result["result"] == "slow a\nslow (boom) failed: upstream down\nslow c\n6*7 = 42"
+    assert [call.get("result") for call in result["calls"]] == ["slow a", None, "slow c", "42"]
+    assert again["routing_cache_hit"] is True and again["result"] == result["result"]
+    assert agent.ainvoke.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_decomposed_without_agent_and_streamed(slow_tool):
+    with patch("app.agent._get_agent", return_value=None):
+        lines = [json.loads(line) async for line in agentic_stream("What is 2 + 2; weather in Berlin?")]
+
+    route, *partials, final = lines
+    assert route["event"] == "route" and route["raw_decision"].startswith("Selected (decomposed)")
+    assert [call["tool_used"] for call in route["calls"]] == ["math", "weather"]
+    assert sorted(event["index"] for event in partials if event["event"] == "partial") == [0, 1]
+    assert final["event"] == "result" and final["tool_used"] == "multi"
+    assert final["result"].startswith("2 + 2 = 4\n")
+    assert [call.tool_used for call in QueryOut.model_validate(final).calls] == ["math", "weather"]
+    assert "multi" in QueryOut.model_json_schema()["properties"]["tool_used"]["enum"]
@@ -0,0 +1,48 @@
+"""Tests for the memory-mapped city gazetteer."""
+import numpy as np
+import pytest
+
+from app.gazetteer import BUNDLED_INDEX, Gazetteer, normalize_city, read_source, write_index
+
+
+@pytest.fixture
+def index(tmp_path):
+    return write_index([
+        (2988507, "Paris", "FR", []),
+        (4717560, "Paris", "US", []),
+        (2867714, "Munich", "DE", ["München"]),
+        (3448439, "São Paulo", "BR", []),
+        (2950159, "Berlin", "DE", []),
+        (2950096, "Bern", "CH", []),
+    ], tmp_path / "cities.gaz")
+
+
+def test_exact_alias_and_country_lookups(index):
+    assert normalize_city("  São Paulo! ") == "sao paulo"
+    assert index.lookup("paris") == (2988507, "Paris", "FR")  # earlier row wins the bare name
+    assert index.lookup("Paris, US").id == 4717560
+    assert index.lookup("MUNCHEN").name == "Munich"
+    assert index.lookup("Sao Paulo").name == "São Paulo"
+    assert index.lookup("Atlantis") is None and index.lookup("  ") is None
+    assert isinstance(index._ids, np.ndarray) and isinstance(index._map, np.memmap)
+
+
+def test_misspellings_within_edit_budget(index):
+    assert index.lookup("Pariss").id == 2988507
+    assert index.lookup("Sao Paolo").name == "São Paulo"  # 9 letters: two edits allowed
+    assert index.lookup("Munihc").name == "Munich"  # adjacent swap counts once
+    assert index.lookup("Bernn").name == "Bern"
+    assert index.lookup("Berlni").name == "Berlin"
+    assert index.lookup("Paris, XX") is None  # both Paris equally close
+    assert index.lookup("Pariss", max_edits=0) is None
+    assert index.lookup("Paros") is not None and index.lookup("Pxxis") is None
+
+
+def test_bundled_index_matches_its_source():
+    gazetteer = Gazetteer(BUNDLED_INDEX)
+    rows = list(read_source(BUNDLED_INDEX.with_name("cities.csv")))
+    assert len(gazetteer) == len(rows)
+    for city_id, name, country, aliases in rows:
+        assert gazetteer.lookup(name) == (city_id, name, country)
+        for alias in aliases:
+            assert gazetteer.lookup(f"{alias}, {country}").id == city_id
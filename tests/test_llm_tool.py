@@ -0,0 +1,264 @@
+"""Tests for the LLM tool and its async provider layer."""
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app.answer_cache import get_answer_cache
+from app.config import Settings
+from app.providers import LLMProvider, OpenAICompatibleProvider, build_providers
+from app.tools.llm_tool import LLMTool
+from app.tools.math_tool import MathTool
+
+
+@pytest.fixture(autouse=True)
+def _clear_answer_cache():
+    get_answer_cache().clear()
+    yield
+    get_answer_cache().clear()
+
+
+def slow_openai_provider(name: str, delay: float, answer: str) -> OpenAICompatibleProvider:
+    """OpenAI-compatible provider whose upstream answers after `delay` seconds."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={
+            "id": "cmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "test-model",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": answer},
+            }],
+        })
+
+    return OpenAICompatibleProvider(
+        name=name,
+        api_key="test",
+        model="test-model",
+        base_url="http://llm.test/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+
+class FailingProvider(LLMProvider):
+    name = "failing"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, prompt: str) -> str:
+        self.calls += 1
+        raise RuntimeError("provider down")
+
+
+@pytest.mark.asyncio
+async def test_llm_stub_without_providers():
+    tool = LLMTool(providers=[])
+    assert await tool.run("Who is the president of France?") == "The president of France is Emmanuel Macron."
+
+
+@pytest.mark.asyncio
+async def test_llm_fallback_order():
+    failing = FailingProvider()
+    provider = slow_openai_provider("openai", 0, "Paris")
+    tool = LLMTool(providers=[failing, provider])
+    assert await tool.run("capital of France?") == "Paris"
+    assert failing.calls == 1
+    await provider.aclose()
+
+
+@pytest.mark.asyncio
+async def test_llm_call_does_not_block_event_loop():
+    provider = slow_openai_provider("openrouter", 0.5, "slow answer")
+    tool = LLMTool(providers=[provider])
+    math = MathTool()
+
+    start = time.perf_counter()
+    llm_task = asyncio.create_task(tool.run("tell me something"))
+    await asyncio.sleep(0.05)
+    # Other requests are served while the LLM call is in flight
+    for _ in range(20):
+        assert await math.run("6 * 7") == "42"
+    served_at = time.perf_counter() - start
+    assert not llm_task.done()
+    assert await llm_task == "slow answer"
+    assert served_at < 0.4
+    await provider.aclose()
+
+
+def sse_openai_provider(tokens: list[str]) -> OpenAICompatibleProvider:
+    """OpenAI-compatible provider whose upstream streams `tokens` as SSE chunks."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        events = []
+        for token in tokens:
+            events.append("data: " + json.dumps({
+                "id": "cmpl-test",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": "test-model",
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }) + "\n\n")
+        events.append("data: [DONE]\n\n")
+        return httpx.Response(200, text="".join(events), headers={"content-type": "text/event-stream"})
+
+    return OpenAICompatibleProvider(
+        name="openai",
+        api_key="test",
+        model="test-model",
+        base_url="http://llm.test/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+
+@pytest.mark.asyncio
+async def test_llm_stream_yields_provider_deltas():
+    provider = sse_openai_provider(["Emmanuel", " Macron", "."])
+    tool = LLMTool(providers=[FailingProvider(), provider])
+    assert [d async for d in tool.stream("president of France?")] == ["Emmanuel", " Macron", "."]
+    await provider.aclose()
+
+
+@pytest.mark.asyncio
+async def test_llm_stream_stub_fallback():
+    tool = LLMTool(providers=[])
+    assert [d async for d in tool.stream("Who is the president of France?")] == [
+        "The president of France is Emmanuel Macron."
+    ]
+
+
+def flaky_openai_provider(name: str, behavior: dict, answer: str) -> OpenAICompatibleProvider:
+    """OpenAI-compatible fake upstream; `behavior` sets its current delay and failures."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        behavior["requests"] = behavior.get("requests", 0) + 1
+        await asyncio.sleep(behavior.get("delay", 0))
+        if behavior.get("fail"):
+            return httpx.Response(500, json={"error": {"message": "injected error"}})
+        return httpx.Response(200, json={
+            "id": "cmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "test-model",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": answer},
+            }],
+        })
+
+    return OpenAICompatibleProvider(
+        name=name,
+        api_key="test",
+        model="test-model",
+        base_url="http://llm.test/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        max_retries=0,
+    )
+
+
+@pytest.fixture
+def llm_settings(monkeypatch):
+    from app.config import get_settings
+
+    settings = get_settings()
+
+    def configure(**values):
+        for key, value in values.items():
+            monkeypatch.setattr(settings, key, value)
+    return configure
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_failing_provider(llm_settings):
+    llm_settings(llm_breaker_failures=2, llm_breaker_cooldown=60)
+    down = {"fail": True}
+    primary = flaky_openai_provider("openrouter", down, "primary")
+    backup = flaky_openai_provider("openai", {}, "backup")
+    tool = LLMTool(providers=[primary, backup])
+
+    for i in range(4):
+        assert await tool.run(f"question {i}") == "backup"
+    assert down["requests"] == 2  # later calls skip it without a request
+    stats = tool.health_stats()
+    assert stats["openrouter"]["state"] == "open"
+    assert stats["openrouter"]["short_circuits"] == 2
+    assert stats["openai"]["error_rate"] == 0.0
+    await primary.aclose()
+    await backup.aclose()
+
+
+@pytest.mark.asyncio
+async def test_hedge_fires_after_delay_and_fastest_answer_wins(llm_settings):
+    llm_settings(llm_hedge_enabled=True, llm_hedge_delay=0.05)
+    slow = {"delay": 1.0}
+    primary = flaky_openai_provider("openrouter", slow, "slow")
+    backup = flaky_openai_provider("openai", {"delay": 0.01}, "fast")
+    tool = LLMTool(providers=[primary, backup])
+
+    start = time.perf_counter()
+    assert await tool.run("question") == "fast"
+    assert time.perf_counter() - start < 0.5
+    # The cancelled loser is neither a success nor a failure
+    assert tool.health(primary).successes == tool.health(primary).failures == 0
+    await primary.aclose()
+    await backup.aclose()
+
+
+@pytest.mark.asyncio
+async def test_hedge_not_needed_when_primary_is_fast(llm_settings):
+    llm_settings(llm_hedge_enabled=True, llm_hedge_delay=0.2)
+    backup_behavior: dict = {}
+    primary = flaky_openai_provider("openrouter", {"delay": 0.01}, "primary")
+    backup = flaky_openai_provider("openai", backup_behavior, "backup")
+    tool = LLMTool(providers=[primary, backup])
+
+    assert await tool.run("question") == "primary"
+    assert "requests" not in backup_behavior
+    await primary.aclose()
+    await backup.aclose()
+
+
+@pytest.mark.asyncio
+async def test_hedged_failure_starts_next_provider_immediately(llm_settings):
+    llm_settings(llm_hedge_enabled=True, llm_hedge_delay=5.0)
+    primary = flaky_openai_provider("openrouter", {"fail": True}, "primary")
+    backup = flaky_openai_provider("openai", {}, "backup")
+    tool = LLMTool(providers=[primary, backup])
+
+    start = time.perf_counter()
+    assert await tool.run("question") == "backup"
+    assert time.perf_counter() - start < 1.0
+    assert tool.health(primary).failures == 1
+    await primary.aclose()
+    await backup.aclose()
+
+
+@pytest.mark.asyncio
+async def test_prefer_fastest_orders_by_rolling_latency(llm_settings):
+    llm_settings(llm_prefer_fastest=True)
+    primary = flaky_openai_provider("openrouter", {"delay": 0.05}, "slow")
+    backup = flaky_openai_provider("openai", {}, "fast")
+    tool = LLMTool(providers=[primary, backup])
+    tool.health(primary).record_success(0.05)
+    tool.health(backup).record_success(0.001)
+
+    assert await tool.run("question") == "fast"
+    await primary.aclose()
+    await backup.aclose()
+
+
+def test_build_providers_honours_base_url_overrides():
+    settings = Settings(
+        OPENAI_API_KEY="k", OPENAI_BASE_URL="http://127.0.0.1:9/v1",
+        OPENROUTER_API_KEY="k", OPENROUTER_BASE_URL="http://127.0.0.1:8/api/v1",
+    )
+    urls = {p.name: str(p.client.base_url) for p in build_providers(settings)}
+    assert urls["openrouter"].startswith("http://127.0.0.1:8/api/v1")
+    assert urls["openai"].startswith("http://127.0.0.1:9/v1")
@@ -0,0 +1,97 @@
+"""Tests for the local learned router."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.local_router import (
+    LocalRouter,
+    close_decision_log,
+    evaluate,
+    extract_argument,
+    log_decision,
+    route_locally,
+    seed_examples,
+)
+
+
+@pytest.fixture(scope="module")
+def router():
+    rows = seed_examples()
+    return LocalRouter(dim=2 ** 12).fit([r["query"] for r in rows], [r["tool"] for r in rows], epochs=150)
+
+
+def test_predicts_seed_style_queries(router):
+    assert router.predict("What's the weather like in Berlin?")[0] == "weather"
+    assert router.predict("What is 12 * 9?")[0] == "math"
+    assert router.predict("Who discovered penicillin?")[0] == "llm"
+
+
+def test_save_load_round_trip(router, tmp_path):
+    path = str(tmp_path / "router.npz")
+    router.save(path)
+    loaded = LocalRouter.load(path)
+    assert loaded.predict("weather in Oslo") == router.predict("weather in Oslo")
+
+
+def test_extract_argument():
+    assert extract_argument("math", "What is 42 * 7?") == "42 * 7"
+    assert extract_argument("math", "how much is 3 + 4") == "3 + 4"
+    assert extract_argument("weather", "How's the weather in New York today?") == "New York"
+    assert extract_argument("weather", "is it raining") is None
+    assert extract_argument("llm", "Tell me a joke") == "Tell me a joke"
+
+
+def test_route_locally_defers_below_threshold(router):
+    with patch("app.local_router.get_local_router", return_value=router):
+        assert route_locally("weather in Paris", threshold=0.0)[:2] == ("weather", "Paris")
+        assert route_locally("weather in Paris", threshold=1.01) is None
+
+
+def test_evaluate_report(router):
+    report = evaluate(router, seed_examples(seed=1)[:50], thresholds=(0.5, 0.9))
+    assert [r["threshold"] for r in report] == [0.5, 0.9]
+    assert report[0]["coverage"] >= report[1]["coverage"]
+    assert all(0.0 <= r["accuracy"] <= 1.0 for r in report)
+
+
+@pytest.mark.asyncio
+async def test_confident_local_route_skips_agent(router, monkeypatch):
+    from app.agent import agentic_select_and_run
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "local_router_threshold", 0.6)
+    mock_agent = MagicMock()
+    with patch("app.local_router.get_local_router", return_value=router), \
+            patch("app.agent._get_agent", return_value=mock_agent):
+        result = await agentic_select_and_run("What is 6 * 7?")
+    mock_agent.ainvoke.assert_not_called()
+    assert result["routed_locally"] is True
+    assert result["tool_used"] == "math"
+    assert result["result"] == "42"
+
+
+def test_decisions_are_logged_off_the_event_loop(tmp_path, monkeypatch):
+    import json
+    import logging
+    import threading
+    from app.config import get_settings
+
+    writers = []
+    emit = logging.FileHandler.emit
+
+    def recording_emit(handler, record):
+        writers.append(threading.current_thread())
+        emit(handler, record)
+
+    path = tmp_path / "routing_log.jsonl"
+    monkeypatch.setattr(get_settings(), "routing_log_path", str(path))
+    monkeypatch.setattr(logging.FileHandler, "emit", recording_emit)
+    log_decision("What is 2+2?", "math", "2+2")
+    log_decision("weather in Oslo", "weather", "Oslo")
+    close_decision_log()
+    assert len(writers) == 2 and threading.current_thread() not in writers
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert rows == [
+        {"query": "What is 2+2?", "tool": "math", "input": "2+2"},
+        {"query": "weather in Oslo", "tool": "weather", "input": "Oslo"},
+    ]
@@ -0,0 +1,83 @@
+"""Tests for vectorized batch math evaluation and the /math/batch endpoint."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.tools.math_batch import BatchPlan, compile_vectorized
+
+
+def _lines(plan: BatchPlan):
+    return [json.loads(line) for line in plan.lines()]
+
+
+def test_vectorized_range():
+    lines = _lines(BatchPlan(["x*2+1"], {"x": {"start": 0, "stop": 25}}, chunk_size=10))
+    chunks, summary = lines[:-1], lines[-1]
+    assert [c["offset"] for c in chunks] == [0, 10, 20]
+    values = [v for c in chunks for v in c["results"]]
+    assert values == [x * 2 + 1 for x in range(25)]
+    assert summary == {"done": True, "expressions": 1, "points": 25}
+
+
+def test_multiple_variables_and_expressions():
+    lines = _lines(BatchPlan(["a + b", "a % 3", "a << 2"], {"a": [1, 2, 3, 4], "b": [10]}))
+    assert [line["results"] for line in lines[:-1]] == [[11, 12, 13, 14], [1, 2, 0, 1], [4, 8, 12, 16]]
+
+
+def test_non_finite_results_are_null():
+    lines = _lines(BatchPlan(["1 / x"], {"x": [0, 2]}))
+    assert lines[0]["results"] == [None, 0.5]
+
+
+def test_scalar_expressions_use_exact_math():
+    lines = _lines(BatchPlan(["2**100", "1/0", "6 × 7"]))
+    assert lines[0]["results"] == [str(2 ** 100), None, "42"]
+    assert "Division by zero" in lines[0]["errors"]["1"]
+
+
+@pytest.mark.parametrize("expr", ["__import__('os')", "y + 1", "x.real", "'a' * x"])
+def test_whitelist_enforced(expr):
+    with pytest.raises(ValueError):
+        compile_vectorized(expr, ["x"])
+
+
+def test_million_point_sweep():
+    plan = BatchPlan(["x*2+1"], {"x": {"start": 0, "stop": 1_000_000}}, chunk_size=100_000)
+    chunks = _lines(plan)[:-1]
+    assert sum(len(c["results"]) for c in chunks) == 1_000_000
+    assert chunks[-1]["results"][-1] == 1_999_999
+
+
+def test_batch_endpoint_streams_ndjson():
+    client = TestClient(app)
+    response = client.post("/math/batch", json={
+        "expression": "x ** 2", "variables": {"x": {"start": 0, "stop": 5}}, "chunk_size": 2,
+    })
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [v for line in lines[:-1] for v in line["results"]] == [0, 1, 4, 9, 16]
+
+    bad = client.post("/math/batch", json={"expression": "y + 1", "variables": {"x": [1]}})
+    assert bad.status_code == 400
+
+
+def test_non_finite_ranges_are_rejected():
+    client = TestClient(app)
+    for variables in ({"x": {"start": 0, "stop": "inf"}}, {"x": {"start": "nan", "stop": 1}}, {"x": [1, "inf"]}):
+        response = client.post("/math/batch", json={"expression": "x*2", "variables": variables})
+        assert response.status_code == 422, variables
+    # finite bounds whose point count overflows
+    response = client.post("/math/batch", json={
+        "expression": "x*2", "variables": {"x": {"start": -1e308, "stop": 1e308, "step": 1e-300}},
+    })
+    assert response.status_code == 400 and "finite" in response.json()["detail"]
+    with pytest.raises(ValueError, match="finite"):
+        BatchPlan(["x"], {"x": {"start": 0, "stop": float("inf")}})
+
+
+def test_huge_literal_is_a_bad_request():
+    client = TestClient(app)
+    response = client.post("/math/batch", json={"expression": "x + 1" + "0" * 400, "variables": {"x": [1]}})
+    assert response.status_code == 400 and response.json()["detail"] == "Number too large"
@@ -22,3 +22,31 @@ async def test_math_disallow_eval():
     tool = MathTool()
     with pytest.raises(ValueError):
         await tool.run("__import__('os').system('echo hi')")
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("expr", ["9**9**9", "1<<10**9", "10**5000 * 10**5000", "2.0**100000", "'ab' * 3"])
+async def test_math_resource_limits(expr):
+    import time
+    tool = MathTool()
+    start = time.perf_counter()
+    with pytest.raises(ValueError):
+        await tool.run(expr)
+    assert time.perf_counter() - start < 0.5
+
+@pytest.mark.asyncio
+async def test_math_clean_errors():
+    tool = MathTool()
+    with pytest.raises(ValueError, match="Division by zero"):
+        await tool.run("1 / 0")
+    with pytest.raises(ValueError, match="Invalid expression"):
+        await tool.run("2 + * 3")
+    assert await tool.run("2**100") == str(2**100)
+    assert await tool.run("-3 ** 2 // 4 % 5") == str(-3 ** 2 // 4 % 5)
+
+@pytest.mark.asyncio
+async def test_math_compiled_expression_cache():
+    tool = MathTool()
+    assert await tool.run("What is 6 * 7?") == "42"
+    assert await tool.run("6   *  7") == "42"
+    info = tool._compile_cached.cache_info()
+    assert info.misses == 1 and info.hits == 1
@@ -0,0 +1,79 @@
+"""Tests for Prometheus instrumentation and the /metrics route."""
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.agent import agentic_select_and_run
+from app.main import app
+from app.providers import LLMProvider
+from app.routing_cache import get_routing_cache
+from app.tools.llm_tool import LLMTool
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class BrokenAgent:
+    async def ainvoke(self, inputs):
+        raise RuntimeError("quota exceeded")
+
+
+class DownProvider(LLMProvider):
+    name = "metrics-down"
+
+    async def complete(self, prompt: str) -> str:
+        raise RuntimeError("provider down")
+
+
+@pytest.fixture(autouse=True)
+def _clear_routing_cache():
+    get_routing_cache().clear()
+    yield
+    get_routing_cache().clear()
+
+
+@pytest.mark.asyncio
+async def test_agent_failure_counts_fallback_and_stage_latency():
+    failures = sample("router_agent_failures_total")
+    fallbacks = sample("router_fallbacks_total", kind="routing_heuristic")
+    routed = sample("router_routing_seconds_count", source="heuristic")
+    math_runs = sample("router_tool_seconds_count", tool="math")
+
+    with patch("app.agent._get_agent", return_value=BrokenAgent()):
+        result = await agentic_select_and_run("What is 6 * 7?")
+
+    assert result["result"] == "42"
+    assert sample("router_agent_failures_total") == failures + 1
+    assert sample("router_fallbacks_total", kind="routing_heuristic") == fallbacks + 1
+    assert sample("router_routing_seconds_count", source="heuristic") == routed + 1
+    assert sample("router_tool_seconds_count", tool="math") == math_runs + 1
+
+
+@pytest.mark.asyncio
+async def test_provider_errors_and_stub_fallback():
+    stubs = sample("router_fallbacks_total", kind="llm_stub")
+    tool = LLMTool(providers=[DownProvider()])
+    assert (await tool.run("Tell me a joke")).startswith("(stub)")
+    assert sample("router_llm_provider_errors_total", provider="metrics-down") == 1
+    assert sample("router_llm_provider_seconds_count", provider="metrics-down", outcome="error") == 1
+    assert sample("router_fallbacks_total", kind="llm_stub") == stubs + 1
+
+
+def test_metrics_endpoint_exposes_pipeline_and_cache_metrics():
+    client = TestClient(app)
+    with client.websocket_connect("/ws") as ws:
+        ws.send_text("What is 2 + 2?")
+        assert ws.receive_json()["result"] == "4"
+    client.post("/query", json={"query": "What is 3 * 3?", "stream": False})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'router_routing_seconds_bucket{le="0.001",source="heuristic"}' in body
+    assert "router_ws_message_seconds_count" in body
+    assert 'router_in_flight_requests{endpoint="query"} 0.0' in body
+    assert 'router_cache_misses_total{cache="routing"}' in body
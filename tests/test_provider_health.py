@@ -0,0 +1,59 @@
+"""Tests for rolling provider health and the circuit breaker."""
+from app.provider_health import ProviderHealth
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rolling_error_rate_and_percentiles():
+    health = ProviderHealth(window=4)
+    for latency in [0.1, 0.2, 0.3]:
+        health.record_success(latency)
+    health.record_failure(1.0)
+    assert health.error_rate == 0.25
+    assert health.percentile(0.5) == 0.2
+    assert health.percentile(0.95) == 0.3
+    health.record_success(0.4)  # oldest outcome drops out of the window
+    assert health.error_rate == 0.25
+    assert health.stats["p95_ms"] == 400.0
+
+
+def test_breaker_opens_after_consecutive_failures_then_probes():
+    clock = FakeClock()
+    health = ProviderHealth(failure_threshold=3, cooldown=10, clock=clock)
+    for _ in range(2):
+        health.record_failure(0.1)
+    health.record_success(0.1)  # resets the streak
+    for _ in range(3):
+        assert health.allow()
+        health.record_failure(0.1)
+    assert health.state == "open"
+    assert not health.allow()
+    assert health.short_circuits == 1
+
+    clock.now = 10
+    assert health.state == "half_open"
+    assert health.allow()  # the single probe
+    assert not health.allow()
+    health.record_failure(0.1)  # failed probe re-opens immediately
+    assert health.state == "open"
+
+    clock.now = 20
+    assert health.allow()
+    health.record_success(0.1)
+    assert health.state == "closed" and health.allow()
+
+
+def test_abandoned_probe_frees_the_slot():
+    clock = FakeClock()
+    health = ProviderHealth(failure_threshold=1, cooldown=1, clock=clock)
+    health.record_failure(0.1)
+    clock.now = 1
+    assert health.allow()
+    health.release()
+    assert health.allow()
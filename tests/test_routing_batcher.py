@@ -0,0 +1,95 @@
+"""Tests for micro-batched routing against a fake chat model."""
+import asyncio
+import json
+import re
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from app.agent import TOOL_DESCRIPTIONS, TOOLS_MAP, ToolSelection, agentic_select_and_run
+from app.routing_batcher import RoutingBatcher, parse_batch_response
+from app.rules import heuristic_tool
+
+
+class FakeRouterModel:
+    """Answers numbered questions with the heuristic; records every prompt."""
+
+    def __init__(self, mangle=None):
+        self.prompts = []
+        self.mangle = mangle
+
+    async def __call__(self, prompt_value):
+        prompt = prompt_value.to_string()
+        self.prompts.append(prompt)
+        questions = [json.loads(q) for q in re.findall(r"^\d+\. (.*)$", prompt, re.MULTILINE)]
+        answer = [
+            {"index": i, "tool": heuristic_tool(q), "input": q}
+            for i, q in enumerate(questions, start=1)
+        ]
+        if self.mangle:
+            answer = self.mangle(answer)
+        return json.dumps(answer)
+
+
+def make_batcher(model, **kwargs):
+    return RoutingBatcher(RunnableLambda(model), TOOL_DESCRIPTIONS, ToolSelection, list(TOOLS_MAP), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_share_one_call():
+    model = FakeRouterModel()
+    batcher = make_batcher(model, window=0.02)
+    queries = ["weather in Paris", "What is 2 + 2?", "Who wrote Hamlet?"]
+    selections = await asyncio.gather(*(batcher.route(q) for q in queries))
+    assert len(model.prompts) == 1
+    assert [s.tool for s in selections] == ["weather", "math", "llm"]
+    assert [s.input for s in selections] == queries
+
+
+@pytest.mark.asyncio
+async def test_max_size_flushes_early():
+    model = FakeRouterModel()
+    batcher = make_batcher(model, window=10, max_size=2)
+    selections = await asyncio.wait_for(
+        asyncio.gather(*(batcher.route(q) for q in ["1 + 1", "2 + 2"])), timeout=1,
+    )
+    assert [s.tool for s in selections] == ["math", "math"]
+
+
+@pytest.mark.asyncio
+async def test_malformed_items_fall_back_individually():
+    def mangle(answer):
+        answer[1]["tool"] = "calculator"  # unknown tool
+        del answer[2]["input"]  # missing field
+        return answer
+
+    batcher = make_batcher(FakeRouterModel(mangle), window=0.01)
+    selections = await asyncio.gather(*(batcher.route(q) for q in ["weather in Oslo", "3 * 3", "hello"]))
+    assert selections[0].tool == "weather"
+    assert selections[1] is None and selections[2] is None
+
+
+def test_unparseable_response():
+    assert parse_batch_response("sorry, I can't", 2, ToolSelection, ["math"]) == [None, None]
+    assert parse_batch_response("[not json]", 1, ToolSelection, ["math"]) == [None]
+
+
+@pytest.mark.asyncio
+async def test_agent_uses_batcher_and_heuristic_fallback():
+    def mangle(answer):
+        return [a for a in answer if "Jakarta" in json.dumps(a)]  # drops the math item
+
+    batcher = make_batcher(FakeRouterModel(mangle), window=0.01)
+    with patch("app.agent._get_agent", return_value=object()), \
+            patch("app.agent._get_batcher", return_value=batcher), \
+            patch("app.agent.get_routing_cache") as cache:
+        cache.return_value.aget = AsyncMock(return_value=None)
+        cache.return_value.aset = AsyncMock()
+        weather, math = await asyncio.gather(
+            agentic_select_and_run("Weather in Jakarta"),
+            agentic_select_and_run("What is 6 * 7?"),
+        )
+    assert batcher.batches == 1
+    assert weather["routed_via_agent"] is True and weather["tool_used"] == "weather"
+    assert math["routed_via_agent"] is False and math["result"] == "42"
@@ -0,0 +1,107 @@
+"""Tests for the compiled keyword rule engine."""
+import json
+
+import pytest
+
+from app.rules import DEFAULT_RULES, KeywordGroup, Rule, RuleEngine, RuleTable, load_rule_table
+
+
+def legacy_select_tool(query: str) -> str:
+    """The heuristic previously duplicated in agent.py and routers/query.py."""
+    q = query.lower()
+    if any(k in q for k in ["weather", "temperature", "rain", "forecast"]):
+        return "weather"
+    if any(sym in q for sym in ["+", "-", "*", "/"]) and any(ch.isdigit() for ch in q):
+        return "math"
+    return "llm"
+
+
+@pytest.mark.parametrize("query", [
+    "What is 42 * 7?",
+    "Weather in Jakarta?",
+    "What's the forecast for London?",
+    "Temperature in Tokyo",
+    "Is it going to RAIN?",
+    "What is the capital of France?",
+    "Tell me about history",
+    "10 - 5",
+    "e-mail me",
+    "what is 3 + rain",
+    "drainage systems",
+])
+def test_matches_legacy_heuristic(query):
+    assert RuleEngine(DEFAULT_RULES).match(query) == legacy_select_tool(query)
+
+
+def test_multilingual_keywords():
+    engine = RuleEngine(DEFAULT_RULES)
+    assert engine.match("Bagaimana cuaca di Bandung?") == "weather"
+    assert engine.match("Quelle est la météo à Paris ?") == "weather"
+    assert engine.match("Wie ist das Wetter in Berlin?") == "weather"
+    # whole-word groups do not fire inside other words
+    assert engine.match("How do I regenerate a token?") == "llm"
+
+
+def test_priorities():
+    table = RuleTable(default_tool="llm", rules=[
+        Rule(tool="low", priority=1, groups=[KeywordGroup(keywords=["foo"])]),
+        Rule(tool="high", priority=5, groups=[KeywordGroup(keywords=["bar"])]),
+    ])
+    engine = RuleEngine(table)
+    assert engine.match("foo bar") == "high"
+    assert engine.match("foo") == "low"
+    assert engine.match("baz") == "llm"
+
+
+def test_thousands_of_keywords():
+    keywords = [f"kw{i:05d}x" for i in range(5000)]
+    engine = RuleEngine(RuleTable(rules=[Rule(tool="hit", groups=[KeywordGroup(keywords=keywords)])]))
+    assert engine.match("some text with kw04321x inside") == "hit"
+    assert engine.match("some text with kw04321 inside") == "llm"
+
+
+def test_load_rule_table_from_json(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({
+        "default_tool": "llm",
+        "rules": [{"tool": "weather", "groups": [{"keywords": ["tenki"], "lang": "ja"}]}],
+    }))
+    engine = RuleEngine(load_rule_table(str(path)))
+    assert engine.match("Tokyo no tenki") == "weather"
+    assert engine.match("2 + 2") == "llm"
+
+
+def test_overlapping_keywords_across_groups():
+    engine = RuleEngine(RuleTable(rules=[
+        Rule(tool="weather", priority=1, groups=[KeywordGroup(keywords=["weather"])]),
+        Rule(tool="report", priority=10, groups=[KeywordGroup(keywords=["weather report"])]),
+        Rule(tool="transit", priority=1, groups=[KeywordGroup(keywords=["train"])]),
+        Rule(tool="rain", priority=10, groups=[KeywordGroup(keywords=["rain"])]),
+    ]))
+    assert engine.match("give me the weather report") == "report"  # same start, longer keyword
+    assert engine.match("when is the train") == "rain"  # "rain" inside "train"
+    assert engine.match("weather today") == "weather"
+    assert engine.matched_groups("the weather report for the train") == {"r0g0", "r1g0", "r2g0", "r3g0"}
+
+
+def test_unknown_tools_fall_back_to_llm(tmp_path, monkeypatch, caplog):
+    from app.config import get_settings
+    from app.rules import get_rule_engine
+
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({
+        "default_tool": "llm",
+        "rules": [
+            {"tool": "wether", "priority": 5, "groups": [{"keywords": ["tenki"]}]},
+            {"tool": "math", "groups": [{"keywords": ["sum"]}]},
+        ],
+    }))
+    monkeypatch.setattr(get_settings(), "routing_rules_path", str(path))
+    get_rule_engine.cache_clear()
+    try:
+        engine = get_rule_engine()
+        assert engine.match("Tokyo no tenki") == "llm"
+        assert engine.match("sum of 2 and 2") == "math"
+        assert "'wether'" in caplog.text
+    finally:
+        get_rule_engine.cache_clear()
@@ -0,0 +1,97 @@
+"""Tests for the semantic (paraphrase) answer cache."""
+import json
+import os
+
+import pytest
+
+from app.answer_cache import AnswerCache
+from app.providers import LLMProvider
+from app.semantic_cache import SemanticCache, embed, evaluate
+from app.tools.llm_tool import LLMTool
+
+PARAPHRASES = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "data", "paraphrases.jsonl")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingProvider(LLMProvider):
+    def __init__(self, name: str = "openai", answer: str = "Emmanuel Macron"):
+        self.name = name
+        self.model = "gpt-test"
+        self.answer = answer
+        self.calls = 0
+
+    async def complete(self, prompt: str) -> str:
+        self.calls += 1
+        return self.answer
+
+
+def test_embedding_ignores_stop_words_and_possessives():
+    a, b = embed("Who is France's president?"), embed("president of france")
+    assert float(a @ b) == pytest.approx(1.0)
+    assert not embed("what is it?").any()
+
+
+def test_paraphrase_hits_and_near_miss_misses():
+    provider = CountingProvider()
+    cache = SemanticCache(capacity=16, threshold=0.8)
+    cache.set("Who is the president of France?", provider, "Emmanuel Macron")
+    assert cache.get("who is France's president", [provider]) == "Emmanuel Macron"
+    assert cache.get("Who is the president of Germany?", [provider]) is None
+    assert cache.get("Who is the president of France?", [CountingProvider("gemini")]) is None
+
+
+def test_ttl_in_place_update_and_lru_eviction():
+    clock = FakeClock()
+    provider = CountingProvider()
+    cache = SemanticCache(capacity=2, threshold=0.8, ttl=10, clock=clock)
+    cache.set("capital of japan", provider, "Tokyo")
+    cache.set("Capital of Japan?", provider, "Tokyo (updated)")  # same question: same row
+    assert len(cache) == 1 and cache.get("capital of japan", [provider]) == "Tokyo (updated)"
+
+    clock.now = 1
+    cache.set("speed of light", provider, "299,792 km/s")
+    clock.now = 2
+    cache.get("capital of japan", [provider])  # touch: speed of light is now LRU
+    cache.set("height of mount everest", provider, "8,849 m")
+    assert cache.evictions == 1
+    assert cache.get("speed of light", [provider]) is None
+    assert cache.get("japan capital", [provider]) == "Tokyo (updated)"
+
+    clock.now = 20
+    assert cache.get("japan capital", [provider]) is None
+
+
+def test_plain_string_tags():
+    cache = SemanticCache(capacity=4, threshold=0.8)
+    cache.set("capital of japan", "eval", "Tokyo")
+    assert cache.get("japan capital", ["eval"]) == "Tokyo"
+    assert cache.get("japan capital", ["other"]) is None
+
+
+def test_labelled_paraphrase_report():
+    with open(PARAPHRASES, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    (report,) = evaluate(rows, [0.8], distractors=[f"item {i} of catalogue" for i in range(100)])
+    assert report["false_hit_rate"] == 0.0
+    assert report["hit_rate"] > 0.5
+    assert report["entries"] == 120
+
+
+@pytest.mark.asyncio
+async def test_llm_tool_serves_paraphrases_from_semantic_cache():
+    provider = CountingProvider()
+    tool = LLMTool(
+        providers=[provider],
+        cache=AnswerCache(ttl=60, memory_bytes=10_000),
+        semantic_cache=SemanticCache(capacity=16, threshold=0.8),
+    )
+    assert await tool.run("Who is the president of France?") == "Emmanuel Macron"
+    assert await tool.run("who is France's president") == "Emmanuel Macron"
+    assert provider.calls == 1
@@ -0,0 +1,101 @@
+"""Tests for speculative tool execution while the routing agent decides."""
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.agent import TOOLS_MAP, ToolSelection, agentic_select_and_run
+from app.answer_cache import answer_cache_bypassed
+from app.config import get_settings
+from app.routing_cache import get_routing_cache
+
+
+def slow_agent(tool, tool_input, delay=0.2):
+    agent = MagicMock()
+
+    async def ainvoke(_):
+        await asyncio.sleep(delay)
+        return ToolSelection(tool=tool, input=tool_input)
+
+    agent.ainvoke = MagicMock(side_effect=ainvoke)
+    return agent
+
+
+def sample(name, tool, outcome=None):
+    labels = {"tool": tool, **({"outcome": outcome} if outcome else {})}
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def speculative(monkeypatch):
+    runs = []
+
+    async def weather(city):
+        runs.append(city)
+        await asyncio.sleep(0.2)
+        return f"sunny in {city}"
+
+    monkeypatch.setattr(get_settings(), "speculative_execution", True)
+    monkeypatch.setattr(TOOLS_MAP["weather"], "run", weather)
+    get_routing_cache().clear()
+    yield runs
+    get_routing_cache().clear()
+
+
+@pytest.mark.asyncio
+async def test_hit_overlaps_tool_with_routing(speculative):
+    hits = sample("router_speculations_total", "weather", "hit")
+    with patch("app.agent._get_agent", return_value=slow_agent("weather", "paris")):
+        start = time.perf_counter()
+        result = await agentic_select_and_run("What's the weather in Paris?")
+        elapsed = time.perf_counter() - start
+
+    assert result["speculation"] == "hit" and result["result"] == "sunny in Paris"
+    assert elapsed < 0.35  # routing and tool overlapped, not 0.4 s
+    assert speculative == ["Paris"]  # the tool ran once
+    assert sample("router_speculations_total", "weather", "hit") == hits + 1
+    assert sample("router_speculation_saved_seconds_total", "weather") >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_miss_is_cancelled_and_counted_as_waste(speculative):
+    wasted = sample("router_speculation_wasted_seconds_total", "weather")
+    with patch("app.agent._get_agent", return_value=slow_agent("weather", "Tokyo", delay=0.1)):
+        result = await agentic_select_and_run("What's the weather in Paris?")
+
+    assert result["speculation"] == "miss" and result["result"] == "sunny in Tokyo"
+    assert speculative == ["Paris", "Tokyo"]
+    assert 0.05 < sample("router_speculation_wasted_seconds_total", "weather") - wasted < 0.2
+
+
+@pytest.mark.asyncio
+async def test_only_when_the_agent_is_consulted(speculative, monkeypatch):
+    with patch("app.agent._get_agent", return_value=slow_agent("llm", "Who wrote Hamlet?", delay=0)), \
+            patch.object(TOOLS_MAP["llm"], "run", return_value="Shakespeare"):
+        unpredictable = await agentic_select_and_run("Who wrote Hamlet?")
+    with patch("app.agent._get_agent", return_value=None):
+        heuristic = await agentic_select_and_run("What's the weather in Paris?")
+    monkeypatch.setattr(get_settings(), "speculative_execution", False)
+    with patch("app.agent._get_agent", return_value=slow_agent("weather", "Paris", delay=0)):
+        disabled = await agentic_select_and_run("What's the weather in Paris?")
+
+    assert "speculation" not in unpredictable and "speculation" not in heuristic
+    assert "speculation" not in disabled
+
+
+@pytest.mark.asyncio
+async def test_speculative_run_honours_bypass_cache(speculative, monkeypatch):
+    bypassed = []
+
+    async def llm(question):
+        bypassed.append(answer_cache_bypassed())
+        return "Shakespeare"
+
+    monkeypatch.setattr(get_settings(), "speculative_tools", "llm")
+    monkeypatch.setattr(TOOLS_MAP["llm"], "run", llm)
+    with patch("app.agent._get_agent", return_value=slow_agent("llm", "Who wrote Hamlet?", delay=0.05)):
+        result = await agentic_select_and_run("Who wrote Hamlet?", bypass_cache=True)
+
+    assert result["speculation"] == "hit" and bypassed == [True]
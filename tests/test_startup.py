@@ -0,0 +1,35 @@
+"""Tests for lazy SDK imports, warmup and readiness."""
+import subprocess
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+
+
+def test_importing_app_skips_llm_sdks():
+    heavy = ["openai", "langchain_core", "langchain_google_genai"]
+    code = f"import sys, app.main; print([m for m in {heavy!r} if m in sys.modules])"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_warmup_before_ready(monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(get_settings(), "startup_warmup", True)
+    with TestClient(app) as client:
+        assert client.get("/health/live").status_code == 200
+        deadline = time.monotonic() + 10
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        client.post("/query", json={"query": "What is 2 + 2?"})
+        health = client.get("/health").json()
+
+    assert health["ready"] is True
+    startup = health["startup"]
+    assert set(startup["warmup_ms"]) == {"router_chain", "routing_batcher", "providers", "caches", "tool_workers"}
+    assert startup["import_ms"] > 0 and startup["ready_after_ms"] >= startup["import_ms"]
+    assert startup["first_request_ms"] is not None
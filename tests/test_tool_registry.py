@@ -0,0 +1,133 @@
+"""Tests for tool discovery and the inline / thread / process execution policies."""
+import asyncio
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.admission import DeadlineExceeded, ToolTimeout, new_deadline
+from app.tools.base import Tool
+from app.tools.math_tool import MathTool
+from app.tools.registry import ToolRegistry, discover_tools, parse_policies
+
+
+class EchoTool(Tool):
+    name = "echo"
+    description = "Repeats the input."
+
+    async def run(self, query: str) -> str:
+        return query
+
+
+class SleepTool(Tool):
+    """Blocks for the number of seconds in the query."""
+
+    name = "sleep"
+    description = "Blocks."
+    execution = "thread"
+
+    async def run(self, query: str) -> str:
+        return self.run_sync(query)
+
+    def run_sync(self, query: str) -> str:
+        time.sleep(float(query))
+        return f"slept {query}"
+
+
+class SpinTool(SleepTool):
+    name = "spin"
+    execution = "process"
+
+
+class PidTool(SleepTool):
+    name = "pid"
+    execution = "process"
+
+    def run_sync(self, query: str) -> int:
+        return os.getpid()
+
+
+class FakeEntryPoint:
+    def __init__(self, name, obj):
+        self.name = name
+        self.obj = obj
+
+    def load(self):
+        if isinstance(self.obj, Exception):
+            raise self.obj
+        return self.obj
+
+
+def test_discovery_and_policy_overrides():
+    with patch("app.tools.registry.entry_points", return_value=[
+        FakeEntryPoint("sleep", SleepTool),
+        FakeEntryPoint("broken", ImportError("missing dependency")),
+    ]):
+        tools = discover_tools(f"{__name__}:EchoTool")
+    registry = ToolRegistry(tools, policies=parse_policies("sleep=process, weather=inline"))
+    assert list(registry.tools) == ["math", "weather", "llm", "echo", "sleep"]
+    assert registry.policy("math") == "inline"  # declared by MathTool
+    assert registry.policy("sleep") == "process"  # overridden
+    assert registry.policy("echo") == "inline"
+    with pytest.raises(ValueError):
+        parse_policies("math=gpu")
+    with pytest.raises(ValueError):
+        ToolRegistry([EchoTool()], policies={"echo": "thread"})  # no run_sync
+
+
+@pytest.mark.asyncio
+async def test_thread_policy_keeps_the_loop_free():
+    registry = ToolRegistry([SleepTool()], thread_workers=4, hard_timeout=0.3)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    counter = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(registry.run("sleep", "0.1") for _ in range(4)))
+    elapsed = time.perf_counter() - start
+    counter.cancel()
+    assert results == ["slept 0.1"] * 4
+    assert elapsed < 0.3 and ticks >= 5
+    with pytest.raises(ToolTimeout):
+        await registry.run("sleep", "1")
+    assert registry.stats["executors"]["thread"]["abandoned"] == 1
+    registry.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_policy_hard_timeout_kills_and_retries():
+    registry = ToolRegistry([MathTool(), SpinTool()], {"math": "process"}, process_workers=2, hard_timeout=2.0)
+    await registry.start()
+    assert await registry.run("math", "What is 2 ** 10?") == "1024"
+    with pytest.raises(ValueError, match="Division by zero"):
+        await registry.run("math", "1 / 0")
+
+    # the stuck call's worker is killed; the innocent call sharing the pool is retried
+    stuck = asyncio.create_task(registry.run("spin", "30"))
+    await asyncio.sleep(1.7)
+    innocent = asyncio.create_task(registry.run("spin", "0.5"))
+    with pytest.raises(ToolTimeout):
+        await stuck
+    assert await innocent == "slept 0.5"
+    stats = registry.stats["executors"]["process"]
+    assert stats["timeouts"] == 1 and stats["restarts"] == 1 and stats["retries"] == 1
+    assert await registry.run("math", "6 * 7") == "42"
+
+    with pytest.raises(DeadlineExceeded):
+        await registry.run("spin", "30", new_deadline(200))
+    registry.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_workers_are_recycled():
+    registry = ToolRegistry([PidTool()], process_workers=1, process_max_tasks=2)
+    pids = [await registry.run("pid", "") for _ in range(4)]
+    assert pids[0] == pids[1] != pids[2] == pids[3]
+    assert os.getpid() not in pids
+    registry.shutdown()
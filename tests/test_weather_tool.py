@@ -1,6 +1,15 @@
 """Tests for the weather tool."""
 import pytest
-from app.tools.weather_tool import WeatherTool
+from app.config import get_settings
+from app.gazetteer import BUNDLED_INDEX, get_gazetteer
+from app.tools.weather_tool import WeatherTool, get_weather_cache
+
+
+@pytest.fixture(autouse=True)
+def _clear_weather_cache():
+    get_weather_cache().clear()
+    yield
+    get_weather_cache().clear()
 
 
 @pytest.mark.asyncio
@@ -29,3 +38,122 @@ async def test_weather_empty_city():
     assert isinstance(result, str)
     # Should contain some city name (default or error message)
     assert len(result) > 0
+
+
+@pytest.mark.asyncio
+async def test_weather_uses_shared_client(monkeypatch):
+    import httpx
+    from app import http_client
+
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params["q"])
+        return httpx.Response(200, json={
+            "name": request.url.params["q"],
+            "main": {"temp": 20},
+            "weather": [{"description": "clear sky"}],
+            "sys": {"country": "FR"},
+        })
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_client, "_client", client)
+    try:
+        tool = WeatherTool()
+        assert await tool.run("Paris") == "It's 20°C and clear sky in Paris, FR."
+        await tool.run("Lyon")
+        assert calls == ["Paris", "Lyon"]
+        assert http_client.get_http_client() is client
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_weather_cache_hits_and_coalesces(monkeypatch):
+    import asyncio
+
+    calls = []
+
+    async def fake_fetch(self, city):
+        calls.append(city)
+        await asyncio.sleep(0.01)
+        return {"name": city, "main": {"temp": 15}, "weather": [{"description": "rain"}]}
+
+    monkeypatch.setattr(WeatherTool, "_fetch", fake_fetch)
+    cache = get_weather_cache()
+    before = cache.stats
+    tool = WeatherTool()
+    results = await asyncio.gather(*(tool.run(c) for c in ["Oslo", "oslo ", "  OSLO"]))
+    assert len(calls) == 1
+    assert all("rain" in r for r in results)
+    await tool.run("Oslo")
+    assert len(calls) == 1
+    assert cache.stats["hits"] - before["hits"] == 1
+
+
+@pytest.fixture
+def upstream_cities(monkeypatch):
+    calls = []
+
+    async def fake_fetch(self, city):
+        calls.append(city)
+        return {"name": city, "main": {"temp": 9}, "weather": [{"description": "fog"}]}
+
+    monkeypatch.setattr(WeatherTool, "_fetch", fake_fetch)
+    get_gazetteer.cache_clear()
+    yield calls
+    get_gazetteer.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_misspelled_city_is_normalized_before_upstream(upstream_cities, monkeypatch):
+    monkeypatch.setattr(get_settings(), "gazetteer_path", str(BUNDLED_INDEX))  # stands in for a full list
+    tool = WeatherTool()
+    await tool.run("Pariss")
+    await tool.run("paris")
+    await tool.run("München")
+    assert upstream_cities == ["Paris", "Munich"]
+
+
+@pytest.mark.asyncio
+async def test_bundled_index_does_not_remap_unknown_cities(upstream_cities):
+    tool = WeatherTool()
+    await tool.run("Kiel")  # closest bundled city is Kyiv
+    await tool.run("Pariss")
+    await tool.run("München")  # aliases still match exactly
+    assert upstream_cities == ["Kiel", "Pariss", "Munich"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cities_share_group_requests(monkeypatch):
+    import asyncio
+    import httpx
+    from app import http_client
+    from app.tools import weather_tool
+    from app.weather_batcher import WeatherBatcher
+
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        ids = [int(i) for i in request.url.params["id"].split(",")]
+        requests.append(ids)
+        return httpx.Response(200, json={"cnt": len(ids), "list": [
+            {"id": i, "name": f"City {i}", "main": {"temp": 10}, "weather": [{"description": "mist"}]}
+            for i in ids if i != 2643743  # London missing from the answer
+        ]})
+
+    batcher = WeatherBatcher("http://owm.test/data/2.5/group", window=0.02, max_size=3)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_client, "_client", client)
+    monkeypatch.setattr(weather_tool, "get_weather_batcher", lambda: batcher)
+    try:
+        cities = ["Paris", "Tokyo", "Berlin", "Jakarta", "London", "Atlantis"]
+        results = await asyncio.gather(*(WeatherTool().run(c) for c in cities))
+    finally:
+        await client.aclose()
+
+    assert sorted(map(len, requests)) == [2, 3]  # 5 known cities, at most 3 per request
+    assert results[0] == "It's 10°C and mist in City 2988507."
+    assert "don't have access" in results[4]  # London only
+    assert "Atlantis" in results[5]  # not in the gazetteer: single lookup (no API key here)
+    assert batcher.batches == 2 and batcher.lookups == 5